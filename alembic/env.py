@@ -62,8 +62,13 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
+        # One transaction per migration, so a long data migration that
+        # commits in chunks (culinary_compass.migrations) doesn't also
+        # commit the revisions before it
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
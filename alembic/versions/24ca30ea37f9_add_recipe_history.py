@@ -0,0 +1,60 @@
+"""add recipe history
+
+Revision ID: 24ca30ea37f9
+Revises: 8ae6db061d11
+Create Date: 2026-10-19 22:31:05.618342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '24ca30ea37f9'
+down_revision: Union[str, Sequence[str], None] = '8ae6db061d11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app's create_tables() may already have made these on an unmigrated database
+    op.create_table(
+        'text_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('hash'),
+        sqlite_with_rowid=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        'recipe_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.Float(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('prep_time', sa.Integer(), nullable=True),
+        sa.Column('cook_time', sa.Integer(), nullable=True),
+        sa.Column('serving_size', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('description_hash', sa.String(length=64), nullable=True),
+        sa.Column('instructions_hash', sa.String(length=64), nullable=True),
+        sa.Column('lines_hash', sa.String(length=64), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id']),
+        sa.ForeignKeyConstraint(['description_hash'], ['text_blobs.hash']),
+        sa.ForeignKeyConstraint(['instructions_hash'], ['text_blobs.hash']),
+        sa.ForeignKeyConstraint(['lines_hash'], ['text_blobs.hash']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_recipe_history_recipe_id_id', 'recipe_history', ['recipe_id', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipe_history_recipe_id_id', table_name='recipe_history')
+    op.drop_table('recipe_history')
+    op.drop_table('text_blobs')
@@ -0,0 +1,41 @@
+"""add recipe total_time
+
+Revision ID: 5d8b7f3e2c64
+Revises: a1c4e2f09b31
+Create Date: 2026-10-19 10:41:37.208145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8b7f3e2c64'
+down_revision: Union[str, Sequence[str], None] = 'a1c4e2f09b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('recipes')]
+    if 'total_time' not in columns:
+        # SQLite can only add VIRTUAL generated columns with ALTER TABLE.
+        # Existing rows are covered immediately, and the indexes below
+        # store the computed values so range scans never recompute them.
+        op.add_column('recipes', sa.Column(
+            'total_time', sa.Integer,
+            sa.Computed('coalesce(prep_time, 0) + coalesce(cook_time, 0)'),
+        ))
+    op.create_index('ix_recipes_total_time', 'recipes', ['total_time'], if_not_exists=True)
+    op.create_index('ix_recipes_category_id_total_time', 'recipes', ['category_id', 'total_time'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipes_category_id_total_time', table_name='recipes')
+    op.drop_index('ix_recipes_total_time', table_name='recipes')
+    with op.batch_alter_table('recipes') as batch_op:
+        batch_op.drop_column('total_time')
@@ -0,0 +1,115 @@
+"""add nutrition
+
+Revision ID: 7b3e9d0c5a21
+Revises: e4f07a3b9d12
+Create Date: 2026-10-19 18:05:42.117306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9d0c5a21'
+down_revision: Union[str, Sequence[str], None] = 'e4f07a3b9d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DROP = "DELETE FROM recipe_nutrition WHERE recipe_id = {}"
+DROP_USERS = (
+    "DELETE FROM recipe_nutrition WHERE recipe_id IN "
+    "(SELECT recipe_id FROM recipe_ingredients WHERE ingredient_id = {})"
+)
+LINE_CHANGED = " OR ".join(
+    f"NEW.{column} IS NOT OLD.{column}" for column in ("recipe_id", "ingredient_id", "quantity", "unit")
+)
+FACTS_CHANGED = " OR ".join(
+    f"NEW.{column} IS NOT OLD.{column}"
+    for column in ("ingredient_id", "dimension", "base_amount", "kcal", "protein", "fat", "carbs")
+)
+
+# Invalidation triggers for cached recipe totals, as of this revision
+TRIGGERS = {
+    'recipe_ingredients_nutrition_insert':
+        f"AFTER INSERT ON recipe_ingredients BEGIN {DROP.format('NEW.recipe_id')}; END",
+    'recipe_ingredients_nutrition_update':
+        f"AFTER UPDATE ON recipe_ingredients WHEN {LINE_CHANGED} "
+        f"BEGIN {DROP.format('OLD.recipe_id')}; {DROP.format('NEW.recipe_id')}; END",
+    'recipe_ingredients_nutrition_delete':
+        f"AFTER DELETE ON recipe_ingredients BEGIN {DROP.format('OLD.recipe_id')}; END",
+    'recipes_nutrition_delete':
+        f"AFTER DELETE ON recipes BEGIN {DROP.format('OLD.id')}; END",
+    'ingredient_nutrients_nutrition_insert':
+        f"AFTER INSERT ON ingredient_nutrients BEGIN {DROP_USERS.format('NEW.ingredient_id')}; END",
+    'ingredient_nutrients_nutrition_update':
+        f"AFTER UPDATE ON ingredient_nutrients WHEN {FACTS_CHANGED} "
+        f"BEGIN {DROP_USERS.format('OLD.ingredient_id')}; {DROP_USERS.format('NEW.ingredient_id')}; END",
+    'ingredient_nutrients_nutrition_delete':
+        f"AFTER DELETE ON ingredient_nutrients BEGIN {DROP_USERS.format('OLD.ingredient_id')}; END",
+}
+
+# Revision-tracking triggers for the new table (see e4f07a3b9d12)
+BUMP = "UPDATE sync_state SET revision = revision + 1 WHERE id = 1;"
+CURRENT = "(SELECT revision FROM sync_state WHERE id = 1)"
+REVISION_TRIGGERS = {
+    'ingredient_nutrients_revision_insert':
+        f"AFTER INSERT ON ingredient_nutrients "
+        f"BEGIN {BUMP} UPDATE ingredient_nutrients SET revision = {CURRENT} WHERE id = NEW.id; END",
+    'ingredient_nutrients_revision_update':
+        f"AFTER UPDATE ON ingredient_nutrients WHEN NEW.revision IS OLD.revision "
+        f"BEGIN {BUMP} UPDATE ingredient_nutrients SET revision = {CURRENT} WHERE id = NEW.id; END",
+    'ingredient_nutrients_revision_delete':
+        f"AFTER DELETE ON ingredient_nutrients "
+        f"BEGIN {BUMP} INSERT INTO sync_tombstones (table_name, row_key, revision) "
+        f"VALUES ('ingredient_nutrients', OLD.id, {CURRENT}); END",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app's create_tables() may already have made these on an unmigrated database
+    op.create_table(
+        'ingredient_nutrients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('unit', sa.String(length=50), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('kcal', sa.Float(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=False),
+        sa.Column('fat', sa.Float(), nullable=False),
+        sa.Column('carbs', sa.Float(), nullable=False),
+        sa.Column('dimension', sa.String(length=50), nullable=False),
+        sa.Column('base_amount', sa.Float(), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ingredient_id', 'dimension', name='uq_ingredient_nutrients_ingredient_dimension'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_ingredient_nutrients_revision', 'ingredient_nutrients', ['revision'], if_not_exists=True)
+    op.create_table(
+        'recipe_nutrition',
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('kcal', sa.Float(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=False),
+        sa.Column('fat', sa.Float(), nullable=False),
+        sa.Column('carbs', sa.Float(), nullable=False),
+        sa.Column('lines', sa.Integer(), nullable=False),
+        sa.Column('matched_lines', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('recipe_id'),
+        if_not_exists=True,
+    )
+    for name, body in {**TRIGGERS, **REVISION_TRIGGERS}.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in {**TRIGGERS, **REVISION_TRIGGERS}:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table('recipe_nutrition')
+    op.drop_index('ix_ingredient_nutrients_revision', table_name='ingredient_nutrients')
+    op.drop_table('ingredient_nutrients')
@@ -0,0 +1,65 @@
+"""unique recipe lines
+
+Revision ID: 8ae6db061d11
+Revises: d3a91c7e5f28
+Create Date: 2026-10-19 21:47:13.402186
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8ae6db061d11'
+down_revision: Union[str, Sequence[str], None] = 'd3a91c7e5f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Lines sharing a recipe, ingredient and unit, with the id kept for each group
+# and the summed quantity it takes. A missing unit counts as ''. Keyed by the
+# kept id so the statements below look groups up instead of scanning them
+MERGES = """
+CREATE TEMP TABLE recipe_line_merges (
+    keep_id INTEGER PRIMARY KEY, recipe_id INTEGER, ingredient_id INTEGER, unit_key TEXT, quantity FLOAT
+)
+""".strip()
+FIND_MERGES = """
+INSERT INTO recipe_line_merges (keep_id, recipe_id, ingredient_id, unit_key, quantity)
+SELECT min(id), recipe_id, ingredient_id, coalesce(unit, ''), sum(quantity)
+FROM recipe_ingredients
+GROUP BY recipe_id, ingredient_id, coalesce(unit, '')
+HAVING count(*) > 1
+""".strip()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(MERGES)
+    op.execute(FIND_MERGES)
+    op.execute(
+        "UPDATE recipe_ingredients "
+        "SET quantity = (SELECT m.quantity FROM recipe_line_merges AS m WHERE m.keep_id = recipe_ingredients.id) "
+        "WHERE id IN (SELECT keep_id FROM recipe_line_merges)"
+    )
+    # Deletes go through the revision triggers, so replicas drop the merged lines too
+    op.execute(
+        "DELETE FROM recipe_ingredients WHERE id IN ("
+        "SELECT r.id FROM recipe_line_merges AS m JOIN recipe_ingredients AS r "
+        "ON r.recipe_id = m.recipe_id AND r.ingredient_id = m.ingredient_id "
+        "AND coalesce(r.unit, '') = m.unit_key AND r.id != m.keep_id)"
+    )
+    op.execute("DROP TABLE recipe_line_merges")
+    op.create_index(
+        'uq_recipe_ingredients_line',
+        'recipe_ingredients',
+        ['recipe_id', 'ingredient_id', sa.text("coalesce(unit, '')")],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_recipe_ingredients_line', table_name='recipe_ingredients')
@@ -0,0 +1,32 @@
+"""add search indexes
+
+Revision ID: a1c4e2f09b31
+Revises:
+Create Date: 2026-10-19 09:12:04.512311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e2f09b31'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Foreign key indexes used by the recipe filter's EXISTS / IN subqueries
+    op.create_index('ix_recipes_category_id', 'recipes', ['category_id'], if_not_exists=True)
+    op.create_index('ix_recipe_ingredients_recipe_id', 'recipe_ingredients', ['recipe_id'], if_not_exists=True)
+    op.create_index('ix_recipe_ingredients_ingredient_id', 'recipe_ingredients', ['ingredient_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipe_ingredients_ingredient_id', table_name='recipe_ingredients')
+    op.drop_index('ix_recipe_ingredients_recipe_id', table_name='recipe_ingredients')
+    op.drop_index('ix_recipes_category_id', table_name='recipes')
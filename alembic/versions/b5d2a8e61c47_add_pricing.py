@@ -0,0 +1,85 @@
+"""add pricing
+
+Revision ID: b5d2a8e61c47
+Revises: 7b3e9d0c5a21
+Create Date: 2026-10-19 19:12:08.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d2a8e61c47'
+down_revision: Union[str, Sequence[str], None] = '7b3e9d0c5a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MARK = "UPDATE recipes SET cost_stale = 1 WHERE id = {} AND cost_stale = 0"
+LINE_CHANGED = " OR ".join(
+    f"NEW.{column} IS NOT OLD.{column}" for column in ("recipe_id", "ingredient_id", "quantity", "unit")
+)
+
+# Triggers marking recipe costs stale, as of this revision
+TRIGGERS = {
+    'recipe_ingredients_cost_insert':
+        f"AFTER INSERT ON recipe_ingredients BEGIN {MARK.format('NEW.recipe_id')}; END",
+    'recipe_ingredients_cost_update':
+        f"AFTER UPDATE ON recipe_ingredients WHEN {LINE_CHANGED} "
+        f"BEGIN {MARK.format('OLD.recipe_id')}; {MARK.format('NEW.recipe_id')}; END",
+    'recipe_ingredients_cost_delete':
+        f"AFTER DELETE ON recipe_ingredients BEGIN {MARK.format('OLD.recipe_id')}; END",
+}
+
+PRICE_COLUMNS = [
+    sa.Column('price', sa.Float()),
+    sa.Column('price_unit', sa.String(length=50)),
+    sa.Column('price_amount', sa.Float()),
+    sa.Column('price_dimension', sa.String(length=50)),
+    sa.Column('price_base_amount', sa.Float()),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app's create_tables() may already have made the tables with these
+    # columns, on a database that was never migrated
+    inspector = sa.inspect(op.get_bind())
+    ingredient_columns = [column['name'] for column in inspector.get_columns('ingredients')]
+    for column in PRICE_COLUMNS:
+        if column.name not in ingredient_columns:
+            op.add_column('ingredients', column)
+    recipe_columns = [column['name'] for column in inspector.get_columns('recipes')]
+    if 'cost' not in recipe_columns:
+        op.add_column('recipes', sa.Column('cost', sa.Float()))
+    if 'cost_stale' not in recipe_columns:
+        # Existing recipes start stale and are costed on first use
+        op.add_column('recipes', sa.Column('cost_stale', sa.Boolean(), nullable=False, server_default=sa.text('1')))
+    if 'cost_per_serving' not in recipe_columns:
+        # SQLite can only add VIRTUAL generated columns with ALTER TABLE
+        op.add_column('recipes', sa.Column(
+            'cost_per_serving', sa.Float(),
+            sa.Computed('cost / coalesce(nullif(serving_size, 0), 1)'),
+        ))
+    op.create_index('ix_recipes_cost', 'recipes', ['cost'], if_not_exists=True)
+    op.create_index('ix_recipes_cost_per_serving', 'recipes', ['cost_per_serving'], if_not_exists=True)
+    op.create_index('ix_recipes_cost_stale', 'recipes', ['cost_stale'], sqlite_where=sa.text('cost_stale = 1'),
+                    if_not_exists=True)
+    for name, body in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_index('ix_recipes_cost_stale', table_name='recipes')
+    op.drop_index('ix_recipes_cost_per_serving', table_name='recipes')
+    op.drop_index('ix_recipes_cost', table_name='recipes')
+    # Native DROP COLUMN: a batch table copy can't re-insert into total_time
+    for name in ('cost_per_serving', 'cost_stale', 'cost'):
+        op.drop_column('recipes', name)
+    for column in reversed(PRICE_COLUMNS):
+        op.drop_column('ingredients', column.name)
@@ -0,0 +1,60 @@
+"""add tags
+
+Revision ID: c92e61d4a7f0
+Revises: 5d8b7f3e2c64
+Create Date: 2026-10-19 13:05:52.774019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c92e61d4a7f0'
+down_revision: Union[str, Sequence[str], None] = '5d8b7f3e2c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app's create_tables() may already have made these on an unmigrated database
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'recipe_tags',
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('tag_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('recipe_id', 'tag_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_recipe_tags_tag_id', 'recipe_tags', ['tag_id'], if_not_exists=True)
+
+    # Turn every category into a tag of the same name and tag its recipes,
+    # as two set-based statements rather than a row-by-row copy
+    op.execute(
+        "INSERT OR IGNORE INTO tags (name) SELECT DISTINCT name FROM categories"
+    )
+    op.execute(
+        "INSERT OR IGNORE INTO recipe_tags (recipe_id, tag_id) "
+        "SELECT recipes.id, tags.id FROM recipes "
+        "JOIN categories ON categories.id = recipes.category_id "
+        "JOIN tags ON tags.name = categories.name"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipe_tags_tag_id', table_name='recipe_tags')
+    op.drop_table('recipe_tags')
+    op.drop_table('tags')
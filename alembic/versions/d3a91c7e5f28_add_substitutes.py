@@ -0,0 +1,115 @@
+"""add substitutes
+
+Revision ID: d3a91c7e5f28
+Revises: b5d2a8e61c47
+Create Date: 2026-10-19 20:03:51.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a91c7e5f28'
+down_revision: Union[str, Sequence[str], None] = 'b5d2a8e61c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EXTEND = """
+INSERT INTO substitute_closure (ingredient_id, substitute_id, ratio, hops)
+SELECT x.ingredient_id, y.substitute_id, x.ratio * NEW.ratio * y.ratio, x.hops + 1 + y.hops
+FROM (SELECT ingredient_id, ratio, hops FROM substitute_closure WHERE substitute_id = NEW.ingredient_id
+      UNION ALL SELECT NEW.ingredient_id, 1.0, 0) AS x,
+     (SELECT substitute_id, ratio, hops FROM substitute_closure WHERE ingredient_id = NEW.substitute_id
+      UNION ALL SELECT NEW.substitute_id, 1.0, 0) AS y
+WHERE x.ingredient_id != y.substitute_id
+ON CONFLICT (ingredient_id, substitute_id) DO UPDATE
+SET ratio = excluded.ratio, hops = excluded.hops
+WHERE excluded.hops < substitute_closure.hops
+""".strip()
+MARK_STALE = "UPDATE substitute_closure_state SET stale = 1 WHERE id = 1"
+EDGE_CHANGED = " OR ".join(
+    f"NEW.{column} IS NOT OLD.{column}" for column in ("ingredient_id", "substitute_id", "ratio")
+)
+
+# Closure maintenance triggers, as of this revision
+TRIGGERS = {
+    'ingredient_substitutes_closure_insert':
+        f"AFTER INSERT ON ingredient_substitutes BEGIN {EXTEND}; END",
+    'ingredient_substitutes_closure_update':
+        f"AFTER UPDATE ON ingredient_substitutes WHEN {EDGE_CHANGED} BEGIN {MARK_STALE}; END",
+    'ingredient_substitutes_closure_delete':
+        f"AFTER DELETE ON ingredient_substitutes BEGIN {MARK_STALE}; END",
+    'ingredients_substitutes_delete':
+        "AFTER DELETE ON ingredients "
+        "BEGIN DELETE FROM ingredient_substitutes WHERE ingredient_id = OLD.id OR substitute_id = OLD.id; END",
+}
+
+# Revision-tracking triggers for the new table (see e4f07a3b9d12)
+BUMP = "UPDATE sync_state SET revision = revision + 1 WHERE id = 1;"
+CURRENT = "(SELECT revision FROM sync_state WHERE id = 1)"
+REVISION_TRIGGERS = {
+    'ingredient_substitutes_revision_insert':
+        f"AFTER INSERT ON ingredient_substitutes "
+        f"BEGIN {BUMP} UPDATE ingredient_substitutes SET revision = {CURRENT} WHERE id = NEW.id; END",
+    'ingredient_substitutes_revision_update':
+        f"AFTER UPDATE ON ingredient_substitutes WHEN NEW.revision IS OLD.revision "
+        f"BEGIN {BUMP} UPDATE ingredient_substitutes SET revision = {CURRENT} WHERE id = NEW.id; END",
+    'ingredient_substitutes_revision_delete':
+        f"AFTER DELETE ON ingredient_substitutes "
+        f"BEGIN {BUMP} INSERT INTO sync_tombstones (table_name, row_key, revision) "
+        f"VALUES ('ingredient_substitutes', OLD.id, {CURRENT}); END",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app's create_tables() may already have made these on an unmigrated database
+    op.create_table(
+        'ingredient_substitutes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('substitute_id', sa.Integer(), nullable=False),
+        sa.Column('ratio', sa.Float(), nullable=False),
+        sa.Column('note', sa.String(length=200), nullable=True),
+        sa.Column('revision', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['substitute_id'], ['ingredients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ingredient_id', 'substitute_id', name='uq_ingredient_substitutes_pair'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_ingredient_substitutes_revision', 'ingredient_substitutes', ['revision'], if_not_exists=True)
+    op.create_table(
+        'substitute_closure',
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('substitute_id', sa.Integer(), nullable=False),
+        sa.Column('ratio', sa.Float(), nullable=False),
+        sa.Column('hops', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ingredient_id', 'substitute_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_substitute_closure_substitute_id', 'substitute_closure', ['substitute_id'], if_not_exists=True)
+    op.create_table(
+        'substitute_closure_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('stale', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.execute("INSERT OR IGNORE INTO substitute_closure_state (id, stale) VALUES (1, 0)")
+    for name, body in {**TRIGGERS, **REVISION_TRIGGERS}.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in {**TRIGGERS, **REVISION_TRIGGERS}:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table('substitute_closure_state')
+    op.drop_index('ix_substitute_closure_substitute_id', table_name='substitute_closure')
+    op.drop_table('substitute_closure')
+    op.drop_index('ix_ingredient_substitutes_revision', table_name='ingredient_substitutes')
+    op.drop_table('ingredient_substitutes')
@@ -0,0 +1,98 @@
+"""add revision tracking
+
+Revision ID: e4f07a3b9d12
+Revises: c92e61d4a7f0
+Create Date: 2026-10-19 16:27:11.903452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f07a3b9d12'
+down_revision: Union[str, Sequence[str], None] = 'c92e61d4a7f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tracked tables and their key columns, as of this revision
+TRACKED_TABLES = {
+    'categories': ['id'],
+    'ingredients': ['id'],
+    'tags': ['id'],
+    'recipes': ['id'],
+    'recipe_ingredients': ['id'],
+    'recipe_tags': ['recipe_id', 'tag_id'],
+}
+
+
+def trigger_statements(table, key_columns):
+    bump = "UPDATE sync_state SET revision = revision + 1 WHERE id = 1;"
+    current = "(SELECT revision FROM sync_state WHERE id = 1)"
+    match = " AND ".join(f"{column} = NEW.{column}" for column in key_columns)
+    row_key = " || ',' || ".join(f"OLD.{column}" for column in key_columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_revision_insert AFTER INSERT ON {table} "
+        f"BEGIN {bump} UPDATE {table} SET revision = {current} WHERE {match}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_revision_update AFTER UPDATE ON {table} "
+        f"WHEN NEW.revision IS OLD.revision "
+        f"BEGIN {bump} UPDATE {table} SET revision = {current} WHERE {match}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_revision_delete AFTER DELETE ON {table} "
+        f"BEGIN {bump} INSERT INTO sync_tombstones (table_name, row_key, revision) "
+        f"VALUES ('{table}', {row_key}, {current}); END",
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app's create_tables() may already have made these on an unmigrated
+    # database, along with the newer tracked tables and their triggers
+    op.create_table(
+        'sync_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('row_key', sa.String(length=100), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_sync_tombstones_revision', 'sync_tombstones', ['revision'], if_not_exists=True)
+
+    # Existing rows all start at revision 1, so a first export with --since 0
+    # is a full copy
+    op.execute(
+        "INSERT INTO sync_state (id, revision) VALUES (1, 1) "
+        "ON CONFLICT (id) DO UPDATE SET revision = max(revision, 1)"
+    )
+    inspector = sa.inspect(op.get_bind())
+    for table, key_columns in TRACKED_TABLES.items():
+        columns = [column['name'] for column in inspector.get_columns(table)]
+        if 'revision' not in columns:
+            op.add_column(table, sa.Column('revision', sa.Integer(), nullable=True))
+            op.execute(f"UPDATE {table} SET revision = 1")
+        op.create_index(f'ix_{table}_revision', table, ['revision'], if_not_exists=True)
+        for statement in trigger_statements(table, key_columns):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(list(TRACKED_TABLES)):
+        for suffix in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_revision_{suffix}")
+        op.drop_index(f'ix_{table}_revision', table_name=table)
+        # Native DROP COLUMN (SQLite 3.35+): a batch table copy would try to
+        # write recipes.total_time, which is a generated column
+        op.drop_column(table, 'revision')
+    op.drop_index('ix_sync_tombstones_revision', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.drop_table('sync_state')
@@ -0,0 +1,44 @@
+"""delete nutrition with ingredient
+
+Revision ID: f6b1c83e2d47
+Revises: 24ca30ea37f9
+Create Date: 2026-10-20 09:14:26.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b1c83e2d47'
+down_revision: Union[str, Sequence[str], None] = '24ca30ea37f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DROP_USERS = (
+    "DELETE FROM recipe_nutrition WHERE recipe_id IN "
+    "(SELECT recipe_id FROM recipe_ingredients WHERE ingredient_id = {})"
+)
+
+# Without this, a deleted ingredient's facts pass to the next ingredient given its id
+TRIGGERS = {
+    'ingredients_nutrition_delete':
+        f"AFTER DELETE ON ingredients "
+        f"BEGIN {DROP_USERS.format('OLD.id')}; DELETE FROM ingredient_nutrients WHERE ingredient_id = OLD.id; END",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, body in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    # Facts left behind by ingredients deleted before the trigger existed. Their
+    # delete triggers drop the cached totals of any recipe still using the id
+    op.execute("DELETE FROM ingredient_nutrients WHERE ingredient_id NOT IN (SELECT id FROM ingredients)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark online backup throughput and how long a concurrent writer waits.
+
+A writer thread commits a small update every 10ms while the backup runs,
+and reports its worst wait for the write lock at each step size.
+
+Usage: python benchmarks/bench_backup.py [recipe_count]   (default 100,000)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.backup import backup_database
+
+
+def writer(path, stop, waits):
+    conn = sqlite3.connect(path, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute("UPDATE categories SET name = name WHERE id = 1")
+        conn.commit()
+        waits.append(time.perf_counter() - start)
+        time.sleep(0.01)
+    conn.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_catalog(path, count).dispose()
+        size = os.path.getsize(path) / 1024 / 1024
+
+        for pages in (-1, 4096, 256):
+            stop, waits = threading.Event(), []
+            thread = threading.Thread(target=writer, args=(path, stop, waits))
+            thread.start()
+            stats = backup_database(path, os.path.join(tmp, "backup.db"), pages=pages, sleep=0.001)
+            stop.set()
+            thread.join()
+            print(f"pages={pages:>5}  {stats.seconds:6.2f}s  {size / stats.seconds:7.1f} MiB/s  "
+                  f"{len(waits):4} writes, worst wait {max(waits, default=0) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
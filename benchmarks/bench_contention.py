@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent writers on one SQLite file, with and without the
+retry policy in models/writes.py.
+
+Each writer process alternates creating a category and renaming a shared
+recipe. The baseline performs the same read-then-write transactions with
+pysqlite's default deferred BEGIN and no retries, using the same busy
+timeout.
+
+Usage: python benchmarks/bench_contention.py [writers] [writes_per_writer]   (default 8, 200)
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from culinary_compass.models import Base, Category, Recipe, configure_sqlite, write_stats
+from culinary_compass.models.base import BUSY_TIMEOUT_MS
+
+
+def with_retries(path, writes):
+    engine = configure_sqlite(create_engine(f"sqlite:///{path}"))
+    session = sessionmaker(bind=engine)()
+    for i in range(writes):
+        Category.create(session, name=f"Category {os.getpid()} {i}")
+        Recipe.update(session, 1, name=f"Renamed {os.getpid()} {i}")
+    session.close()
+    return write_stats.as_dict()
+
+
+def without_retries(path, writes):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": BUSY_TIMEOUT_MS / 1000})
+    session = sessionmaker(bind=engine)()
+    failures = 0
+    for i in range(writes):
+        for write in (
+            lambda: session.add(Category(name=f"Category {os.getpid()} {i}")),
+            lambda: setattr(session.get(Recipe, 1), "name", f"Renamed {os.getpid()} {i}"),
+        ):
+            try:
+                write()
+                session.commit()
+            except OperationalError:
+                session.rollback()
+                failures += 1
+    session.close()
+    return {"writes": 2 * writes - failures, "failures": failures, "retries": 0, "max_wait_seconds": 0}
+
+
+def run(worker, writers, writes):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as session:
+            session.add(Recipe(name="Shared"))
+            session.commit()
+        engine.dispose()
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(writers) as pool:
+            results = list(pool.map(worker, [path] * writers, [writes] * writers))
+        elapsed = time.perf_counter() - start
+
+    total = {key: sum(r[key] for r in results) for key in ("writes", "failures", "retries")}
+    worst = max(r["max_wait_seconds"] for r in results)
+    print(f"{worker.__name__:16} {elapsed:6.2f}s  {total['writes']:6} ok  {total['failures']:5} failed  "
+          f"{total['retries']:5} retries  worst lock wait {worst * 1000:7.1f}ms")
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(without_retries, writers, writes)
+    run(with_retries, writers, writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-command latency: run.py vs the thin client vs in-process
+requests to the daemon.
+
+Runs `category list --format tsv` against a small catalog in a temporary
+directory, with output sent to /dev/null.
+
+Usage: python benchmarks/bench_daemon.py [runs]   (default 20)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog import build_catalog
+from culinary_compass.client import run_command, send_request
+
+COMMAND = ["--format", "tsv", "category", "list"]
+
+
+def timed(runs, func):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def report(label, seconds):
+    print(f"{label:24} {seconds * 1000:8.1f}ms per command")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_catalog(os.path.join(tmp, "culinary_compass.db"), 1000).dispose()
+        socket_path = os.path.join(tmp, "daemon.sock")
+        env = dict(os.environ, CC_DAEMON_SOCKET=socket_path)
+        devnull = open(os.devnull, "w")
+
+        def subprocess_run(script):
+            subprocess.run([sys.executable, os.path.join(ROOT, script)] + COMMAND,
+                           cwd=tmp, env=env, stdout=devnull, check=True)
+
+        report("run.py", timed(runs, lambda: subprocess_run("run.py")))
+
+        daemon = subprocess.Popen([sys.executable, os.path.join(ROOT, "run.py"), "daemon", "start"],
+                                  cwd=tmp, env=env, stdout=subprocess.DEVNULL)
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+        try:
+            report("client.py", timed(runs, lambda: subprocess_run("client.py")))
+
+            os.chdir(tmp)
+            saved_stdout = os.dup(1)
+            os.dup2(devnull.fileno(), 1)
+            try:
+                seconds = timed(runs, lambda: run_command(COMMAND, socket_path))
+            finally:
+                os.dup2(saved_stdout, 1)
+            report("in-process run_command", seconds)
+        finally:
+            send_request({"control": "stop"}, socket_path)
+            daemon.wait()
+            devnull.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark federated search from 2 to 32 shards.
+
+Builds 32 kitchen databases, then runs the same ingredient search over the
+first N of them sequentially (one worker) and on the thread pool, and
+reports both next to the slowest single shard, which bounds the
+concurrent latency from below.
+
+Usage: python benchmarks/bench_federation.py [recipes_per_shard]   (default 10,000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.federation import search_shards
+from culinary_compass.search import RecipeFilter
+
+SHARD_COUNTS = [2, 4, 8, 16, 32]
+
+
+def timed(paths, recipe_filter, workers):
+    start = time.perf_counter()
+    result = search_shards(paths, recipe_filter, workers=workers)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    recipe_filter = RecipeFilter(ingredients=["ingredient 12"], max_time=120, sort="name")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for shard in range(max(SHARD_COUNTS)):
+            path = os.path.join(tmp, f"kitchen{shard:02}.db")
+            build_catalog(path, count, seed=shard).dispose()
+            paths.append(path)
+
+        print(f"{'shards':>6}  {'sequential':>10}  {'concurrent':>10}  {'slowest shard':>13}  rows")
+        for shards in SHARD_COUNTS:
+            sequential, _ = timed(paths[:shards], recipe_filter, workers=1)
+            concurrent, result = timed(paths[:shards], recipe_filter, workers=None)
+            slowest = max(shard.seconds for shard in result.shards)
+            print(f"{shards:>6}  {sequential:>9.3f}s  {concurrent:>9.3f}s  {slowest:>12.3f}s  {len(result.rows):,}")
+        print(f"(CPUs: {os.cpu_count()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark recipe history: storage for many edits, and the cost of loading
+and reverting a version as the history grows.
+
+Every recipe gets a few KB of instructions and is then edited repeatedly
+through Recipe.update, mostly small field changes with occasional new
+instructions. Storage is compared with what a full copy of the text per
+version would take (the same compressed blobs, counted once per version).
+
+Usage: python benchmarks/bench_history.py [recipe_count] [edits_per_recipe]   (default 1,000 and 20)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import Recipe, RecipeHistory
+
+# Instructions are rewritten on every this-many-th edit
+REWRITE_EVERY = 5
+
+# Versions saved on the single recipe used to time loads against history length
+LONG_HISTORY = 500
+
+# Timed repetitions per load and revert
+REPEAT = 50
+
+STEP = "Whisk, fold and rest the batter for a few minutes before the next step. "
+
+
+def instructions(recipe_id, draft):
+    return f"Recipe {recipe_id}, draft {draft}.\n" + "\n".join(f"{n}. {STEP * 3}" for n in range(1, 20))
+
+
+def edit(session, recipe_id, step):
+    if step % REWRITE_EVERY == REWRITE_EVERY - 1:
+        Recipe.update(session, recipe_id, instructions=instructions(recipe_id, step))
+    else:
+        Recipe.update(session, recipe_id, prep_time=step + 1)
+
+
+def timed(action):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        action()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "culinary_compass.db"), count)
+        session = sessionmaker(bind=engine)()
+        for recipe_id in range(1, count + 1):
+            Recipe.update(session, recipe_id, description=f"Recipe {recipe_id}", instructions=instructions(recipe_id, 0))
+
+        start = time.perf_counter()
+        for step in range(edits):
+            for recipe_id in range(1, count + 1):
+                edit(session, recipe_id, step)
+        seconds = time.perf_counter() - start
+        versions, stored, copies = session.execute(text(
+            "SELECT count(*), (SELECT sum(length(data)) FROM text_blobs), "
+            "sum(coalesce(d.size_z, 0) + coalesce(i.size_z, 0) + l.size_z) FROM recipe_history AS h "
+            "LEFT JOIN (SELECT hash, length(data) AS size_z FROM text_blobs) AS d ON d.hash = h.description_hash "
+            "LEFT JOIN (SELECT hash, length(data) AS size_z FROM text_blobs) AS i ON i.hash = h.instructions_hash "
+            "JOIN (SELECT hash, length(data) AS size_z FROM text_blobs) AS l ON l.hash = h.lines_hash"
+        )).one()
+        print(f"{count:,} recipes x {edits} edits    {seconds:6.1f} s  ({seconds / (count * edits) * 1000:.2f} ms per update)")
+        print(f"versions saved              {versions:,}")
+        print(f"text stored, content-addressed  {stored / 1024 / 1024:8.1f} MiB")
+        print(f"text stored, copy per version   {copies / 1024 / 1024:8.1f} MiB")
+
+        recipe_id = 1
+        first = RecipeHistory.get_for_recipe(session, recipe_id)[-1].id
+        short = (timed(lambda: RecipeHistory.load(session, recipe_id, first)),
+                 timed(lambda: RecipeHistory.revert(session, recipe_id, first)))
+        for step in range(LONG_HISTORY):
+            edit(session, recipe_id, step)
+        long = (timed(lambda: RecipeHistory.load(session, recipe_id, first)),
+                timed(lambda: RecipeHistory.revert(session, recipe_id, first)))
+        total = len(RecipeHistory.get_for_recipe(session, recipe_id))
+        print(f"load / revert, {edits + 1:>4} versions  {short[0]:6.2f} / {short[1]:6.2f} ms")
+        print(f"load / revert, {total:>4} versions  {long[0]:6.2f} / {long[1]:6.2f} ms")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk importer's throughput by worker count.
+
+Writes a synthetic JSON-lines dump, then imports it into a fresh database
+once per worker count. workers=1 parses inline and is the single-core baseline.
+
+Usage: python benchmarks/bench_import.py [recipe_count] [max_workers]   (default 100,000 and CPU count)
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from culinary_compass.importer import import_recipes
+from culinary_compass.models import Base
+
+UNITS = ["cups", "tbsp", "tsp", "g", "ml", "oz", ""]
+AMOUNTS = ["1", "2", "1/2", "1 1/2", "¾", "2-3", "0.25", "200"]
+
+
+def write_dump(path, count, seed=3):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            lines = [
+                f"{rng.choice(AMOUNTS)} {rng.choice(UNITS)} ingredient {rng.randint(1, 5000)}, chopped"
+                for _ in range(rng.randint(4, 12))
+            ]
+            f.write(json.dumps({
+                "name": f"Recipe {i}",
+                "category": f"Category {rng.randint(1, 30)}",
+                "prep_time": rng.randint(0, 60),
+                "cook_time": rng.randint(0, 120),
+                "servings": rng.randint(1, 10),
+                "instructions": "Mix everything and cook until done. " * rng.randint(1, 10),
+                "ingredients": lines,
+            }) + "\n")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "dump.jsonl")
+        write_dump(dump, count)
+
+        workers = 1
+        while workers <= max_workers:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, f'import_{workers}.db')}")
+            Base.metadata.create_all(engine)
+            with open(dump, encoding="utf-8") as stream:
+                stats = import_recipes(engine, stream, workers=workers)
+            engine.dispose()
+            print(f"workers={workers:<3} {stats.recipes:>9,} recipes {stats.lines:>10,} lines "
+                  f"{stats.seconds:7.1f}s {stats.recipes / stats.seconds:10,.0f} recipes/s")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
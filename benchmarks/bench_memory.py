@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Track the memory used by the heaviest read commands.
+
+Builds a catalog, runs each command in its own process with
+--memprofile-json (the show_data menu with its own flag), and prints peak
+memory and ORM objects loaded. Pass a JSON Lines path to keep the reports
+and compare them across runs.
+
+Usage: python benchmarks/bench_memory.py [recipe_count] [jsonl_path]   (default 2,000)
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+COMMANDS = [
+    ["--format", "csv", "recipe", "list"],
+    ["--format", "csv", "recipe", "search", "--ingredient", "ingredient 1"],
+    ["--format", "csv", "category", "list"],
+    ["--format", "csv", "ingredient", "list"],
+]
+
+# show_data menu choices: view all data, then exit
+MENU_INPUT = "1\n11\n"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    history = os.path.abspath(sys.argv[2]) if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory() as tmp:
+        # The CLI opens culinary_compass.db in the working directory
+        build_catalog(os.path.join(tmp, "culinary_compass.db"), count).dispose()
+        reports = os.path.join(tmp, "reports.jsonl")
+        for args in COMMANDS:
+            subprocess.run([sys.executable, os.path.join(ROOT, "run.py"), "--no-cache", "--memprofile-json", reports]
+                           + args, cwd=tmp, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([sys.executable, os.path.join(ROOT, "show_data.py"), "--memprofile-json", reports],
+                       cwd=tmp, check=True, input=MENU_INPUT, text=True, stdout=subprocess.DEVNULL)
+
+        print(f"{count:,} recipes")
+        with open(reports) as stream:
+            lines = stream.readlines()
+        for line in lines:
+            report = json.loads(line)
+            label = report["label"].split(reports)[-1].strip()
+            loads = sum(report["orm_loads"].values())
+            print(f"{label:<58} peak {report['peak_bytes'] / 1024 / 1024:8.1f} MiB  "
+                  f"{loads:>9,} ORM objects  {report['seconds']:6.2f}s")
+        if history:
+            with open(history, "a") as stream:
+                stream.writelines(lines)
+
+
+if __name__ == "__main__":
+    main()
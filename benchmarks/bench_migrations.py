@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark data migrations on recipe_ingredients while another connection
+keeps writing: one big transaction against the chunked helpers in
+culinary_compass/migrations.
+
+For each approach, the script reports the migration's own time and how
+long the concurrent writer's small transactions had to wait for the lock.
+
+Usage: python benchmarks/bench_migrations.py [recipe_count]   (default 125,000, about a million lines)
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.migrations import backfill, rebuild_table
+
+UNIT_SQL = "unit = lower(unit)"
+
+
+def add_column(batch):
+    batch.add_column(sa.Column("canonical_unit", sa.String(50)))
+
+
+def one_transaction_update(conn):
+    with conn.begin():
+        conn.exec_driver_sql(f"UPDATE recipe_ingredients SET {UNIT_SQL}")
+
+
+def one_transaction_rebuild(conn):
+    # Without this, renaming the copy fails on triggers of other tables that
+    # refer to recipe_ingredients (rebuild_table sets it too)
+    with conn.begin():
+        conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+        with Operations(MigrationContext.configure(conn)).batch_alter_table("recipe_ingredients", recreate="always") as batch:
+            add_column(batch)
+
+
+def chunked_update(conn):
+    backfill(conn.execution_options(isolation_level="AUTOCOMMIT"), "recipe_ingredients", UNIT_SQL, progress=None)
+
+
+def chunked_rebuild(conn):
+    rebuild_table(conn.execution_options(isolation_level="AUTOCOMMIT"), "recipe_ingredients", add_column,
+                  progress=None)
+
+
+def writer(path, stop, waits):
+    """Insert a category every 10ms, recording how long each insert took"""
+    conn = sqlite3.connect(path, isolation_level=None, timeout=600)
+    count = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO categories (name) VALUES (?)", (f"writer {count}",))
+        conn.execute("COMMIT")
+        waits.append(time.perf_counter() - start)
+        count += 1
+        time.sleep(0.01)
+    conn.close()
+
+
+def run(template, tmp, label, migrate):
+    path = os.path.join(tmp, "run.db")
+    shutil.copy(template, path)
+    engine = create_engine(f"sqlite:///{path}")
+    stop = threading.Event()
+    waits = []
+    thread = threading.Thread(target=writer, args=(path, stop, waits))
+    thread.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        migrate(conn)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    engine.dispose()
+    waits.sort()
+    p99 = waits[int(len(waits) * 0.99)] if waits else 0
+    print(f"{label:<28} {elapsed:8.2f}s  writer: {len(waits):5d} writes, p99 {p99 * 1000:8.1f}ms, "
+          f"max {waits[-1] * 1000:8.1f}ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 125000
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.db")
+        build_catalog(template, count).dispose()
+        lines = sqlite3.connect(template).execute("SELECT count(*) FROM recipe_ingredients").fetchone()[0]
+        print(f"{lines:,} recipe lines\n")
+
+        run(template, tmp, "UPDATE, one transaction", one_transaction_update)
+        run(template, tmp, "UPDATE, chunked backfill", chunked_update)
+        run(template, tmp, "add column, batch_alter_table", one_transaction_rebuild)
+        run(template, tmp, "add column, rebuild_table", chunked_rebuild)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark full and incremental recipe nutrition recomputation.
+
+Every ingredient gets nutrition facts per 100 g and per cup, then all
+totals are computed, 1% of recipe lines change, and only the affected
+recipes are recomputed.
+
+Usage: python benchmarks/bench_nutrition.py [recipe_count]   (default 100,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, update
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import IngredientNutrient, RecipeIngredient
+from culinary_compass.nutrition import refresh_nutrition
+from culinary_compass.units import unit_basis
+
+INGREDIENTS = 2000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count, ingredient_count=INGREDIENTS)
+        facts = []
+        for ingredient_id in range(1, INGREDIENTS + 1):
+            for unit, amount in (("g", 100), ("cup", 1)):
+                dimension, factor = unit_basis(unit)
+                facts.append({
+                    "ingredient_id": ingredient_id, "unit": unit, "amount": amount,
+                    "dimension": dimension, "base_amount": amount * factor,
+                    "kcal": rng.uniform(0, 900), "protein": rng.uniform(0, 30),
+                    "fat": rng.uniform(0, 100), "carbs": rng.uniform(0, 100),
+                })
+        with engine.begin() as conn:
+            conn.execute(insert(IngredientNutrient.__table__), facts)
+
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            recomputed = refresh_nutrition(conn)
+        print(f"full        {time.perf_counter() - start:8.2f}s  ({recomputed:,} recipes, {count * 8:,} lines)")
+
+        line_count = count * 8
+        with engine.begin() as conn:
+            for line_id in rng.sample(range(1, line_count + 1), line_count // 100):
+                conn.execute(update(RecipeIngredient.__table__).where(RecipeIngredient.id == line_id)
+                             .values(quantity=rng.randint(1, 500) / 4))
+
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            recomputed = refresh_nutrition(conn)
+        print(f"incremental {time.perf_counter() - start:8.2f}s  ({recomputed:,} recipes)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
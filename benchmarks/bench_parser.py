@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingredient line parser's batch API.
+
+Parses the golden test corpus repeated to the requested size, once with
+every line distinct (cold cache) and once as-is (repeated lines hit the cache).
+
+Usage: python benchmarks/bench_parser.py [line_count]   (default 1,000,000)
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from culinary_compass.parser import parse_line, parse_lines
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "ingredient_lines.jsonl")
+
+
+def run(label, lines):
+    parse_line.cache_clear()
+    start = time.perf_counter()
+    count = sum(1 for _ in parse_lines(lines, skip_errors=True))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>10,} lines {elapsed:7.2f}s {count / elapsed * 60:15,.0f} lines/min")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = [json.loads(line)["line"] for line in f if line.strip()]
+
+    repeated = [corpus[i % len(corpus)] for i in range(count)]
+    # Suffixing a counter to the name makes every line unique
+    distinct = [f"{line} {i}" for i, line in enumerate(repeated)]
+
+    run("distinct lines (no cache)", distinct)
+    run("repeated lines (cached)", repeated)
+
+
+if __name__ == "__main__":
+    main()
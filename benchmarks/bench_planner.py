@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark weekly meal-plan generation on a large catalog.
+
+Plans 7 days of breakfast, lunch and dinner with time limits and
+categories, with and without a pantry, and reports the time spent
+building candidate pools and the shopping-list size reached by the
+greedy pass alone versus after local search.
+
+Usage: python benchmarks/bench_planner.py [recipe_count]   (default 100,000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.planner import generate_plan, parse_slot
+
+SLOTS = ["breakfast:20:Breakfast,Snack", "lunch:45:Lunch,Salad,Soup", "dinner:90:Dinner"]
+PANTRY = [f"ingredient {i}" for i in range(1, 41)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count)
+        session = sessionmaker(bind=engine)()
+        slots = [parse_slot(spec)._replace(label=f"day {day} {spec.split(':')[0]}")
+                 for day in range(1, 8) for spec in SLOTS]
+
+        for label, pantry in (("no pantry", ()), ("pantry", PANTRY)):
+            greedy = generate_plan(session, slots, pantry, time_budget=0)
+            start = time.perf_counter()
+            plan = generate_plan(session, slots, pantry, time_budget=0.5)
+            elapsed = time.perf_counter() - start
+            print(f"{label:10}  pools+greedy {greedy.seconds:6.3f}s  {len(greedy.shopping):4} to buy   "
+                  f"with search {elapsed:6.3f}s  {len(plan.shopping):4} to buy  ({plan.iterations:,} steps)")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark recipe cost recomputation after price changes.
+
+Every ingredient gets a price, all costs are computed once, then one
+ingredient is repriced (recomputing only the recipes that use it, against
+a full-catalog recompute for comparison), and finally a price file
+covering 10% of the ingredients is imported in one pass.
+
+Usage: python benchmarks/bench_pricing.py [recipe_count]   (default 100,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text, update
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import Ingredient
+from culinary_compass.pricing import import_prices, price_basis, recompute_costs, refresh_costs
+
+INGREDIENTS = 2000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count, ingredient_count=INGREDIENTS)
+        with engine.begin() as conn:
+            for ingredient_id in range(1, INGREDIENTS + 1):
+                conn.execute(update(Ingredient.__table__).where(Ingredient.id == ingredient_id)
+                             .values(**price_basis(rng.uniform(0.5, 20), rng.choice(["kg", "cup", ""]))))
+
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            recomputed = refresh_costs(conn)
+        print(f"initial     {time.perf_counter() - start:8.2f}s  ({recomputed:,} recipes, {count * 8:,} lines)")
+
+        with engine.begin() as conn:
+            conn.execute(update(Ingredient.__table__).where(Ingredient.id == 7)
+                         .values(**price_basis(3.25, "kg")))
+            start = time.perf_counter()
+            recomputed = recompute_costs(conn, [7])
+        print(f"one price   {time.perf_counter() - start:8.3f}s  ({recomputed:,} recipes)")
+
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE recipes SET cost_stale = 1"))
+            start = time.perf_counter()
+            recomputed = refresh_costs(conn)
+        print(f"rescan      {time.perf_counter() - start:8.2f}s  ({recomputed:,} recipes)")
+
+        with engine.connect() as conn:
+            names = dict(conn.execute(text("SELECT id, name FROM ingredients")).all())
+        rows = [(names[ingredient_id], rng.uniform(0.5, 20), "kg", 1.0)
+                for ingredient_id in rng.sample(sorted(names), INGREDIENTS // 10)]
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            result = import_prices(conn, rows)
+        print(f"price file  {time.perf_counter() - start:8.2f}s  "
+              f"({result.ingredients:,} prices, {result.recipes:,} recipes)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark a recipe search with and without a warm persistent query cache.
+
+Usage: python benchmarks/bench_query_cache.py [recipe_count]   (default 100,000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.query_cache import QueryCache, default_cache_path
+from culinary_compass.search import RecipeFilter
+
+RUNS = 20
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count)
+        session = sessionmaker(bind=engine)()
+        recipe_filter = RecipeFilter(ingredients=["ingredient 1"], max_time=60, sort="time")
+
+        def query():
+            return recipe_filter.rows(session).yield_per(1000)
+
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            rows = sum(1 for _ in query())
+        print(f"query      {(time.perf_counter() - start) / RUNS * 1000:8.2f}ms  ({rows:,} rows)")
+
+        with QueryCache(default_cache_path(engine)) as cache:
+            params = recipe_filter.cache_params()
+            start = time.perf_counter()
+            sum(1 for _ in cache.rows(engine, "recipe search", params, query))
+            print(f"cold cache {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                sum(1 for _ in cache.rows(engine, "recipe search", params, query))
+            print(f"warm cache {(time.perf_counter() - start) / RUNS * 1000:8.2f}ms")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark unique recipe lines: merging existing duplicates, and ingesting
+the same lines again.
+
+The merge compares the 8ae6db061d11 migration's set-based statements with
+a loop that merges one duplicate group at a time. Re-ingesting compares
+RecipeIngredient.upsert_many, one INSERT ... ON CONFLICT per recipe, with
+deleting a recipe's lines and inserting them again, which is how an
+idempotent ingest had to be written before.
+
+Usage: python benchmarks/bench_recipe_lines.py [recipe_count]   (default 100,000)
+"""
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, delete, event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import Ingredient, RecipeIngredient
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MIGRATION = os.path.join(ROOT, "alembic", "versions", "8ae6db061d11_unique_recipe_lines.py")
+
+# One line in this many is duplicated before merging
+DUPLICATE_EVERY = 10
+
+# Recipes re-ingested in the ingest comparison
+INGEST_RECIPES = 2000
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("unique_recipe_lines", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def add_duplicates(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX uq_recipe_ingredients_line")
+        conn.exec_driver_sql(
+            "INSERT INTO recipe_ingredients (recipe_id, ingredient_id, quantity, unit) "
+            f"SELECT recipe_id, ingredient_id, quantity, unit FROM recipe_ingredients WHERE id % {DUPLICATE_EVERY} = 0"
+        )
+    engine.dispose()
+
+
+def merge_per_group(conn, migration):
+    groups = conn.exec_driver_sql(
+        "SELECT recipe_id, ingredient_id, coalesce(unit, ''), min(id), sum(quantity) FROM recipe_ingredients "
+        "GROUP BY recipe_id, ingredient_id, coalesce(unit, '') HAVING count(*) > 1"
+    ).all()
+    for recipe_id, ingredient_id, unit, keep_id, quantity in groups:
+        conn.exec_driver_sql("UPDATE recipe_ingredients SET quantity = ? WHERE id = ?", (quantity, keep_id))
+        conn.exec_driver_sql(
+            "DELETE FROM recipe_ingredients WHERE recipe_id = ? AND ingredient_id = ? "
+            "AND coalesce(unit, '') = ? AND id != ?", (recipe_id, ingredient_id, unit, keep_id)
+        )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX uq_recipe_ingredients_line ON recipe_ingredients (recipe_id, ingredient_id, coalesce(unit, ''))"
+    )
+    return len(groups)
+
+
+def merge_set_based(conn, migration):
+    with Operations.context(MigrationContext.configure(conn)):
+        migration.upgrade()
+
+
+def time_merge(path, merge, migration):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        start = time.perf_counter()
+        merge(conn, migration)
+        seconds = time.perf_counter() - start
+        lines = conn.execute(select(func.count()).select_from(RecipeIngredient.__table__)).scalar()
+    engine.dispose()
+    return seconds, lines
+
+
+def recipe_lines(session, recipe_ids):
+    names = dict(session.execute(select(Ingredient.id, Ingredient.name)).all())
+    lines = {}
+    for recipe_id, ingredient_id, quantity, unit in session.execute(
+        select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.quantity,
+               RecipeIngredient.unit).where(RecipeIngredient.recipe_id.in_(recipe_ids))
+    ):
+        lines.setdefault(recipe_id, []).append((quantity, unit, names[ingredient_id]))
+    return lines
+
+
+def delete_and_insert(session, recipe_id, lines):
+    ingredient_ids = Ingredient.get_or_create_many(session, [name for _, _, name in lines])
+    session.execute(delete(RecipeIngredient.__table__).where(RecipeIngredient.recipe_id == recipe_id))
+    session.execute(insert(RecipeIngredient.__table__), [
+        {"recipe_id": recipe_id, "ingredient_id": ingredient_ids[name], "quantity": quantity, "unit": unit}
+        for quantity, unit, name in lines
+    ])
+    session.commit()
+
+
+def time_ingest(engine, ingest, lines):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    session = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    for recipe_id, recipe in lines.items():
+        ingest(session, recipe_id, recipe)
+    seconds = time.perf_counter() - start
+    session.close()
+    event.remove(engine, "before_cursor_execute", record)
+    writes = sum(statement.startswith(("INSERT INTO recipe_ingredients", "DELETE FROM recipe_ingredients"))
+                 for statement in statements)
+    return seconds, writes
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    migration = load_migration()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "culinary_compass.db")
+        engine = build_catalog(path, count)
+        engine.dispose()
+        dirty = os.path.join(tmp, "dirty.db")
+        shutil.copy(path, dirty)
+        add_duplicates(dirty)
+        print(f"{count:,} recipes, one line in {DUPLICATE_EVERY} duplicated")
+
+        for label, merge in (("merge per group", merge_per_group), ("merge set-based", merge_set_based)):
+            copy = os.path.join(tmp, "merge.db")
+            shutil.copy(dirty, copy)
+            seconds, lines = time_merge(copy, merge, migration)
+            print(f"{label:<26} {seconds:8.2f} s    {lines:,} lines left")
+
+        engine = create_engine(f"sqlite:///{path}")
+        session = sessionmaker(bind=engine)()
+        lines = recipe_lines(session, range(1, INGEST_RECIPES + 1))
+        session.close()
+        for label, ingest in (("re-ingest delete+insert", delete_and_insert),
+                              ("re-ingest upsert_many", RecipeIngredient.upsert_many)):
+            seconds, writes = time_ingest(engine, ingest, lines)
+            with engine.connect() as conn:
+                total = conn.execute(select(func.count()).select_from(RecipeIngredient.__table__)).scalar()
+            print(f"{label:<26} {seconds:8.2f} s    {writes / len(lines):.0f} write statement(s) per recipe, "
+                  f"{total:,} lines")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the query behind `recipe list` with and without deferred text columns.
+
+Builds a throwaway SQLite database with long descriptions and instructions,
+then loads every recipe twice: once with the text columns undeferred (the old
+behaviour) and once with the default deferred loading.
+
+Usage: python benchmarks/bench_recipe_list.py [recipe_count]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, undefer_group
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from culinary_compass.models import Base, Recipe, Category
+
+
+def build_database(path, count):
+    """Create a database with `count` recipes carrying long text columns"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    category = Category(name="Dinner")
+    session.add(category)
+    session.flush()
+
+    instructions = "\n".join(f"{step}. Stir the pot and season to taste." for step in range(1, 60))
+    description = "A hearty dish with a long story behind it. " * 20
+    session.add_all(
+        Recipe(
+            name=f"Recipe {i}",
+            description=description,
+            prep_time=10,
+            cook_time=20,
+            serving_size=4,
+            instructions=instructions,
+            category_id=category.id,
+        )
+        for i in range(count)
+    )
+    session.commit()
+    session.close()
+    return engine
+
+
+def measure(engine, label, load_text):
+    """Run the listing query and print wall time, rows/s and peak memory"""
+    session = sessionmaker(bind=engine)()
+    query = session.query(Recipe)
+    if load_text:
+        query = query.options(undefer_group("text"))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    recipes = query.all()
+    rows = [(r.id, r.name, r.prep_time, r.cook_time, r.serving_size) for r in recipes]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<22} {elapsed:8.3f}s {len(rows) / elapsed:12,.0f} rows/s {peak / 1024 / 1024:10.1f} MiB peak")
+    session.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_database(os.path.join(tmp, "bench.db"), count)
+        print(f"recipe list over {count:,} recipes")
+        measure(engine, "before (text loaded)", load_text=True)
+        measure(engine, "after (text deferred)", load_text=False)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
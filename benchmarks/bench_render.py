@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark the static cookbook renderer: a full render, a no-op rebuild,
+and a rebuild after 1% of recipes changed.
+
+For comparison, the old workflow of running `recipe view` once per id is
+timed on a small sample and extrapolated to the whole catalog.
+
+Usage: python benchmarks/bench_render.py [recipe_count] [workers]   (default 100,000 and one per CPU)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.render import render_site
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# `recipe view` invocations timed for the extrapolated baseline
+VIEW_SAMPLE = 10
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "culinary_compass.db"), count)
+        session = sessionmaker(bind=engine)()
+        out = os.path.join(tmp, "site")
+        print(f"{count:,} recipes, {workers or os.cpu_count()} worker(s)")
+
+        start = time.perf_counter()
+        for recipe_id in range(1, VIEW_SAMPLE + 1):
+            subprocess.run([sys.executable, os.path.join(ROOT, "run.py"), "recipe", "view", str(recipe_id)],
+                           cwd=tmp, check=True, stdout=subprocess.DEVNULL)
+        per_view = (time.perf_counter() - start) / VIEW_SAMPLE
+        print(f"recipe view per id      {per_view * count / 60:8.1f} min  (extrapolated from {VIEW_SAMPLE} runs)")
+
+        stats = render_site(session, out, workers=workers)
+        print(f"full render             {stats.seconds:8.1f} s    {stats.rendered:,} pages, "
+              f"{stats.rendered / stats.seconds:,.0f} recipes/s")
+        stats = render_site(session, out, workers=workers)
+        print(f"no-op rebuild           {stats.seconds:8.1f} s    {stats.rendered:,} pages")
+
+        session.execute(text("UPDATE recipes SET name = name || ' (revised)' WHERE id % 100 = 0"))
+        session.commit()
+        stats = render_site(session, out, workers=workers)
+        print(f"1% changed              {stats.seconds:8.1f} s    {stats.rendered:,} pages")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark RecipeFilter on a synthetic catalog.
+
+Usage: python benchmarks/bench_search.py [recipe_count]   (default 100,000; 1,000,000 for the full run)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.search import RecipeFilter
+
+FILTERS = {
+    "one ingredient": RecipeFilter(ingredients=["ingredient 17"]),
+    "two ingredients": RecipeFilter(ingredients=["ingredient 17", "ingredient 3"]),
+    "ingredient + exclude + time": RecipeFilter(
+        ingredients=["ingredient 17"], exclude_ingredients=["ingredient 42"], max_time=45,
+    ),
+    "categories + servings, by time": RecipeFilter(
+        categories=["Dinner", "Lunch"], min_servings=2, max_servings=4, max_time=30, sort="time",
+    ),
+    "everything": RecipeFilter(
+        name="Recipe 1", categories=["Dinner", "Soup"], ingredients=["ingredient 1"],
+        exclude_ingredients=["ingredient 2", "ingredient 3"], max_time=90,
+        min_servings=2, sort="name", descending=True,
+    ),
+}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count)
+        print(f"built {count:,} recipes in {time.perf_counter() - start:.1f}s")
+
+        session = sessionmaker(bind=engine)()
+        for label, recipe_filter in FILTERS.items():
+            start = time.perf_counter()
+            rows = recipe_filter.rows(session).all()
+            elapsed = time.perf_counter() - start
+            ids = [row[0] for row in rows]
+            assert len(ids) == len(set(ids)), "duplicate recipes in results"
+            print(f"{label:<32} {len(rows):>8,} rows {elapsed * 1000:10.1f} ms")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark snapshot build, open and lookup times against ORM lookups.
+
+Usage: python benchmarks/bench_snapshot.py [recipe_count]   (default 100,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import Recipe
+from culinary_compass.snapshot import CatalogSnapshot, build_snapshot
+
+LOOKUPS = 10000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    ids = [random.randint(1, count) for _ in range(LOOKUPS)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count)
+        path = os.path.join(tmp, "bench.snapshot")
+
+        start = time.perf_counter()
+        build_snapshot(engine, path)
+        print(f"build    {time.perf_counter() - start:8.2f}s  ({os.path.getsize(path) / 1024 / 1024:.1f} MiB for {count:,} recipes)")
+
+        start = time.perf_counter()
+        snapshot = CatalogSnapshot(path)
+        print(f"open     {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+        snapshot_summaries = []
+        start = time.perf_counter()
+        for recipe_id in ids:
+            recipe = snapshot.recipe(recipe_id)
+            snapshot_summaries.append((recipe.name, recipe.category, recipe.total_time,
+                                       [(line.quantity, line.unit, line.name) for line in recipe.ingredients]))
+        elapsed = time.perf_counter() - start
+        print(f"snapshot {elapsed / LOOKUPS * 1e6:8.2f}us per recipe + ingredient lookup")
+        snapshot.close()
+
+        session = sessionmaker(bind=engine)()
+        orm_summaries = []
+        start = time.perf_counter()
+        for recipe_id in ids:
+            recipe = session.get(Recipe, recipe_id)
+            orm_summaries.append((recipe.name, recipe.category.name, recipe.total_time,
+                                  [(line.quantity, line.unit, line.ingredient.name) for line in recipe.ingredients]))
+        elapsed = time.perf_counter() - start
+        print(f"ORM      {elapsed / LOOKUPS * 1e6:8.2f}us per recipe + ingredient lookup")
+        # Both paths must describe the same recipes (line order may differ)
+        assert [(name, category, total) for name, category, total, _ in snapshot_summaries] == \
+            [(name, category, total) for name, category, total, _ in orm_summaries]
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the substitution closure: incremental edge inserts against a
+full rebuild, graph lookups, and substitution-aware search.
+
+Usage: python benchmarks/bench_substitutes.py [recipe_count] [edge_count]   (default 100,000 and 1,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import IngredientSubstitute
+from culinary_compass.search import RecipeFilter
+from culinary_compass.substitutes import SubstitutionGraph, rebuild_closure
+
+INGREDIENTS = 2000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    edge_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count, ingredient_count=INGREDIENTS)
+        pairs = set()
+        while len(pairs) < edge_count:
+            a, b = rng.sample(range(1, INGREDIENTS + 1), 2)
+            pairs.add((a, b))
+        edges = [{"ingredient_id": a, "substitute_id": b, "ratio": rng.uniform(0.5, 2)} for a, b in pairs]
+
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            conn.execute(insert(IngredientSubstitute.__table__), edges)
+            elapsed = time.perf_counter() - start
+            closure_size = conn.execute(text("SELECT count(*) FROM substitute_closure")).scalar()
+        print(f"{edge_count:,} edges inserted  {elapsed:8.2f}s  ({closure_size:,} closure pairs)")
+
+        a, b = rng.sample(range(1, INGREDIENTS + 1), 2)
+        while (a, b) in pairs:
+            a, b = rng.sample(range(1, INGREDIENTS + 1), 2)
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            conn.execute(insert(IngredientSubstitute.__table__), [{"ingredient_id": a, "substitute_id": b, "ratio": 1.0}])
+            print(f"one more edge         {time.perf_counter() - start:8.4f}s  (incremental)")
+            start = time.perf_counter()
+            rebuild_closure(conn)
+            print(f"full rebuild          {time.perf_counter() - start:8.2f}s")
+
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            graph = SubstitutionGraph.load(conn)
+            print(f"graph load            {time.perf_counter() - start:8.2f}s")
+        queries = [(rng.randint(1, INGREDIENTS), rng.randint(1, INGREDIENTS)) for _ in range(1000000)]
+        start = time.perf_counter()
+        for a, b in queries:
+            graph.ratio(a, b)
+        print(f"1M ratio lookups      {time.perf_counter() - start:8.2f}s")
+
+        session = sessionmaker(bind=engine)()
+        for substitutes in (False, True):
+            start = time.perf_counter()
+            found = RecipeFilter(ingredients=["ingredient 7"], substitutes=substitutes).rows(session).all()
+            print(f"search substitutes={substitutes!s:5} {time.perf_counter() - start:6.2f}s  ({len(found):,} recipes)")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark a full sync export against a delta export after touching 1% of recipes.
+
+Usage: python benchmarks/bench_sync.py [recipe_count]   (default 100,000)
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import update
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import Recipe
+from culinary_compass.sync import export_changes
+
+
+def timed_export(engine, since):
+    out = io.StringIO()
+    start = time.perf_counter()
+    stats = export_changes(engine, out, since)
+    return time.perf_counter() - start, stats, len(out.getvalue())
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count)
+
+        elapsed, full, size = timed_export(engine, 0)
+        print(f"full   {elapsed:8.2f}s  {full.upserts:,} upserts, {size / 1024 / 1024:.1f} MiB")
+
+        changed = random.sample(range(1, count + 1), count // 100)
+        with engine.begin() as conn:
+            for recipe_id in changed:
+                conn.execute(update(Recipe.__table__).where(Recipe.id == recipe_id).values(serving_size=2))
+
+        elapsed, delta, size = timed_export(engine, full.revision)
+        print(f"delta  {elapsed:8.2f}s  {delta.upserts:,} upserts, {size / 1024:.1f} KiB")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark AND/OR/NOT tag queries on the bitmap index against the equivalent SQL.
+
+Usage: python benchmarks/bench_tags.py [recipe_count]   (default 1,000,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import and_, exists, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import build_catalog
+from culinary_compass.models import Recipe, Tag, recipe_tags
+from culinary_compass.tag_index import TagIndex, ids_from_bitmap
+
+# Tag name -> share of recipes carrying it
+TAGS = {"vegan": 0.1, "vegetarian": 0.3, "gluten-free": 0.2, "quick": 0.4, "holiday": 0.05}
+
+
+def add_tags(engine, count, seed=7):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.execute(Tag.__table__.insert(), [
+            {"id": i + 1, "name": name} for i, name in enumerate(TAGS)
+        ])
+        rows = [
+            {"recipe_id": recipe_id, "tag_id": tag_id}
+            for tag_id, share in enumerate(TAGS.values(), start=1)
+            for recipe_id in range(1, count + 1)
+            if rng.random() < share
+        ]
+        conn.execute(recipe_tags.insert(), rows)
+
+
+def sql_query(session, all_tags, not_tags):
+    """The same query expressed as EXISTS / NOT EXISTS per tag"""
+    def tagged(name):
+        return exists(
+            select(recipe_tags.c.recipe_id)
+            .join(Tag, Tag.id == recipe_tags.c.tag_id)
+            .where(recipe_tags.c.recipe_id == Recipe.id)
+            .where(Tag.name == name)
+        )
+    clauses = [tagged(name) for name in all_tags] + [~tagged(name) for name in not_tags]
+    return [row[0] for row in session.query(Recipe.id).filter(and_(*clauses)).order_by(Recipe.id)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_catalog(os.path.join(tmp, "bench.db"), count, lines_per_recipe=1)
+        add_tags(engine, count)
+        session = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        index = TagIndex.build(session)
+        print(f"index built over {count:,} recipes in {time.perf_counter() - start:.2f}s")
+
+        queries = [
+            (["vegan", "quick"], [], []),
+            (["vegetarian"], ["quick", "holiday"], ["gluten-free"]),
+            ([], ["vegan", "holiday"], ["quick"]),
+        ]
+        for all_tags, any_tags, not_tags in queries:
+            start = time.perf_counter()
+            bitmap = index.query(all_tags, any_tags, not_tags)
+            op_time = time.perf_counter() - start
+            start = time.perf_counter()
+            ids = ids_from_bitmap(bitmap)
+            decode_time = time.perf_counter() - start
+            print(f"all={all_tags} any={any_tags} not={not_tags}: {len(ids):,} recipes, "
+                  f"bitmap ops {op_time * 1000:.2f} ms, decode {decode_time * 1000:.1f} ms")
+
+        # SQL baseline for the first (AND-only) query
+        start = time.perf_counter()
+        expected = sql_query(session, ["vegan", "quick"], [])
+        print(f"SQL EXISTS baseline for all=['vegan', 'quick']: {(time.perf_counter() - start) * 1000:.1f} ms")
+        assert expected == index.recipe_ids(["vegan", "quick"])
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Synthetic catalog generator shared by the benchmark scripts.
+
+Uses Core bulk inserts so building a million-recipe database takes a few
+minutes rather than the hours the ORM `create` methods would need.
+"""
+import os
+import random
+import sys
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from culinary_compass.models import Base, Recipe, Ingredient, RecipeIngredient, Category
+
+CATEGORY_NAMES = ["Breakfast", "Lunch", "Dinner", "Dessert", "Appetizer", "Soup", "Salad", "Snack"]
+UNITS = ["g", "ml", "cups", "tbsp", "tsp", "pieces"]
+
+# Rows per executemany batch
+CHUNK_SIZE = 20000
+
+
+def build_catalog(path, recipe_count, ingredient_count=2000, lines_per_recipe=8, seed=42):
+    """Create a SQLite database at `path` filled with random recipes and return its engine"""
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(Category.__table__.insert(), [
+            {"id": i + 1, "name": name} for i, name in enumerate(CATEGORY_NAMES)
+        ])
+        conn.execute(Ingredient.__table__.insert(), [
+            {"id": i + 1, "name": f"ingredient {i + 1}"} for i in range(ingredient_count)
+        ])
+
+        line_id = 1
+        for start in range(0, recipe_count, CHUNK_SIZE):
+            recipes = []
+            lines = []
+            for recipe_id in range(start + 1, min(start + CHUNK_SIZE, recipe_count) + 1):
+                recipes.append({
+                    "id": recipe_id,
+                    "name": f"Recipe {recipe_id}",
+                    "prep_time": rng.randint(0, 60),
+                    "cook_time": rng.randint(0, 120),
+                    "serving_size": rng.randint(1, 12),
+                    "category_id": rng.randint(1, len(CATEGORY_NAMES)),
+                })
+                for ingredient_id in rng.sample(range(1, ingredient_count + 1), lines_per_recipe):
+                    lines.append({
+                        "id": line_id,
+                        "recipe_id": recipe_id,
+                        "ingredient_id": ingredient_id,
+                        "quantity": rng.randint(1, 500) / 4,
+                        "unit": rng.choice(UNITS),
+                    })
+                    line_id += 1
+            conn.execute(Recipe.__table__.insert(), recipes)
+            conn.execute(RecipeIngredient.__table__.insert(), lines)
+
+    return engine
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+# Lightweight entry point: forwards the command to a running daemon
+# (`python run.py daemon start`), or runs it directly if there isn't one
+from culinary_compass.client import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Online backup and restore through the SQLite backup API.
+
+Copying the database file with `cp` while another process writes can
+produce a torn copy. The backup API copies pages through SQLite itself,
+so the result is always a consistent database. Backups run in chunks of
+`pages` pages, pausing `sleep` seconds between chunks so other readers and
+writers can take their turn. If another process commits during a backup,
+SQLite restarts the copy from the first page. Writes made through the
+backup's own source connection are applied to the copy as they happen.
+Under a steady stream of writes, a chunked copy might never finish. So
+after MAX_RESTARTS restarts, the copy is redone in a single step, which
+holds a read lock for its duration.
+
+Every backup is written to a temporary file and checked with
+PRAGMA integrity_check. Only then is it moved into place, optionally
+gzip-compressed.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import namedtuple
+
+BackupStats = namedtuple("BackupStats", ["path", "pages", "bytes", "seconds"])
+
+# Pages copied per step; at the default 4 KiB page size this is 4 MiB
+DEFAULT_PAGES = 1024
+
+# Seconds to pause between steps so other connections can get their locks
+DEFAULT_SLEEP = 0.005
+
+# Restarts caused by other writers before falling back to a single-step copy
+MAX_RESTARTS = 3
+
+GZIP_SUFFIX = ".gz"
+
+
+class BackupError(Exception):
+    """Raised when a backup or restore fails verification"""
+
+
+def check_integrity(path):
+    """Run PRAGMA integrity_check on a database file, raising BackupError on any problem"""
+    conn = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"{path} is not a valid database: {e}")
+    finally:
+        conn.close()
+    if problems != ["ok"]:
+        raise BackupError(f"{path} failed integrity check: {'; '.join(problems[:5])}")
+
+
+class _Restarted(Exception):
+    """Raised from the progress callback to abandon a chunked copy"""
+
+
+def _copy(source, dest, pages, sleep, progress):
+    """Copy source into dest with the backup API, pausing between steps"""
+    restarts = 0
+    last_remaining = None
+
+    def step(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _Restarted()
+        last_remaining = remaining
+        if progress:
+            progress(total - remaining, total)
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    try:
+        source.backup(dest, pages=pages, progress=step)
+    except _Restarted:
+        source.backup(dest, pages=-1)
+
+
+def backup_database(source_path, dest_path, pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP,
+                    compress=False, progress=None):
+    """
+    Back up the database at source_path to dest_path while it stays online.
+
+    With compress, the verified copy is gzipped and ".gz" is appended to
+    dest_path if it's missing. `progress`, if given, is called with (pages
+    copied, total pages) after every step. Returns a BackupStats for the
+    file written.
+    """
+    if compress and not dest_path.endswith(GZIP_SUFFIX):
+        dest_path += GZIP_SUFFIX
+    directory = os.path.dirname(os.path.abspath(dest_path))
+
+    start = time.perf_counter()
+    fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=directory)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(source_path)
+        dest = sqlite3.connect(tmp_path)
+        try:
+            _copy(source, dest, pages, sleep, progress)
+            page_count = dest.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dest.close()
+            source.close()
+
+        check_integrity(tmp_path)
+        size = os.path.getsize(tmp_path)
+
+        if compress:
+            with open(tmp_path, "rb") as f, gzip.open(tmp_path + GZIP_SUFFIX, "wb") as out:
+                shutil.copyfileobj(f, out)
+            os.remove(tmp_path)
+            tmp_path += GZIP_SUFFIX
+        os.replace(tmp_path, dest_path)
+    finally:
+        for leftover in (tmp_path, tmp_path + GZIP_SUFFIX):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return BackupStats(dest_path, page_count, size, time.perf_counter() - start)
+
+
+def restore_database(backup_path, target_path, pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP, progress=None):
+    """
+    Restore a backup made by backup_database over the database at target_path.
+
+    The backup (decompressed first if gzipped) is verified before anything
+    is written. It is then copied in through the backup API, which takes
+    the target's locks like any other writer. Connections already open on
+    the target see the restored contents on their next transaction.
+    """
+    start = time.perf_counter()
+    tmp_path = None
+    source_path = backup_path
+    try:
+        if backup_path.endswith(GZIP_SUFFIX):
+            fd, tmp_path = tempfile.mkstemp(suffix=".db")
+            try:
+                with os.fdopen(fd, "wb") as out, gzip.open(backup_path, "rb") as f:
+                    shutil.copyfileobj(f, out)
+            except (OSError, EOFError) as e:
+                raise BackupError(f"{backup_path} could not be decompressed: {e}")
+            source_path = tmp_path
+
+        check_integrity(source_path)
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            _copy(source, target, pages, sleep, progress)
+            page_count = target.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        size = os.path.getsize(source_path)
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    return BackupStats(target_path, page_count, size, time.perf_counter() - start)
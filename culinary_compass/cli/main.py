@@ -1,17 +1,135 @@
+import os
+import sys
+import time
+
 import click
 from rich.console import Console
 from rich.table import Table
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
 from tabulate import tabulate
 
-from ..models import Session, Recipe, Ingredient, RecipeIngredient, Category
+from ..client import default_socket_path, send_request
+from ..backup import DEFAULT_PAGES, BackupError, backup_database, restore_database
+from ..data_version import database_path
+from ..federation import search_shards
+from ..models import Session, engine, Recipe, Ingredient, RecipeIngredient, Category, Tag, recipe_tags, RecipeHistory
+from ..models import IngredientNutrient, IngredientSubstitute, is_busy_error, write_stats as model_write_stats
+from ..planner import DEFAULT_POOL_SIZE, DEFAULT_TIME_BUDGET, PlanError, generate_plan, parse_slot
+from ..pricing import has_stale_costs, import_prices, priced_lines, read_price_file, recipe_cost, refresh_costs
+from ..nutrition import NUTRIENTS, get_nutrition, has_stale_nutrition, iter_nutrition, per_serving, refresh_nutrition
+from ..importer import DEFAULT_CHUNK_SIZE, import_recipes
+from ..ingest import read_lines
+from ..memprofile import MemoryProfiler, append_report, format_report
+from ..query_cache import QueryCache, default_cache_path
+from ..render import DEFAULT_CHUNK_SIZE as RENDER_CHUNK_SIZE, MARKUPS, render_site
+from ..search import RecipeFilter
+from ..snapshot import build_snapshot, open_snapshot
+from ..substitutes import SubstitutionGraph, has_stale_closure
+from ..sync import apply_changes, current_revision, export_changes
+from ..tag_index import TagIndex
+from .output import FORMATS, current_format, print_rows
 
 # Create a Rich console for prettier output
 console = Console()
 
+# Rows fetched per round trip when streaming listings
+YIELD_PER = 1000
+
+# Columns of RecipeFilter.rows(), shared by recipe list and recipe search
+RECIPE_COLUMNS = [
+    ("id", "ID", "dim"),
+    ("name", "Name", "green"),
+    ("category", "Category", "blue"),
+    ("prep_time", "Prep Time (min)", "yellow"),
+    ("cook_time", "Cook Time (min)", "yellow"),
+    ("total_time", "Total Time (min)", "yellow"),
+    ("servings", "Servings", "cyan"),
+    ("cost", "Cost", "magenta"),
+    ("cost_per_serving", "Cost/Serving", "magenta"),
+]
+
 @click.group()
-def cli():
+@click.option("--format", "output_format", type=click.Choice(FORMATS), default="table",
+              help="Output format for listings (machine formats stream row by row)")
+@click.option("--write-stats", is_flag=True, help="Report retries and lock waits for this command's writes")
+@click.option("--no-cache", is_flag=True, help="Don't read or store results in the persistent query cache")
+@click.option("--memprofile", is_flag=True,
+              help="Report peak memory, top allocation sites and ORM objects loaded by this command")
+@click.option("--memprofile-json", type=click.Path(dir_okay=False),
+              help="Append this command's memory report to a JSON Lines file (implies profiling)")
+@click.pass_context
+def cli(ctx, output_format, write_stats, no_cache, memprofile, memprofile_json):
     """Culinary Compass: A Comprehensive Recipe Management System"""
-    pass
+    ctx.ensure_object(dict)
+    ctx.obj["format"] = output_format
+    ctx.obj["cache"] = not no_cache
+    if write_stats:
+        ctx.call_on_close(_print_write_stats)
+    if memprofile or memprofile_json:
+        profiler = MemoryProfiler(" ".join(sys.argv[1:])).start()
+        ctx.call_on_close(lambda: _finish_memprofile(profiler, memprofile, memprofile_json))
+
+def _cached_rows(command, params, compute):
+    """
+    Rows for a read command, served from the persistent query cache when the
+    database hasn't changed since they were stored (see query_cache.py).
+    """
+    ctx = click.get_current_context()
+    if not ctx.find_root().obj.get("cache", True):
+        return compute()
+    cache = QueryCache(default_cache_path(engine))
+    ctx.call_on_close(cache.close)
+    return cache.rows(engine, command, params, compute)
+
+def _refresh_stale(session, has_stale, refresh, what, command):
+    """
+    Bring derived data up to date before a listing. Takes the write lock
+    only when has_stale(session) finds work; if another process holds it,
+    the listing goes ahead with what is stored and a warning.
+    """
+    if not has_stale(session):
+        return
+    # End the read transaction so the refresh can begin its own immediate one
+    session.commit()
+    try:
+        refresh(session)
+    except OperationalError as e:
+        if not is_busy_error(e):
+            raise
+        click.echo(f"Database is busy; some {what} (run `{command}`).", err=True)
+
+def _refresh_costs(session):
+    """Recompute costs of recipes whose lines changed, so cost columns and sorting are current"""
+    _refresh_stale(session, has_stale_costs, Recipe.refresh_stale_costs, "costs may be out of date", "price refresh")
+
+def _refresh_closure(session):
+    """Rebuild the substitution closure if an edge was removed or changed, so substitute matches are current"""
+    _refresh_stale(session, has_stale_closure, IngredientSubstitute.refresh_stale_closure,
+                   "substitutes may be out of date", "substitute refresh")
+
+def _print_federated(recipe_filter, paths, title, empty_message):
+    """Print a filter's results from several databases, labelled with their source (see federation.py)"""
+    result = search_shards(paths, recipe_filter)
+    for shard in result.shards:
+        if shard.error:
+            click.echo(f"Skipped {shard.path}: {shard.error}", err=True)
+    print_rows([("source", "Source", "magenta")] + RECIPE_COLUMNS, result.rows, title=title,
+               empty_message=empty_message)
+
+def _finish_memprofile(profiler, show, json_path):
+    """Stop the memory profiler and report on stderr and/or to the JSON Lines file (see memprofile.py)"""
+    report = profiler.stop()
+    if show:
+        click.echo(format_report(report), err=True)
+    if json_path:
+        append_report(report, json_path)
+
+def _print_write_stats():
+    stats = model_write_stats.as_dict()
+    click.echo(f"writes={stats['writes']} retries={stats['retries']} failures={stats['failures']} "
+               f"lock_wait={stats['wait_seconds'] * 1000:.1f}ms max_wait={stats['max_wait_seconds'] * 1000:.1f}ms",
+               err=True)
 
 # Recipe Commands Group
 # This creates a subcommand group for all recipe-related operations
@@ -21,41 +139,32 @@ def recipe():
     pass
 
 @recipe.command("list")
-def list_recipes():
+@click.option("--max-time", type=int, help="Only recipes with prep + cook time up to this many minutes")
+@click.option("--category", multiple=True, help="Only recipes in this category (repeatable)")
+@click.option("--sort", type=click.Choice(RecipeFilter.SORT_KEYS), default="id", help="Sort recipes by")
+@click.option("--desc", is_flag=True, help="Sort in descending order")
+@click.option("--shard", "shards", multiple=True, type=click.Path(dir_okay=False),
+              help="Query this database file instead of the local one (repeatable, results are merged)")
+def list_recipes(max_time, category, sort, desc, shards):
     """
     List all recipes in the database.
 
     This command displays a table with basic information about each recipe,
     including ID, name, category, preparation time, cooking time, and servings.
+    Time filters and `--sort time` use the indexed total_time column.
+    With --shard, the given databases are queried concurrently instead.
     """
+    recipe_filter = RecipeFilter(categories=category, max_time=max_time, sort=sort, descending=desc)
+    if shards:
+        _print_federated(recipe_filter, shards, "Recipes", "[bold red]No recipes found![/bold red]")
+        return
     session = Session()
-    recipes = Recipe.get_all(session)
-
-    if not recipes:
-        console.print("[bold red]No recipes found![/bold red]")
-        return
-
-    # Create a Rich table for better visual presentation
-    table = Table(title="Recipes")
-    table.add_column("ID", style="dim")
-    table.add_column("Name", style="green")
-    table.add_column("Category", style="blue")
-    table.add_column("Prep Time (min)", style="yellow")
-    table.add_column("Cook Time (min)", style="yellow")
-    table.add_column("Servings", style="cyan")
-
-    for recipe in recipes:
-        category_name = recipe.category.name if recipe.category else "Uncategorized"
-        table.add_row(
-            str(recipe.id),
-            recipe.name,
-            category_name,
-            str(recipe.prep_time) if recipe.prep_time else "-",
-            str(recipe.cook_time) if recipe.cook_time else "-",
-            str(recipe.serving_size) if recipe.serving_size else "-"
-        )
+    _refresh_costs(session)
 
-    console.print(table)
+    rows = _cached_rows("recipe list", recipe_filter.cache_params(),
+                        lambda: recipe_filter.rows(session).yield_per(YIELD_PER))
+    print_rows(RECIPE_COLUMNS, rows, title="Recipes",
+               empty_message="[bold red]No recipes found![/bold red]")
     session.close()
 
 @recipe.command("view")
@@ -63,7 +172,7 @@ def list_recipes():
 def view_recipe(recipe_id):
     """View a recipe by ID"""
     session = Session()
-    recipe = Recipe.get_by_id(session, recipe_id)
+    recipe = Recipe.get_by_id(session, recipe_id, with_text=True)
 
     if not recipe:
         console.print(f"[bold red]Recipe with ID {recipe_id} not found![/bold red]")
@@ -75,6 +184,9 @@ def view_recipe(recipe_id):
     console.print(f"Preparation Time: {recipe.prep_time} minutes")
     console.print(f"Cooking Time: {recipe.cook_time} minutes")
     console.print(f"Servings: {recipe.serving_size}")
+    _print_cost(session, recipe)
+    if recipe.tags:
+        console.print(f"Tags: {', '.join(tag.name for tag in recipe.tags)}")
 
     if recipe.description:
         console.print("\n[bold]Description:[/bold]")
@@ -107,6 +219,17 @@ def view_recipe(recipe_id):
 
     session.close()
 
+def _print_cost(session, recipe):
+    # Computed on the fly if stale, so viewing a recipe never writes
+    cost, per_serving = recipe_cost(session, recipe.id)
+    if cost is None:
+        console.print("Cost: [dim]not priced[/dim]")
+        return
+    console.print(f"Cost: {cost:.2f} ({per_serving:.2f} per serving)")
+    lines, priced = priced_lines(session, recipe.id)
+    if priced < lines:
+        console.print(f"[yellow]{lines - priced} of {lines} ingredient lines have no price for their unit.[/yellow]")
+
 @recipe.command("add")
 @click.option("--name", prompt="Recipe name", help="Name of the recipe")
 @click.option("--description", prompt="Description (optional)", default="", help="Description of the recipe")
@@ -218,51 +341,198 @@ def delete_recipe(recipe_id, confirm):
     console.print(f"[bold green]Recipe '{recipe.name}' deleted successfully![/bold green]")
     session.close()
 
-@recipe.command("search")
-@click.option("--name", help="Search by recipe name")
-@click.option("--category", help="Search by category name")
-@click.option("--ingredient", help="Search by ingredient name")
-def search_recipes(name, category, ingredient):
-    """Search for recipes by name, category, or ingredient"""
-    session = Session()
-    query = session.query(Recipe)
-
-    if name:
-        query = query.filter(Recipe.name.like(f"%{name}%"))
-
-    if category:
-        query = query.join(Category).filter(Category.name.like(f"%{category}%"))
+def _changed_fields(version, previous):
+    """Names of what differs between two saved versions, compared by value and blob hash"""
+    if previous is None:
+        return "-"
+    fields = [
+        ("name", ["name"]),
+        ("times", ["prep_time", "cook_time"]),
+        ("servings", ["serving_size"]),
+        ("category", ["category_id"]),
+        ("description", ["description_hash"]),
+        ("instructions", ["instructions_hash"]),
+        ("ingredients", ["lines_hash"]),
+    ]
+    changed = [label for label, keys in fields
+               if any(getattr(version, key) != getattr(previous, key) for key in keys)]
+    return ", ".join(changed) or "-"
+
+def _print_version(session, version):
+    console.print(f"[bold green]Version {version.id} of recipe {version.recipe_id}: {version.name}[/bold green]")
+    console.print(f"Saved: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(version.created_at))}")
+    category_obj = Category.get_by_id(session, version.category_id) if version.category_id else None
+    console.print(f"[bold blue]Category: {category_obj.name if category_obj else 'Uncategorized'}[/bold blue]")
+    console.print(f"Preparation Time: {version.prep_time} minutes")
+    console.print(f"Cooking Time: {version.cook_time} minutes")
+    console.print(f"Servings: {version.serving_size}")
+
+    if version.description:
+        console.print("\n[bold]Description:[/bold]")
+        console.print(version.description)
 
-    if ingredient:
-        query = query.join(RecipeIngredient).join(Ingredient).filter(Ingredient.name.like(f"%{ingredient}%"))
+    console.print("\n[bold]Ingredients:[/bold]")
+    if not version.lines:
+        console.print("[italic]No ingredients listed[/italic]")
+    else:
+        names = dict(session.query(Ingredient.id, Ingredient.name)
+                     .filter(Ingredient.id.in_({line[0] for line in version.lines})))
+        ingredients_table = Table()
+        ingredients_table.add_column("Ingredient", style="green")
+        ingredients_table.add_column("Quantity", style="yellow")
+        ingredients_table.add_column("Unit", style="blue")
+        for ingredient_id, quantity, unit in version.lines:
+            ingredients_table.add_row(names.get(ingredient_id, f"[red]deleted ingredient {ingredient_id}[/red]"),
+                                      str(quantity), unit or "-")
+        console.print(ingredients_table)
 
-    recipes = query.all()
+    if version.instructions:
+        console.print("\n[bold]Instructions:[/bold]")
+        console.print(version.instructions)
 
-    if not recipes:
-        console.print("[bold yellow]No recipes found matching your search criteria.[/bold yellow]")
+@recipe.command("history")
+@click.argument("recipe_id", type=int)
+@click.option("--version", "version_id", type=int, help="Show the full content of one saved version")
+def recipe_history(recipe_id, version_id):
+    """List a recipe's saved versions, or show one"""
+    session = Session()
+    if version_id is not None:
+        version = RecipeHistory.load(session, recipe_id, version_id)
+        if version is None:
+            console.print(f"[bold red]Recipe {recipe_id} has no version {version_id}![/bold red]")
+        else:
+            _print_version(session, version)
         session.close()
         return
 
-    table = Table(title="Search Results")
-    table.add_column("ID", style="dim")
-    table.add_column("Name", style="green")
-    table.add_column("Category", style="blue")
-    table.add_column("Prep Time (min)", style="yellow")
-    table.add_column("Cook Time (min)", style="yellow")
-
-    for recipe in recipes:
-        category_name = recipe.category.name if recipe.category else "Uncategorized"
-        table.add_row(
-            str(recipe.id),
-            recipe.name,
-            category_name,
-            str(recipe.prep_time) if recipe.prep_time else "-",
-            str(recipe.cook_time) if recipe.cook_time else "-"
-        )
+    versions = RecipeHistory.get_for_recipe(session, recipe_id)
+    columns = [
+        ("version", "Version", "dim"),
+        ("saved", "Saved", "cyan"),
+        ("name", "Name", "green"),
+        ("prep_time", "Prep Time (min)", "yellow"),
+        ("cook_time", "Cook Time (min)", "yellow"),
+        ("servings", "Servings", "yellow"),
+        ("changed", "Changed", "magenta"),
+    ]
+    rows = (
+        (version.id, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(version.created_at)), version.name,
+         version.prep_time, version.cook_time, version.serving_size,
+         _changed_fields(version, versions[index + 1] if index + 1 < len(versions) else None))
+        for index, version in enumerate(versions)
+    )
+    print_rows(columns, rows, title=f"History of Recipe {recipe_id}",
+               empty_message=f"[yellow]Recipe {recipe_id} has no saved versions.[/yellow]")
+    session.close()
 
-    console.print(table)
+@recipe.command("revert")
+@click.argument("recipe_id", type=int)
+@click.argument("version_id", type=int)
+def revert_recipe(recipe_id, version_id):
+    """Restore a recipe to a saved version (the current state is saved first)"""
+    session = Session()
+    result = RecipeHistory.revert(session, recipe_id, version_id)
+    if result is None:
+        console.print(f"[bold red]Recipe {recipe_id} has no version {version_id}![/bold red]")
+    else:
+        console.print(f"[bold green]Recipe {recipe_id} reverted to version {version_id} "
+                      f"({result.version.name}, {len(result.lines)} ingredients).[/bold green]")
+        if result.skipped:
+            console.print(f"[yellow]{result.skipped} ingredient lines were left out because their "
+                          f"ingredient no longer exists.[/yellow]")
     session.close()
 
+@recipe.command("search")
+@click.option("--name", help="Search by recipe name")
+@click.option("--category", multiple=True, help="Search by category name (repeat to match any of several)")
+@click.option("--ingredient", multiple=True, help="Require an ingredient (repeat to require several)")
+@click.option("--exclude", multiple=True, help="Exclude recipes using an ingredient (repeatable)")
+@click.option("--max-time", type=int, help="Maximum prep + cook time in minutes")
+@click.option("--min-servings", type=int, help="Minimum number of servings")
+@click.option("--max-servings", type=int, help="Maximum number of servings")
+@click.option("--substitutes", is_flag=True,
+              help="Let a required ingredient also match recipes calling for something it can substitute")
+@click.option("--sort", type=click.Choice(RecipeFilter.SORT_KEYS), default="id", help="Sort results by")
+@click.option("--desc", is_flag=True, help="Sort in descending order")
+@click.option("--shard", "shards", multiple=True, type=click.Path(dir_okay=False),
+              help="Query this database file instead of the local one (repeatable, results are merged)")
+def search_recipes(name, category, ingredient, exclude, max_time, min_servings, max_servings, substitutes, sort, desc,
+                   shards):
+    """Search for recipes by name, category, ingredients, time and servings"""
+    recipe_filter = RecipeFilter(
+        name=name,
+        categories=category,
+        ingredients=ingredient,
+        exclude_ingredients=exclude,
+        max_time=max_time,
+        min_servings=min_servings,
+        max_servings=max_servings,
+        sort=sort,
+        descending=desc,
+        substitutes=substitutes,
+    )
+    if shards:
+        _print_federated(recipe_filter, shards, "Search Results",
+                         "[bold yellow]No recipes found matching your search criteria.[/bold yellow]")
+        return
+
+    session = Session()
+    _refresh_costs(session)
+    if substitutes:
+        _refresh_closure(session)
+    rows = _cached_rows("recipe search", recipe_filter.cache_params(),
+                        lambda: recipe_filter.rows(session).yield_per(YIELD_PER))
+    print_rows(RECIPE_COLUMNS, rows, title="Search Results",
+               empty_message="[bold yellow]No recipes found matching your search criteria.[/bold yellow]")
+    session.close()
+
+@recipe.command("import")
+@click.argument("dump", type=click.File("r", encoding="utf-8"))
+@click.option("--workers", type=int, default=None, help="Parsing processes (default: one per CPU, 1 to parse inline)")
+@click.option("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, show_default=True, help="Records per parsing task")
+def import_dump(dump, workers, chunk_size):
+    """
+    Bulk import recipes from a JSON-lines dump ('-' for stdin).
+
+    Parsing runs in parallel worker processes while this process writes
+    the results in batches.
+    """
+    def progress(stats):
+        console.print(f"[dim]{stats.recipes:,} recipes, {stats.lines:,} ingredient lines...[/dim]", end="\r")
+
+    stats = import_recipes(engine, dump, workers=workers, chunk_size=chunk_size,
+                           progress=progress if console.is_terminal else None)
+    rate = stats.recipes / stats.seconds if stats.seconds else 0
+    console.print(f"[bold green]Imported {stats.recipes:,} recipes and {stats.lines:,} ingredient lines "
+                  f"in {stats.seconds:.1f}s ({rate:,.0f} recipes/s)[/bold green]")
+    if stats.errors:
+        console.print(f"[bold yellow]Skipped {stats.errors:,} invalid records.[/bold yellow]")
+
+@cli.command("render")
+@click.argument("out_dir", type=click.Path(file_okay=False))
+@click.option("--markup", type=click.Choice(list(MARKUPS)), default="html", show_default=True, help="Page format")
+@click.option("--workers", type=int, default=None, help="Rendering processes (default: one per CPU, 1 to render inline)")
+@click.option("--chunk-size", type=int, default=RENDER_CHUNK_SIZE, show_default=True, help="Recipes per rendering task")
+@click.option("--force", is_flag=True, help="Re-render every page, even if unchanged since the last run")
+def render(out_dir, markup, workers, chunk_size, force):
+    """
+    Render the catalog as a static site: a page per recipe plus category index pages.
+
+    Only recipes whose content changed since the last run into OUT_DIR are
+    re-rendered, and pages of deleted recipes are removed.
+    """
+    def progress(stats):
+        console.print(f"[dim]{stats.rendered:,} rendered, {stats.unchanged:,} unchanged...[/dim]", end="\r")
+
+    session = Session()
+    try:
+        stats = render_site(session, out_dir, markup=markup, workers=workers, chunk_size=chunk_size, force=force,
+                            progress=progress if console.is_terminal else None)
+    finally:
+        session.close()
+    console.print(f"[bold green]Rendered {stats.rendered:,} recipes and {stats.categories:,} category pages "
+                  f"in {stats.seconds:.1f}s[/bold green] ({stats.unchanged:,} unchanged, {stats.removed:,} removed)")
+
 # Ingredient Commands
 @cli.group()
 def ingredient():
@@ -273,21 +543,14 @@ def ingredient():
 def list_ingredients():
     """List all ingredients"""
     session = Session()
-    ingredients = Ingredient.get_all(session)
-
-    if not ingredients:
-        console.print("[bold red]No ingredients found![/bold red]")
-        session.close()
-        return
-
-    table = Table(title="Ingredients")
-    table.add_column("ID", style="dim")
-    table.add_column("Name", style="green")
-
-    for ingredient in ingredients:
-        table.add_row(str(ingredient.id), ingredient.name)
-
-    console.print(table)
+    query = session.query(Ingredient.id, Ingredient.name)
+
+    columns = [
+        ("id", "ID", "dim"),
+        ("name", "Name", "green"),
+    ]
+    print_rows(columns, query.yield_per(YIELD_PER), title="Ingredients",
+               empty_message="[bold red]No ingredients found![/bold red]")
     session.close()
 
 @ingredient.command("add")
@@ -309,8 +572,15 @@ def add_ingredient(name):
 
 @ingredient.command("add-to-recipe")
 @click.argument("recipe_id", type=int)
-def add_ingredient_to_recipe(recipe_id):
-    """Add ingredients to a recipe"""
+@click.option("--line", "lines", multiple=True, help='Ingredient line such as "1.5 cups flour" (repeatable)')
+@click.option("--file", "lines_file", type=click.File("r"), help="Read ingredient lines from a file ('-' for stdin)")
+def add_ingredient_to_recipe(recipe_id, lines, lines_file):
+    """
+    Add ingredients to a recipe.
+
+    With --line or --file the lines are added in one transaction without
+    prompting; otherwise ingredients are asked for one at a time.
+    """
     session = Session()
     recipe = Recipe.get_by_id(session, recipe_id)
 
@@ -319,6 +589,19 @@ def add_ingredient_to_recipe(recipe_id):
         session.close()
         return
 
+    if lines or lines_file:
+        try:
+            parsed = read_lines(lines, lines_file)
+        except ValueError as e:
+            console.print(f"[bold red]{e}[/bold red]")
+            session.close()
+            return
+
+        count = RecipeIngredient.create_many(session, recipe.id, parsed)
+        console.print(f"[bold green]Added {count} ingredients to {recipe.name}![/bold green]")
+        session.close()
+        return
+
     console.print(f"[bold green]Adding ingredients to recipe: {recipe.name}[/bold green]")
 
     while True:
@@ -404,23 +687,22 @@ def category():
 def list_categories():
     """List all categories"""
     session = Session()
-    categories = Category.get_all(session)
-
-    if not categories:
-        console.print("[bold red]No categories found![/bold red]")
-        session.close()
-        return
 
-    table = Table(title="Categories")
-    table.add_column("ID", style="dim")
-    table.add_column("Name", style="green")
-    table.add_column("Recipe Count", style="blue")
-
-    for category in categories:
-        recipe_count = len(category.recipes)
-        table.add_row(str(category.id), category.name, str(recipe_count))
-
-    console.print(table)
+    # Count recipes in SQL rather than loading every category's recipe list
+    query = session.query(
+        Category.id,
+        Category.name,
+        func.count(Recipe.id),
+    ).outerjoin(Recipe, Recipe.category_id == Category.id).group_by(Category.id)
+
+    columns = [
+        ("id", "ID", "dim"),
+        ("name", "Name", "green"),
+        ("recipe_count", "Recipe Count", "blue"),
+    ]
+    rows = _cached_rows("category list", {}, lambda: query.yield_per(YIELD_PER))
+    print_rows(columns, rows, title="Categories",
+               empty_message="[bold red]No categories found![/bold red]")
     session.close()
 
 @category.command("add")
@@ -481,4 +763,679 @@ def delete_category(category_id, confirm):
 
     Category.delete(session, category_id)
     console.print(f"[bold green]Category '{category.name}' deleted successfully![/bold green]")
-    session.close()
\ No newline at end of file
+    session.close()
+
+# Tag Commands
+@cli.group()
+def tag():
+    """Manage recipe tags"""
+    pass
+
+@tag.command("list")
+def list_tags():
+    """List all tags"""
+    session = Session()
+
+    query = session.query(
+        Tag.id,
+        Tag.name,
+        func.count(recipe_tags.c.recipe_id),
+    ).outerjoin(recipe_tags, recipe_tags.c.tag_id == Tag.id).group_by(Tag.id)
+
+    columns = [
+        ("id", "ID", "dim"),
+        ("name", "Name", "green"),
+        ("recipe_count", "Recipe Count", "blue"),
+    ]
+    print_rows(columns, query.yield_per(YIELD_PER), title="Tags",
+               empty_message="[bold red]No tags found![/bold red]")
+    session.close()
+
+@tag.command("add")
+@click.option("--name", prompt="Tag name", help="Name of the tag")
+def add_tag(name):
+    """Add a new tag"""
+    session = Session()
+
+    existing = Tag.get_by_name(session, name)
+    if existing:
+        console.print(f"[bold yellow]Tag '{name}' already exists with ID {existing.id}![/bold yellow]")
+        session.close()
+        return
+
+    tag = Tag.create(session, name=name)
+    console.print(f"[bold green]Tag '{name}' added successfully with ID {tag.id}![/bold green]")
+    session.close()
+
+@tag.command("update")
+@click.argument("tag_id", type=int)
+@click.option("--name", prompt="New name", help="New name for the tag")
+def update_tag(tag_id, name):
+    """Rename a tag"""
+    session = Session()
+    tag = Tag.get_by_id(session, tag_id)
+
+    if not tag:
+        console.print(f"[bold red]Tag with ID {tag_id} not found![/bold red]")
+        session.close()
+        return
+
+    old_name = tag.name
+    Tag.update(session, tag_id, name=name)
+    console.print(f"[bold green]Tag updated from '{old_name}' to '{name}'![/bold green]")
+    session.close()
+
+@tag.command("delete")
+@click.argument("tag_id", type=int)
+@click.option("--confirm", is_flag=True, help="Confirm deletion without prompt")
+def delete_tag(tag_id, confirm):
+    """Delete a tag"""
+    session = Session()
+    tag = Tag.get_by_id(session, tag_id)
+
+    if not tag:
+        console.print(f"[bold red]Tag with ID {tag_id} not found![/bold red]")
+        session.close()
+        return
+
+    if tag.recipes and not confirm:
+        console.print(f"[bold yellow]Warning: This tag is used by {len(tag.recipes)} recipes.[/bold yellow]")
+        if not click.confirm("Deleting this tag will remove it from all recipes. Continue?"):
+            console.print("[yellow]Deletion cancelled.[/yellow]")
+            session.close()
+            return
+
+    Tag.delete(session, tag_id)
+    console.print(f"[bold green]Tag '{tag.name}' deleted successfully![/bold green]")
+    session.close()
+
+@tag.command("assign")
+@click.argument("recipe_id", type=int)
+@click.argument("names", nargs=-1, required=True)
+def assign_tags(recipe_id, names):
+    """Tag a recipe (tags that don't exist yet are created)"""
+    session = Session()
+    recipe = Recipe.get_by_id(session, recipe_id)
+
+    if not recipe:
+        console.print(f"[bold red]Recipe with ID {recipe_id} not found![/bold red]")
+        session.close()
+        return
+
+    for name in names:
+        tag = Tag.get_or_create(session, name)
+        if tag not in recipe.tags:
+            recipe.tags.append(tag)
+    session.commit()
+
+    console.print(f"[bold green]Recipe '{recipe.name}' tagged with: {', '.join(names)}[/bold green]")
+    session.close()
+
+@tag.command("unassign")
+@click.argument("recipe_id", type=int)
+@click.argument("names", nargs=-1, required=True)
+def unassign_tags(recipe_id, names):
+    """Remove tags from a recipe"""
+    session = Session()
+    recipe = Recipe.get_by_id(session, recipe_id)
+
+    if not recipe:
+        console.print(f"[bold red]Recipe with ID {recipe_id} not found![/bold red]")
+        session.close()
+        return
+
+    wanted = {name.lower() for name in names}
+    recipe.tags = [tag for tag in recipe.tags if tag.name.lower() not in wanted]
+    session.commit()
+
+    console.print(f"[bold green]Removed tags from '{recipe.name}': {', '.join(names)}[/bold green]")
+    session.close()
+
+@tag.command("search")
+@click.option("--all", "all_tags", multiple=True, help="Recipes must carry this tag (repeatable)")
+@click.option("--any", "any_tags", multiple=True, help="Recipes must carry at least one of these tags (repeatable)")
+@click.option("--not", "not_tags", multiple=True, help="Recipes must not carry this tag (repeatable)")
+def search_tags(all_tags, any_tags, not_tags):
+    """Find recipes by combining tags with AND / OR / NOT"""
+    session = Session()
+
+    # Resolve the tag expression on the bitmap index, then fetch only the matches
+    index = TagIndex.build(session)
+    recipe_ids = index.recipe_ids(all_tags, any_tags, not_tags)
+
+    def rows():
+        # Look recipes up in chunks to stay under SQLite's bound parameter limit
+        for start in range(0, len(recipe_ids), YIELD_PER):
+            chunk = recipe_ids[start:start + YIELD_PER]
+            yield from session.query(
+                Recipe.id,
+                Recipe.name,
+                func.coalesce(Category.name, "Uncategorized"),
+                Recipe.total_time,
+            ).outerjoin(Category, Recipe.category_id == Category.id).filter(
+                Recipe.id.in_(chunk)
+            ).order_by(Recipe.id)
+
+    columns = [
+        ("id", "ID", "dim"),
+        ("name", "Name", "green"),
+        ("category", "Category", "blue"),
+        ("total_time", "Total Time (min)", "yellow"),
+    ]
+    print_rows(columns, rows(), title="Tagged Recipes",
+               empty_message="[bold yellow]No recipes match those tags.[/bold yellow]")
+    session.close()
+
+
+# Snapshot Commands
+@cli.group()
+def snapshot():
+    """Build and read the memory-mapped catalog snapshot"""
+    pass
+
+@snapshot.command("build")
+@click.option("--output", type=click.Path(dir_okay=False), help="Snapshot file (default: next to the database)")
+def build_catalog_snapshot(output):
+    """Compile the catalog into a compact snapshot file"""
+    path = build_snapshot(engine, output)
+    console.print(f"[bold green]Snapshot written to {path} ({os.path.getsize(path):,} bytes)[/bold green]")
+
+@snapshot.command("list")
+@click.option("--path", type=click.Path(dir_okay=False), help="Snapshot file (default: next to the database)")
+def list_snapshot_recipes(path):
+    """List recipe summaries from the snapshot (rebuilt first if the database changed)"""
+    with open_snapshot(engine, path) as snap:
+        columns = [
+            ("id", "ID", "dim"),
+            ("name", "Name", "green"),
+            ("category", "Category", "blue"),
+            ("total_time", "Total Time (min)", "yellow"),
+            ("servings", "Servings", "cyan"),
+        ]
+        rows = ((r.id, r.name, r.category or "Uncategorized", r.total_time, r.serving_size) for r in snap)
+        print_rows(columns, rows, title="Recipes",
+                   empty_message="[bold red]No recipes found![/bold red]")
+
+@snapshot.command("show")
+@click.argument("recipe_id", type=int)
+@click.option("--path", type=click.Path(dir_okay=False), help="Snapshot file (default: next to the database)")
+def show_snapshot_recipe(recipe_id, path):
+    """Show a recipe summary and its ingredients from the snapshot"""
+    with open_snapshot(engine, path) as snap:
+        recipe = snap.recipe(recipe_id)
+        if recipe is None:
+            console.print(f"[bold red]Recipe with ID {recipe_id} not found![/bold red]")
+            return
+
+        console.print(f"[bold green]Recipe: {recipe.name}[/bold green]")
+        console.print(f"[bold blue]Category: {recipe.category or 'Uncategorized'}[/bold blue]")
+        console.print(f"Total Time: {recipe.total_time} minutes")
+        console.print(f"Servings: {recipe.serving_size}")
+
+        columns = [
+            ("ingredient", "Ingredient", "green"),
+            ("quantity", "Quantity", "yellow"),
+            ("unit", "Unit", "blue"),
+        ]
+        rows = ((line.name, line.quantity, line.unit) for line in recipe.ingredients)
+        print_rows(columns, rows, empty_message="[italic]No ingredients listed[/italic]")
+
+# Sync Commands Group
+@cli.group()
+def sync():
+    """Exchange incremental changes between databases"""
+    pass
+
+def _sync_engine(database):
+    """Engine for --database, or the default database"""
+    return create_engine(f"sqlite:///{database}") if database else engine
+
+@sync.command("status")
+@click.option("--database", type=click.Path(exists=True, dir_okay=False), help="Database file (default: culinary_compass.db)")
+def sync_status(database):
+    """Show the database's current revision"""
+    with _sync_engine(database).connect() as conn:
+        console.print(f"Current revision: [bold]{current_revision(conn)}[/bold]")
+
+@sync.command("export")
+@click.option("--since", type=int, default=0, show_default=True, help="Export changes made after this revision")
+@click.option("--output", type=click.Path(dir_okay=False), help="Delta file (default: stdout)")
+@click.option("--database", type=click.Path(exists=True, dir_okay=False), help="Database file (default: culinary_compass.db)")
+def sync_export(since, output, database):
+    """Write the changes made after a revision as a JSON-lines delta"""
+    if output:
+        with open(output, "w") as out:
+            stats = export_changes(_sync_engine(database), out, since)
+        console.print(f"[bold green]Exported {stats.upserts} upserts and {stats.deletes} deletes "
+                      f"to {output}; next --since is {stats.revision}[/bold green]")
+    else:
+        stats = export_changes(_sync_engine(database), click.get_text_stream("stdout"), since)
+        click.echo(f"Next --since is {stats.revision}", err=True)
+
+@sync.command("apply")
+@click.argument("delta", type=click.File("r"))
+@click.option("--database", type=click.Path(exists=True, dir_okay=False), help="Database file (default: culinary_compass.db)")
+def sync_apply(delta, database):
+    """Apply a delta written by 'sync export'"""
+    try:
+        stats = apply_changes(_sync_engine(database), delta)
+    except (ValueError, KeyError, StopIteration) as e:
+        console.print(f"[bold red]Could not apply delta: {e or 'empty file'}[/bold red]")
+        return
+    console.print(f"[bold green]Applied {stats.upserts} upserts and {stats.deletes} deletes "
+                  f"(source revision {stats.revision})[/bold green]")
+
+# Backup Commands Group
+@cli.group()
+def backup():
+    """Back up and restore the database while it stays online"""
+    pass
+
+def _report(action, stats):
+    rate = stats.bytes / stats.seconds / 1024 / 1024 if stats.seconds else 0
+    console.print(f"[bold green]{action} {stats.path}: {stats.pages:,} pages, {stats.bytes / 1024 / 1024:.1f} MiB "
+                  f"in {stats.seconds:.2f}s ({rate:.1f} MiB/s)[/bold green]")
+
+@backup.command("create")
+@click.argument("destination", type=click.Path(dir_okay=False))
+@click.option("--compress", is_flag=True, help="Gzip the verified backup")
+@click.option("--pages", type=int, default=DEFAULT_PAGES, show_default=True, help="Pages copied per step (-1 copies everything at once)")
+@click.option("--sleep", "sleep_ms", type=int, default=5, show_default=True, help="Milliseconds to pause between steps")
+@click.option("--database", type=click.Path(exists=True, dir_okay=False), help="Database file (default: culinary_compass.db)")
+def create_backup(destination, compress, pages, sleep_ms, database):
+    """Copy the database to DESTINATION without blocking other processes"""
+    try:
+        stats = backup_database(database or database_path(engine), destination, pages=pages,
+                                sleep=sleep_ms / 1000, compress=compress)
+    except BackupError as e:
+        console.print(f"[bold red]Backup failed: {e}[/bold red]")
+        return
+    _report("Backed up to", stats)
+
+@backup.command("restore")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.option("--database", type=click.Path(dir_okay=False), help="Database file to overwrite (default: culinary_compass.db)")
+@click.option("--confirm", is_flag=True, help="Confirm restore without prompt")
+def restore_backup(source, database, confirm):
+    """Replace the database's contents with a backup made by 'backup create'"""
+    target = database or database_path(engine)
+    if not confirm and not click.confirm(f"Overwrite {target} with {source}?"):
+        console.print("[yellow]Restore cancelled.[/yellow]")
+        return
+    try:
+        stats = restore_database(source, target)
+    except BackupError as e:
+        console.print(f"[bold red]Restore failed: {e}[/bold red]")
+        return
+    _report("Restored", stats)
+
+# Daemon Commands Group
+@cli.group()
+def daemon():
+    """Serve commands from a warm background process (see client.py)"""
+    pass
+
+@daemon.command("start")
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), help="Unix socket to listen on (default: $CC_DAEMON_SOCKET or a per-user path)")
+def start_daemon(socket_path):
+    """Run the daemon in the foreground until 'daemon stop'"""
+    from ..daemon import serve
+
+    socket_path = socket_path or default_socket_path()
+    try:
+        serve(socket_path, ready=lambda: console.print(f"[bold green]Listening on {socket_path}[/bold green]"))
+    except RuntimeError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+
+@daemon.command("stop")
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), help="Unix socket the daemon listens on")
+def stop_daemon(socket_path):
+    """Stop a running daemon"""
+    try:
+        send_request({"control": "stop"}, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        console.print("[yellow]No daemon is running.[/yellow]")
+        return
+    console.print("[bold green]Daemon stopped.[/bold green]")
+
+@daemon.command("status")
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), help="Unix socket the daemon listens on")
+def daemon_status(socket_path):
+    """Check whether a daemon is running"""
+    try:
+        send_request({"control": "ping"}, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        console.print("[yellow]No daemon is running.[/yellow]")
+        return
+    console.print(f"[bold green]Daemon is running on {socket_path or default_socket_path()}[/bold green]")
+
+# Nutrition Commands Group
+@cli.group()
+def nutrition():
+    """Nutrition facts for ingredients and totals for recipes"""
+    pass
+
+@nutrition.command("set")
+@click.argument("ingredient_name")
+@click.option("--unit", default="", help="Unit the values are given for, e.g. g or cup (default: each)")
+@click.option("--per", "amount", type=float, default=1.0, show_default=True, help="Amount of the unit the values are for, e.g. 100 (g)")
+@click.option("--kcal", type=float, default=0.0, help="Energy in kcal")
+@click.option("--protein", type=float, default=0.0, help="Protein in grams")
+@click.option("--fat", type=float, default=0.0, help="Fat in grams")
+@click.option("--carbs", type=float, default=0.0, help="Carbohydrates in grams")
+def set_nutrition(ingredient_name, unit, amount, kcal, protein, fat, carbs):
+    """Set an ingredient's nutrition facts for a unit (replaces its entry for that kind of measure)"""
+    if amount <= 0:
+        console.print("[bold red]--per must be greater than zero.[/bold red]")
+        return
+    session = Session()
+    ingredient = Ingredient.get_by_name(session, ingredient_name)
+    if not ingredient:
+        console.print(f"[bold red]Ingredient '{ingredient_name}' not found![/bold red]")
+        session.close()
+        return
+    entry = IngredientNutrient.set(session, ingredient.id, unit, amount,
+                                   kcal=kcal, protein=protein, fat=fat, carbs=carbs)
+    console.print(f"[bold green]Nutrition for {ingredient.name} set per {entry.amount:g} {entry.unit or 'each'}.[/bold green]")
+    session.close()
+
+@nutrition.command("show")
+@click.argument("recipe_id", type=int)
+def show_nutrition(recipe_id):
+    """Show a recipe's nutrition totals and per-serving values"""
+    session = Session()
+    totals = get_nutrition(session, recipe_id)
+    if totals is None:
+        console.print(f"[bold red]Recipe with ID {recipe_id} not found![/bold red]")
+        session.close()
+        return
+
+    serving = per_serving(totals)
+    table = Table(title=f"Nutrition (serves {totals.servings or '-'})")
+    table.add_column("Nutrient", style="green")
+    table.add_column("Total", style="yellow")
+    table.add_column("Per Serving", style="cyan")
+    for name, label in zip(NUTRIENTS, ["Energy (kcal)", "Protein (g)", "Fat (g)", "Carbs (g)"]):
+        table.add_row(label, f"{getattr(totals, name):.1f}", f"{getattr(serving, name):.1f}")
+    console.print(table)
+    if totals.matched_lines < totals.lines:
+        console.print(f"[yellow]{totals.lines - totals.matched_lines} of {totals.lines} ingredient lines "
+                      f"have no nutrition facts for their unit.[/yellow]")
+    session.close()
+
+@nutrition.command("list")
+@click.option("--sort", type=click.Choice(["id"] + NUTRIENTS), default="id", help="Sort recipes by")
+@click.option("--desc", is_flag=True, help="Sort in descending order")
+@click.option("--per-serving", is_flag=True, help="Show per-serving values instead of recipe totals")
+def list_nutrition(sort, desc, per_serving):
+    """List nutrition totals for every recipe"""
+    session = Session()
+    _refresh_stale(session, has_stale_nutrition, Recipe.refresh_stale_nutrition, "recipes may be missing",
+                   "nutrition refresh")
+
+    columns = [
+        ("id", "ID", "dim"),
+        ("kcal", "kcal", "yellow"),
+        ("protein", "Protein (g)", "green"),
+        ("fat", "Fat (g)", "green"),
+        ("carbs", "Carbs (g)", "green"),
+        ("coverage", "Lines Covered", "blue"),
+    ]
+    rows = (
+        (t.recipe_id, round(t.kcal, 1), round(t.protein, 1), round(t.fat, 1), round(t.carbs, 1),
+         f"{t.matched_lines}/{t.lines}")
+        for t in iter_nutrition(session, sort, desc, per_serving)
+    )
+    print_rows(columns, rows, title="Nutrition per Serving" if per_serving else "Nutrition",
+               empty_message="[bold red]No recipes found![/bold red]")
+    session.close()
+
+@nutrition.command("refresh")
+def refresh_all_nutrition():
+    """Recompute totals for every recipe whose lines or ingredient facts changed"""
+    session = Session()
+    start = time.perf_counter()
+    count = refresh_nutrition(session)
+    session.commit()
+    console.print(f"[bold green]Recomputed {count:,} recipes in {time.perf_counter() - start:.2f}s[/bold green]")
+    session.close()
+
+# Price Commands
+@cli.group()
+def price():
+    """Ingredient prices and recipe costs"""
+    pass
+
+@price.command("set")
+@click.argument("ingredient_name")
+@click.argument("value", metavar="PRICE", type=float)
+@click.option("--unit", default="", help="Unit the price is given for, e.g. kg or cup (default: each)")
+@click.option("--per", "amount", type=float, default=1.0, show_default=True, help="Amount of the unit the price is for, e.g. 500 (g)")
+def set_price(ingredient_name, value, unit, amount):
+    """Set an ingredient's price and recompute the recipes that use it"""
+    if amount <= 0 or value < 0:
+        console.print("[bold red]PRICE must not be negative and --per must be greater than zero.[/bold red]")
+        return
+    session = Session()
+    ingredient = Ingredient.get_by_name(session, ingredient_name)
+    if not ingredient:
+        console.print(f"[bold red]Ingredient '{ingredient_name}' not found![/bold red]")
+        session.close()
+        return
+    Ingredient.set_price(session, ingredient.id, value, unit, amount)
+    console.print(f"[bold green]Price for {ingredient.name} set to {value:.2f} "
+                  f"per {amount:g} {unit or 'each'}.[/bold green]")
+    session.close()
+
+@price.command("clear")
+@click.argument("ingredient_name")
+def clear_price(ingredient_name):
+    """Remove an ingredient's price and recompute the recipes that use it"""
+    session = Session()
+    ingredient = Ingredient.get_by_name(session, ingredient_name)
+    if not ingredient:
+        console.print(f"[bold red]Ingredient '{ingredient_name}' not found![/bold red]")
+        session.close()
+        return
+    Ingredient.set_price(session, ingredient.id, None)
+    console.print(f"[bold green]Price for {ingredient.name} cleared.[/bold green]")
+    session.close()
+
+@price.command("import")
+@click.argument("price_file", type=click.File("r", encoding="utf-8"))
+def import_price_file(price_file):
+    """
+    Set many prices from a CSV file ('-' for stdin) with columns name,price[,unit,per].
+
+    All affected recipe costs are recomputed in one pass.
+    """
+    try:
+        rows = list(read_price_file(price_file))
+    except ValueError as exc:
+        console.print(f"[bold red]Invalid price file: {exc}[/bold red]")
+        return
+    session = Session()
+    start = time.perf_counter()
+    result = import_prices(session, rows)
+    session.commit()
+    console.print(f"[bold green]Updated {result.ingredients:,} ingredient prices and {result.recipes:,} recipe costs "
+                  f"in {time.perf_counter() - start:.2f}s[/bold green]")
+    if result.unknown:
+        console.print(f"[bold yellow]No ingredient named: {', '.join(result.unknown)}[/bold yellow]")
+    session.close()
+
+@price.command("refresh")
+def refresh_all_costs():
+    """Recompute costs for every recipe whose lines changed"""
+    session = Session()
+    start = time.perf_counter()
+    count = refresh_costs(session)
+    session.commit()
+    console.print(f"[bold green]Recomputed {count:,} recipe costs in {time.perf_counter() - start:.2f}s[/bold green]")
+    session.close()
+
+# Meal Plan Commands
+@cli.group()
+def plan():
+    """Generate meal plans"""
+    pass
+
+@plan.command("generate")
+@click.option("--days", type=int, default=7, show_default=True, help="Number of days to plan")
+@click.option("--slot", "slot_specs", multiple=True, metavar="LABEL[:MINUTES[:CATEGORY,...]]",
+              help="A meal slot per day with its prep + cook time limit and allowed categories "
+                   "(repeatable, default: dinner:60)")
+@click.option("--pantry", multiple=True, help="An ingredient already at hand (repeatable)")
+@click.option("--pantry-file", type=click.File("r"), help="Read pantry ingredients, one per line ('-' for stdin)")
+@click.option("--pool-size", type=int, default=DEFAULT_POOL_SIZE, show_default=True,
+              help="Candidate recipes considered per kind of slot")
+@click.option("--time-budget", type=float, default=DEFAULT_TIME_BUDGET, show_default=True,
+              help="Seconds to spend improving the plan")
+@click.option("--substitutes", is_flag=True, help="Count ingredients a pantry item can substitute as in the pantry")
+@click.option("--seed", type=int, default=0, show_default=True, help="Vary this for a different plan")
+def generate_meal_plan(days, slot_specs, pantry, pantry_file, pool_size, time_budget, substitutes, seed):
+    """
+    Plan a week of distinct recipes that share ingredients, to shorten the shopping list.
+
+    Every slot's recipe fits its time limit and categories; pantry
+    ingredients never go on the shopping list.
+    """
+    try:
+        slots = [parse_slot(spec) for spec in slot_specs or ["dinner:60"]]
+    except ValueError as exc:
+        console.print(f"[bold red]{exc}[/bold red]")
+        return
+    pantry = list(pantry)
+    if pantry_file:
+        pantry.extend(line.strip() for line in pantry_file if line.strip() and not line.startswith("#"))
+    day_slots = [slot._replace(label=f"Day {day} {slot.label}") for day in range(1, days + 1) for slot in slots]
+
+    session = Session()
+    if substitutes:
+        _refresh_closure(session)
+    try:
+        meal_plan = generate_plan(session, day_slots, pantry, pool_size=pool_size, time_budget=time_budget,
+                                  seed=seed, substitutes=substitutes)
+    except PlanError as exc:
+        console.print(f"[bold red]{exc}[/bold red]")
+        session.close()
+        return
+    session.close()
+
+    columns = [
+        ("slot", "Slot", "blue"),
+        ("id", "ID", "dim"),
+        ("name", "Recipe", "green"),
+        ("category", "Category", "blue"),
+        ("total_time", "Total Time (min)", "yellow"),
+    ]
+    rows = ((meal.slot.label, meal.recipe_id, meal.name, meal.category, meal.total_time) for meal in meal_plan.meals)
+    print_rows(columns, rows, title="Meal Plan")
+    # Machine formats get just the plan rows
+    if current_format() != "table":
+        return
+
+    shopping = Table(title=f"Shopping List ({len(meal_plan.shopping)} ingredients)")
+    shopping.add_column("Ingredient", style="green")
+    shopping.add_column("Recipes", style="cyan")
+    for name, count in meal_plan.shopping:
+        shopping.add_row(name, str(count))
+    console.print(shopping)
+    console.print(f"[dim]Planned in {meal_plan.seconds:.2f}s ({meal_plan.iterations:,} search steps)[/dim]")
+
+# Substitution Commands
+@cli.group()
+def substitute():
+    """Ingredient substitutions"""
+    pass
+
+def _ingredients_by_name(session, *names):
+    """Look up ingredients by name, printing an error and returning None if one is missing"""
+    found = []
+    for name in names:
+        ingredient = Ingredient.get_by_name(session, name)
+        if not ingredient:
+            console.print(f"[bold red]Ingredient '{name}' not found![/bold red]")
+            return None
+        found.append(ingredient)
+    return found
+
+@substitute.command("add")
+@click.argument("ingredient_name")
+@click.argument("substitute_name")
+@click.option("--ratio", type=float, default=1.0, show_default=True,
+              help="Units of the substitute per unit of the ingredient")
+@click.option("--note", help='How to substitute, e.g. "plus 1 tbsp lemon juice per cup"')
+def add_substitute(ingredient_name, substitute_name, ratio, note):
+    """Record that SUBSTITUTE_NAME can replace INGREDIENT_NAME"""
+    if ratio <= 0:
+        console.print("[bold red]--ratio must be greater than zero.[/bold red]")
+        return
+    session = Session()
+    ingredients = _ingredients_by_name(session, ingredient_name, substitute_name)
+    if ingredients:
+        ingredient, replacement = ingredients
+        try:
+            IngredientSubstitute.add(session, ingredient.id, replacement.id, ratio, note)
+        except ValueError as exc:
+            console.print(f"[bold red]{exc}[/bold red]")
+        else:
+            console.print(f"[bold green]{replacement.name} can now replace {ingredient.name} "
+                          f"({ratio:g} per 1).[/bold green]")
+    session.close()
+
+@substitute.command("remove")
+@click.argument("ingredient_name")
+@click.argument("substitute_name")
+def remove_substitute(ingredient_name, substitute_name):
+    """Remove a substitution"""
+    session = Session()
+    ingredients = _ingredients_by_name(session, ingredient_name, substitute_name)
+    if ingredients:
+        ingredient, replacement = ingredients
+        if IngredientSubstitute.remove(session, ingredient.id, replacement.id):
+            console.print(f"[bold green]{replacement.name} no longer replaces {ingredient.name}.[/bold green]")
+        else:
+            console.print(f"[bold red]{replacement.name} isn't a substitute for {ingredient.name}![/bold red]")
+    session.close()
+
+@substitute.command("list")
+@click.argument("ingredient_name")
+def list_substitutes(ingredient_name):
+    """List everything that can replace an ingredient, directly or through a chain"""
+    session = Session()
+    ingredients = _ingredients_by_name(session, ingredient_name)
+    if not ingredients:
+        session.close()
+        return
+    _refresh_closure(session)
+    graph = SubstitutionGraph.load(session)
+    found = graph.substitutes(ingredients[0].id)
+    notes = {edge.substitute_id: edge.note for edge in IngredientSubstitute.get_for_ingredient(session, ingredients[0].id)}
+    names = dict(session.query(Ingredient.id, Ingredient.name).filter(Ingredient.id.in_(list(found))))
+
+    columns = [
+        ("substitute", "Substitute", "green"),
+        ("ratio", "Per 1", "yellow"),
+        ("steps", "Steps", "cyan"),
+        ("note", "Note", "blue"),
+    ]
+    rows = sorted(
+        ((names.get(substitute_id), round(ratio, 3), hops, notes.get(substitute_id))
+         for substitute_id, (ratio, hops) in found.items()),
+        key=lambda row: (row[2], row[0] or ""),
+    )
+    print_rows(columns, rows, title=f"Substitutes for {ingredients[0].name}",
+               empty_message=f"[bold yellow]No substitutes for {ingredients[0].name}.[/bold yellow]")
+    session.close()
+
+@substitute.command("refresh")
+def refresh_substitutes():
+    """Rebuild the substitution chains if a substitution was removed or changed"""
+    session = Session()
+    start = time.perf_counter()
+    if IngredientSubstitute.refresh_stale_closure(session):
+        console.print(f"[bold green]Rebuilt substitution chains in {time.perf_counter() - start:.2f}s[/bold green]")
+    else:
+        console.print("[bold green]Substitution chains are up to date.[/bold green]")
+    session.close()
@@ -0,0 +1,162 @@
+import csv
+import json
+import sys
+from itertools import islice
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+# Output formats accepted by the global --format option
+FORMATS = ["table", "tsv", "csv", "json", "jsonl"]
+
+# Above this many rows, table mode switches to a streaming plain layout
+# Rich measures every cell before printing, which is too slow for big listings
+TABLE_ROW_LIMIT = 1000
+
+# Widest a column gets in the plain layout before values are cut off
+PLAIN_MAX_WIDTH = 40
+
+console = Console()
+
+
+def current_format():
+    """Return the output format chosen on the cli group (defaults to table)"""
+    ctx = click.get_current_context(silent=True)
+    while ctx is not None:
+        if ctx.obj and "format" in ctx.obj:
+            return ctx.obj["format"]
+        ctx = ctx.parent
+    return "table"
+
+
+def print_rows(columns, rows, title=None, empty_message=None):
+    """
+    Print rows in the current output format.
+
+    `columns` is a list of (key, header, style) tuples and `rows` any iterable
+    of tuples in the same order, usually a query iterator. Machine formats write
+    each row to stdout as soon as it is read. Returns the number of rows printed.
+    """
+    fmt = current_format()
+    rows = iter(rows)
+
+    if fmt == "table":
+        count = _print_table(columns, rows, title)
+        if count == 0 and empty_message:
+            console.print(empty_message)
+        return count
+
+    writers = {
+        "tsv": _write_tsv,
+        "csv": _write_csv,
+        "json": _write_json,
+        "jsonl": _write_jsonl,
+    }
+    out = sys.stdout
+    count = writers[fmt](columns, rows, out)
+    out.flush()
+    return count
+
+
+def _display(value):
+    """Format a value for human-readable output"""
+    if value is None or value == "":
+        return "-"
+    return str(value)
+
+
+def _print_table(columns, rows, title):
+    # Buffer just enough rows to know whether a Rich table is affordable
+    head = list(islice(rows, TABLE_ROW_LIMIT + 1))
+    if not head:
+        return 0
+
+    if len(head) <= TABLE_ROW_LIMIT:
+        table = Table(title=title)
+        for _, header, style in columns:
+            table.add_column(header, style=style)
+        for row in head:
+            table.add_row(*(_display(value) for value in row))
+        console.print(table)
+        return len(head)
+
+    return _print_plain(columns, head, rows, title)
+
+
+def _print_plain(columns, head, rows, title):
+    # Column widths come from the buffered rows so the rest can be streamed
+    widths = [len(header) for _, header, _ in columns]
+    for row in head:
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], len(_display(value)))
+    widths = [min(width, PLAIN_MAX_WIDTH) for width in widths]
+
+    def line(values):
+        cells = []
+        for value, width in zip(values, widths):
+            text = value if len(value) <= width else value[:width - 1] + "…"
+            cells.append(text.ljust(width))
+        return "  ".join(cells).rstrip() + "\n"
+
+    out = sys.stdout
+    if title:
+        out.write(title + "\n")
+    out.write(line([header for _, header, _ in columns]))
+    out.write(line(["-" * width for width in widths]))
+
+    count = 0
+    for row in head:
+        out.write(line([_display(value) for value in row]))
+        count += 1
+    for row in rows:
+        out.write(line([_display(value) for value in row]))
+        count += 1
+    out.flush()
+    return count
+
+
+def _tsv_value(value):
+    if value is None:
+        return ""
+    return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+
+def _write_tsv(columns, rows, out):
+    out.write("\t".join(key for key, _, _ in columns) + "\n")
+    count = 0
+    for row in rows:
+        out.write("\t".join(_tsv_value(value) for value in row) + "\n")
+        count += 1
+    return count
+
+
+def _write_csv(columns, rows, out):
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([key for key, _, _ in columns])
+    count = 0
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+        count += 1
+    return count
+
+
+def _write_json(columns, rows, out):
+    keys = [key for key, _, _ in columns]
+    out.write("[")
+    count = 0
+    for row in rows:
+        out.write(",\n" if count else "\n")
+        out.write(json.dumps(dict(zip(keys, row))))
+        count += 1
+    out.write("\n]\n" if count else "]\n")
+    return count
+
+
+def _write_jsonl(columns, rows, out):
+    keys = [key for key, _, _ in columns]
+    count = 0
+    for row in rows:
+        out.write(json.dumps(dict(zip(keys, row))) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,84 @@
+"""
+Thin client for the Culinary Compass daemon.
+
+Forwards its command line to a running `run.py daemon start` over a Unix
+domain socket and exits with the command's exit code. The client's stdin,
+stdout and stderr file descriptors are passed along with the request
+(SCM_RIGHTS), so the command reads and writes the caller's terminal or
+pipes directly, including prompts and colors. Only the standard library
+is imported here, which keeps startup cheap; when no daemon is running
+the command runs in-process instead.
+
+Usage: python client.py recipe list --format json
+"""
+import json
+import os
+import socket
+import struct
+import sys
+
+# Frames: 4-byte big-endian length, then a JSON request; the reply is a
+# 4-byte signed exit code
+_LENGTH = struct.Struct(">I")
+_EXIT_CODE = struct.Struct(">i")
+
+
+def default_socket_path():
+    """Socket the daemon listens on: $CC_DAEMON_SOCKET, else one per user in the runtime dir"""
+    path = os.environ.get("CC_DAEMON_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime_dir, f"culinary_compass-{os.getuid()}.sock")
+
+
+def _recv_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Daemon closed the connection")
+        data += chunk
+    return data
+
+
+def send_request(request, socket_path=None, fds=()):
+    """Send one request to the daemon and return the exit code it replies with"""
+    payload = json.dumps(request).encode("utf-8")
+    message = _LENGTH.pack(len(payload)) + payload
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or default_socket_path())
+        sent = socket.send_fds(sock, [message], list(fds))
+        if sent < len(message):
+            sock.sendall(message[sent:])
+        return _EXIT_CODE.unpack(_recv_exactly(sock, _EXIT_CODE.size))[0]
+
+
+def run_command(argv, socket_path=None):
+    """Run a CLI command through the daemon, returning its exit code"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    request = {"argv": list(argv), "cwd": os.getcwd(), "env": dict(os.environ)}
+    return send_request(request, socket_path, fds=(0, 1, 2))
+
+
+def _run_locally(argv):
+    from culinary_compass.models import create_tables
+    from culinary_compass.cli import cli
+
+    create_tables()
+    cli.main(args=list(argv), prog_name="run.py")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        code = run_command(argv)
+    except (FileNotFoundError, ConnectionRefusedError):
+        _run_locally(argv)
+        return
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Warm daemon that serves CLI commands over a Unix domain socket.
+
+Starting `run.py` costs Python startup plus the SQLAlchemy, Rich and click
+imports, engine setup and create_tables(), which dwarfs most commands.
+The daemon pays for all of that once. It reads each request itself, then
+forks; the child, which already has everything imported and warmed, takes
+over the client's stdin/stdout/stderr, switches to its working directory
+and environment, and runs the command through the normal click entry
+point.
+
+Forking rather than threading keeps commands isolated from each other:
+the module-level consoles, sessions, cwd and environment are per process,
+and a crashing command can't take the daemon down. SQLite connections
+must not cross a fork, so each child drops the inherited pool and opens
+its own connection, to the same database `run.py` would use from the
+client's directory.
+"""
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+from rich.console import Console
+from sqlalchemy.orm import configure_mappers
+
+from .cli import cli, main as cli_main, output as cli_output
+from .client import _EXIT_CODE, _LENGTH, _recv_exactly, default_socket_path, send_request
+from .models import create_tables, engine
+
+
+# Cheap read-only commands run once at startup, so mapper configuration and
+# compiled SQL are inherited by every child
+WARM_UP_COMMANDS = [
+    ["--format", "tsv", "category", "list"],
+    ["--format", "tsv", "tag", "list"],
+    ["recipe", "view", "0"],
+]
+
+
+def _warm_up():
+    configure_mappers()
+    sys.stdout.flush()
+    saved_stdout = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        for argv in WARM_UP_COMMANDS:
+            try:
+                cli.main(args=argv, prog_name="run.py", standalone_mode=False)
+            except Exception:
+                pass
+        sys.stdout.flush()
+    finally:
+        os.dup2(saved_stdout, 1)
+        os.close(saved_stdout)
+        os.close(devnull)
+
+
+def _read_request(conn):
+    """Read one framed JSON request and the file descriptors sent with it"""
+    message, fds, _, _ = socket.recv_fds(conn, 1 << 16, 3)
+    if len(message) < _LENGTH.size:
+        message += _recv_exactly(conn, _LENGTH.size - len(message))
+    length = _LENGTH.unpack_from(message)[0]
+    payload = message[_LENGTH.size:]
+    if len(payload) < length:
+        payload += _recv_exactly(conn, length - len(payload))
+    return json.loads(payload), fds
+
+
+def run_command(request, fds):
+    """Run one command in this (forked) process with the client's stdio, cwd and environment"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    engine.dispose(close=False)
+
+    # Consoles detect terminal support and color when they are created
+    cli_main.console = cli_output.console = Console()
+
+    try:
+        cli.main(args=request["argv"], prog_name="run.py")
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return code
+
+
+def _serve_child(listener, conn, request, fds):
+    """Body of a forked child: run the command and reply with its exit code"""
+    code = 1
+    try:
+        listener.close()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        code = run_command(request, fds)
+        conn.sendall(_EXIT_CODE.pack(code))
+    finally:
+        os._exit(code)
+
+
+def serve(socket_path=None, ready=None):
+    """
+    Warm up, then serve commands until a stop request arrives.
+
+    `ready`, if given, is called once the socket is listening.
+    """
+    socket_path = socket_path or default_socket_path()
+    if os.path.exists(socket_path):
+        try:
+            send_request({"control": "ping"}, socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+        else:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+    create_tables()
+    _warm_up()
+    engine.dispose()
+    # Keep the collector from touching (and so copying) the warmed-up heap in children
+    gc.freeze()
+
+    # Children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen(64)
+    if ready:
+        ready()
+
+    try:
+        while True:
+            conn, _ = listener.accept()
+            with conn:
+                try:
+                    request, fds = _read_request(conn)
+                except (ConnectionError, ValueError, OSError):
+                    continue
+                control = request.get("control")
+                if control in ("ping", "stop"):
+                    conn.sendall(_EXIT_CODE.pack(0))
+                    if control == "stop":
+                        break
+                    continue
+
+                if os.fork() == 0:
+                    _serve_child(listener, conn, request, fds)
+                for fd in fds:
+                    os.close(fd)
+    finally:
+        listener.close()
+        os.remove(socket_path)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
@@ -0,0 +1,110 @@
+"""
+Federated recipe search across several Culinary Compass databases.
+
+Every shard (a kitchen's .db file) is queried on its own thread with its
+own read-only engine, so total latency follows the slowest shard rather
+than the sum: the sqlite3 driver releases the GIL while SQLite executes.
+Threads are used instead of ATTACHing the files to one connection
+because SQLite allows only ten attached databases by default, and one
+shard with an incompatible schema can then be reported without failing
+the others.
+
+Each shard returns its rows already in the filter's order, and the
+per-shard lists are merged with a k-way merge. A recipe that appears in
+several shards (same name, category, times and servings) is listed once,
+with all of its sources.
+"""
+import heapq
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from .models import configure_sqlite
+
+# Positions in RecipeFilter.rows() tuples
+_SORT_COLUMNS = {"id": 0, "name": 1, "time": 5, "servings": 6, "cost": 7, "cost_per_serving": 8}
+
+ShardResult = namedtuple("ShardResult", ["label", "path", "rows", "error", "seconds"])
+FederatedResult = namedtuple("FederatedResult", ["rows", "shards"])
+
+
+class FederationError(Exception):
+    """Raised when the shard list itself is unusable"""
+
+
+def shard_labels(paths):
+    """Short label per path: the file name without extension, or the full path where names clash"""
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    return [name if names.count(name) == 1 else path for name, path in zip(names, paths)]
+
+
+def _query_shard(label, path, recipe_filter):
+    start = time.perf_counter()
+    if not os.path.exists(path):
+        return ShardResult(label, path, [], "no such file", 0.0)
+    # mode=ro so a mistyped path can never create an empty database
+    engine = configure_sqlite(create_engine(f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true"))
+    session = sessionmaker(bind=engine)()
+    try:
+        rows = [tuple(row) for row in recipe_filter.rows(session)]
+        return ShardResult(label, path, rows, None, time.perf_counter() - start)
+    except Exception as exc:
+        return ShardResult(label, path, [], str(exc).splitlines()[0], time.perf_counter() - start)
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _sort_key(sort):
+    column = _SORT_COLUMNS[sort]
+    # NULLs sort first ascending and last descending, as in SQLite
+    return lambda row: (row[column] is not None, row[column], row[0])
+
+
+def _identity(row):
+    """Recipes are the same across shards when these match (ids are per-database)"""
+    name, category, prep, cook, servings = row[1], row[2], row[3], row[4], row[6]
+    return (name.casefold() if name else name, category, prep, cook, servings)
+
+
+def search_shards(paths, recipe_filter, workers=None):
+    """
+    Run a RecipeFilter against every database in `paths` concurrently.
+
+    Returns a FederatedResult whose rows are (sources, *row) tuples,
+    merged in the filter's order and de-duplicated across shards, where
+    sources is a comma-separated list of shard labels. `shards` has one
+    ShardResult per path, with the error message for shards that failed.
+    """
+    paths = list(paths)
+    if not paths:
+        raise FederationError("No databases given")
+    labels = shard_labels(paths)
+    with ThreadPoolExecutor(max_workers=workers or min(32, len(paths))) as pool:
+        shards = list(pool.map(_query_shard, labels, paths, [recipe_filter] * len(paths)))
+
+    streams = [[(shard.label, row) for row in shard.rows] for shard in shards]
+    row_key = _sort_key(recipe_filter.sort)
+    merged = heapq.merge(*streams, key=lambda item: row_key(item[1]), reverse=recipe_filter.descending)
+
+    # A copy of a recipe joins the first earlier entry with the same identity
+    # that doesn't have this shard yet, so repeats within one shard stay apart
+    entries = []
+    by_identity = {}
+    for label, row in merged:
+        candidates = by_identity.setdefault(_identity(row), [])
+        for entry in candidates:
+            if label not in entry[0]:
+                entry[0].append(label)
+                break
+        else:
+            entry = ([label], row)
+            candidates.append(entry)
+            entries.append(entry)
+
+    rows = [(", ".join(sources), *row) for sources, row in entries]
+    return FederatedResult(rows, shards)
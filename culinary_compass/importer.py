@@ -0,0 +1,230 @@
+"""
+Bulk recipe import with a parallel parsing stage.
+
+Input is a JSON-lines dump, one recipe per line:
+
+    {"name": "Pancakes", "category": "Breakfast", "prep_time": 10,
+     "cook_time": 15, "serving_size": 4, "description": "...",
+     "instructions": "...", "ingredients": ["1 1/2 cups flour", "2 eggs"]}
+
+Decoding, validation and ingredient-line parsing run in a process pool.
+The calling process is the single writer: it keeps name -> id maps for
+categories and ingredients and batch-inserts each parsed chunk. At most
+`max_pending` chunks are in flight, which bounds memory and applies
+backpressure to the reader when the writer falls behind.
+"""
+import json
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sqlalchemy import func, insert, select
+
+from .models import Recipe, Ingredient, RecipeIngredient, Category
+from .models.ingredient import fold_name
+from .parser import parse_line, to_model_line
+
+ImportStats = namedtuple("ImportStats", ["recipes", "lines", "errors", "seconds"])
+
+# Raw lines handed to a worker at a time
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _optional_int(value):
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _string(data, key):
+    """A field that must be a string when present; None when missing"""
+    value = data.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"'{key}' is not a string")
+    return value
+
+
+def _ingredient_line(item):
+    """An ingredient entry, a line of text or an object, as a (quantity, unit, name) tuple"""
+    if isinstance(item, str):
+        return to_model_line(parse_line(item))
+    if not isinstance(item, dict):
+        raise ValueError("Ingredient is neither a string nor an object")
+    name = (_string(item, "name") or "").strip()
+    if not name:
+        raise ValueError("Ingredient has no name")
+    return float(item.get("quantity") or 0), _string(item, "unit") or None, name
+
+
+def normalize_record(text):
+    """
+    Decode and validate one JSON line.
+
+    Returns a (recipe fields, category name, ingredient lines) tuple where the
+    lines are (quantity, unit, name) tuples. Raises ValueError for bad records.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Record is not a JSON object")
+
+    name = (_string(data, "name") or "").strip()
+    if not name:
+        raise ValueError("Recipe has no name")
+
+    fields = {
+        "name": name[:100],
+        "description": _string(data, "description") or None,
+        "prep_time": _optional_int(data.get("prep_time")),
+        "cook_time": _optional_int(data.get("cook_time")),
+        "serving_size": _optional_int(data.get("serving_size", data.get("servings"))),
+        "instructions": _string(data, "instructions") or None,
+    }
+    category = (_string(data, "category") or "").strip() or None
+
+    ingredients = data.get("ingredients") or []
+    if not isinstance(ingredients, list):
+        raise ValueError("'ingredients' is not a list")
+    lines = [_ingredient_line(item) for item in ingredients]
+    return fields, category, lines
+
+
+def parse_chunk(texts):
+    """Worker entry point: normalize a chunk of raw lines, returning (records, error count)"""
+    records = []
+    errors = 0
+    for text in texts:
+        if not text.strip():
+            continue
+        try:
+            records.append(normalize_record(text))
+        except (ValueError, TypeError, KeyError):
+            errors += 1
+    return records, errors
+
+
+class CatalogWriter:
+    """
+    Single writer that batch-inserts normalized records.
+
+    Category and ingredient ids are resolved through in-memory name -> id maps
+    loaded once up front, so each chunk costs a handful of executemany calls.
+    The maps are keyed by fold_name(), so names differing only in case share
+    one row, as they do when lines are added one recipe at a time; where a
+    database already has several, the oldest wins.
+    Recipe ids are allocated here too, which assumes no other process is
+    inserting recipes while the import runs.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        with engine.connect() as conn:
+            self.category_ids = self._load(conn, Category.__table__)
+            self.ingredient_ids = self._load(conn, Ingredient.__table__)
+
+    @staticmethod
+    def _load(conn, table):
+        """fold_name(name) -> id for every row, the oldest id winning"""
+        rows = conn.execute(select(table.c.name, table.c.id).order_by(table.c.id.desc()))
+        return {fold_name(name): id for name, id in rows}
+
+    def _resolve(self, conn, table, ids, names):
+        """Insert any names missing from `ids`, spelled as first seen, and add their new ids to it"""
+        missing = {}
+        for name in names:
+            key = fold_name(name)
+            if key not in ids:
+                missing.setdefault(key, name)
+        if not missing:
+            return
+        missing = sorted(missing.items())
+        next_id = (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+        conn.execute(insert(table), [
+            {"id": next_id + offset, "name": name} for offset, (_, name) in enumerate(missing)
+        ])
+        ids.update((key, next_id + offset) for offset, (key, _) in enumerate(missing))
+
+    def write(self, records):
+        """Insert one chunk of records in a single transaction, returning the number of lines"""
+        if not records:
+            return 0
+        with self.engine.begin() as conn:
+            self._resolve(conn, Category.__table__, self.category_ids,
+                          [category for _, category, _ in records if category])
+            self._resolve(conn, Ingredient.__table__, self.ingredient_ids,
+                          [name for _, _, lines in records for _, _, name in lines])
+
+            next_id = (conn.execute(select(func.max(Recipe.id))).scalar() or 0) + 1
+            recipes = []
+            lines = []
+            for offset, (fields, category, recipe_lines) in enumerate(records):
+                recipe_id = next_id + offset
+                category_id = self.category_ids[fold_name(category)] if category else None
+                recipes.append(dict(fields, id=recipe_id, category_id=category_id))
+                lines.extend(
+                    {
+                        "recipe_id": recipe_id,
+                        "ingredient_id": self.ingredient_ids[fold_name(name)],
+                        "quantity": quantity,
+                        "unit": unit,
+                    }
+                    for quantity, unit, name in recipe_lines
+                )
+            conn.execute(insert(Recipe.__table__), recipes)
+            if lines:
+                # A record listing an ingredient twice in the same unit gets one summed line
+                conn.execute(RecipeIngredient.upsert_statement(accumulate=True), lines)
+        return len(lines)
+
+
+def _chunks(stream, size):
+    while True:
+        chunk = list(islice(stream, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_recipes(engine, stream, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_pending=None, progress=None):
+    """
+    Import recipes from an iterable of JSON lines.
+
+    With workers=1 everything runs in this process; otherwise parsing is spread
+    over a process pool of that size (None means one per CPU). `progress`, if
+    given, is called with the running ImportStats after every chunk.
+    """
+    start = time.perf_counter()
+    writer = CatalogWriter(engine)
+    recipes = lines = errors = 0
+
+    def handle(result):
+        nonlocal recipes, lines, errors
+        records, chunk_errors = result
+        lines += writer.write(records)
+        recipes += len(records)
+        errors += chunk_errors
+        if progress:
+            progress(ImportStats(recipes, lines, errors, time.perf_counter() - start))
+
+    if workers == 1:
+        for chunk in _chunks(iter(stream), chunk_size):
+            handle(parse_chunk(chunk))
+    else:
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or workers * 2
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in _chunks(iter(stream), chunk_size):
+                # Block on the oldest chunk once the window is full (backpressure),
+                # which also keeps recipe ids in input order
+                if len(pending) >= max_pending:
+                    handle(pending.popleft().result())
+                pending.append(pool.submit(parse_chunk, chunk))
+            while pending:
+                handle(pending.popleft().result())
+
+    return ImportStats(recipes, lines, errors, time.perf_counter() - start)
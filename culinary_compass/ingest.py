@@ -0,0 +1,27 @@
+from .parser import parse_line, to_model_line
+
+
+def read_lines(lines=(), stream=None):
+    """
+    Collect ingredient lines from arguments and an optional open file.
+
+    Lines are free text such as "1 1/2 cups flour, sifted", read with the
+    ingredient line parser. Blank lines and lines starting with '#' are
+    skipped. Returns a list of
+    parsed (quantity, unit, name) tuples, or raises ValueError naming the
+    first line that couldn't be parsed so nothing is half-imported.
+    """
+    texts = list(lines)
+    if stream is not None:
+        texts.extend(stream)
+
+    parsed = []
+    for number, text in enumerate(texts, start=1):
+        text = text.strip()
+        if not text or text.startswith("#"):
+            continue
+        try:
+            parsed.append(to_model_line(parse_line(text)))
+        except ValueError as e:
+            raise ValueError(f"Line {number}: {e}")
+    return parsed
@@ -0,0 +1,160 @@
+"""
+Memory profiling for single commands.
+
+MemoryProfiler runs a block of code under tracemalloc and reports:
+
+- peak traced memory
+- the allocation sites holding the most memory near that peak
+- ORM instances loaded from the database, per class, counted through
+  SQLAlchemy's `load` event
+
+tracemalloc only knows which allocations are still alive when a snapshot
+is taken, and by the end of a command its rows and objects have usually
+been freed. So a background thread takes a snapshot each time traced
+memory doubles, and the sites are read from the largest one. Each
+snapshot costs time proportional to what is traced, and doubling keeps
+their total within about twice the cost of one snapshot at the peak.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+
+# Stack depth recorded per allocation; one frame attributes allocations to lines
+DEFAULT_FRAMES = 1
+
+# Allocation sites listed in a report
+DEFAULT_TOP = 10
+
+# Seconds between checks of traced memory
+SAMPLE_INTERVAL = 0.02
+
+# Frames that belong to the profiler or the import system rather than the command
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+class MemoryProfiler:
+    """
+    Profile memory used between start() and stop(), or within a with block.
+
+    The report is available as `report` afterwards: a dict with the label,
+    elapsed seconds, peak and final traced bytes, the top allocation sites
+    and ORM loads per class.
+    """
+
+    def __init__(self, label, top=DEFAULT_TOP, frames=DEFAULT_FRAMES):
+        self.label = label
+        self.top = top
+        self.frames = frames
+        self.report = None
+        self._loads = Counter()
+        self._snapshot = None
+        self._snapshot_size = 0
+        self._stop = threading.Event()
+        self._sampler = None
+        self._was_tracing = False
+
+    def _on_load(self, target, context):
+        self._loads[type(target).__name__] += 1
+
+    def _take_snapshot(self):
+        size = tracemalloc.get_traced_memory()[0]
+        if size > self._snapshot_size:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = size
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            if tracemalloc.get_traced_memory()[0] >= 2 * self._snapshot_size:
+                self._take_snapshot()
+
+    def start(self):
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start(self.frames)
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        self._snapshot_size = self._baseline
+        event.listen(Mapper, "load", self._on_load)
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        seconds = time.perf_counter() - self._started
+        event.remove(Mapper, "load", self._on_load)
+        current, peak = tracemalloc.get_traced_memory()
+        self._take_snapshot()
+        if not self._was_tracing:
+            tracemalloc.stop()
+
+        sites = []
+        if self._snapshot is not None:
+            for stat in self._snapshot.filter_traces(_IGNORED).statistics("lineno")[:self.top]:
+                frame = stat.traceback[0]
+                sites.append({"file": frame.filename, "line": frame.lineno, "bytes": stat.size, "count": stat.count})
+        self.report = {
+            "label": self.label,
+            "seconds": seconds,
+            "peak_bytes": peak - self._baseline,
+            "final_bytes": current - self._baseline,
+            "sites": sites,
+            "orm_loads": dict(self._loads.most_common()),
+        }
+        return self.report
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _size(count):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+def format_report(report):
+    """Human-readable text for a report"""
+    lines = [
+        f"memory: {report['label']}",
+        f"  peak {_size(report['peak_bytes'])}, retained {_size(report['final_bytes'])}, "
+        f"{report['seconds']:.2f}s",
+    ]
+    if report["sites"]:
+        lines.append("  top allocation sites near the peak:")
+        cwd = os.getcwd()
+        for site in report["sites"]:
+            path = os.path.relpath(site["file"], cwd) if site["file"].startswith(cwd) else site["file"]
+            lines.append(f"    {_size(site['bytes']):>10}  {site['count']:>8} blocks  {path}:{site['line']}")
+    if report["orm_loads"]:
+        loads = ", ".join(f"{name} {count:,}" for name, count in report["orm_loads"].items())
+        lines.append(f"  ORM objects loaded: {loads}")
+    else:
+        lines.append("  ORM objects loaded: none")
+    return "\n".join(lines)
+
+
+def append_report(report, path):
+    """Append a report to a JSON Lines file, one run per line, with a timestamp"""
+    with open(path, "a") as stream:
+        stream.write(json.dumps({"time": time.time(), **report}) + "\n")
@@ -0,0 +1 @@
+from .chunked import DEFAULT_CHUNK_SIZE, DEFAULT_PAUSE, MigrationError, Progress, backfill, log_progress, rebuild_table
@@ -0,0 +1,303 @@
+"""
+Chunked, resumable data migrations for large databases.
+
+A plain Alembic migration runs as one transaction. An UPDATE over every
+row, or a batch_alter_table copy, holds SQLite's write lock until the
+whole table has been rewritten. The helpers here do the same work in
+primary-key ranges instead. Each chunk commits on its own, together with
+a checkpoint row in migration_checkpoints, so other writers get the
+database back between chunks. A run that is interrupted resumes after
+the last committed chunk. The checkpoint table is dropped again once no
+migration is in progress.
+
+    def upgrade():
+        with op.get_context().autocommit_block():
+            backfill(op.get_bind(), "ingredients", "name_normalized = lower(trim(name))",
+                     where="name_normalized IS NULL")
+
+The connection must be in autocommit mode, because the helpers issue
+their own BEGIN and COMMIT. An interrupted migration is run again from
+the start, so the schema change and its backfill belong in separate
+revisions (or the schema change must be idempotent). rebuild_table()
+keeps its own progress and can be re-run as it is.
+"""
+import json
+import logging
+import re
+import time
+from collections import namedtuple
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction: large enough to amortize the commit, small enough
+# that other writers wait milliseconds rather than seconds
+DEFAULT_CHUNK_SIZE = 5000
+
+# Seconds between chunks. A writer waiting on the lock sleeps in its busy
+# handler between attempts; without a gap the next chunk takes the lock
+# again before it wakes up.
+DEFAULT_PAUSE = 0.05
+
+Progress = namedtuple("Progress", ["name", "done", "total", "seconds"])
+
+_CHECKPOINTS = """
+CREATE TABLE IF NOT EXISTS migration_checkpoints (
+    name TEXT PRIMARY KEY,
+    last_key INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    indexes TEXT
+)
+"""
+
+
+class MigrationError(Exception):
+    """Raised when a chunked migration can't run on the given connection or table"""
+
+
+def log_progress(progress):
+    """Default progress reporter: one log line per chunk"""
+    percent = 100 * progress.done / progress.total if progress.total else 100
+    logger.info("%s: %d/%d rows (%.0f%%) in %.1fs",
+                progress.name, progress.done, progress.total, percent, progress.seconds)
+
+
+def _raw(conn):
+    """The sqlite3 connection behind an autocommit SQLAlchemy connection"""
+    if conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+        raise MigrationError(
+            "Chunked migrations commit as they go; run them inside op.get_context().autocommit_block()"
+        )
+    raw = conn.connection.dbapi_connection
+    if raw.in_transaction:
+        raise MigrationError("Chunked migrations can't run inside an open transaction")
+    return raw
+
+
+def _checkpoint(raw, name):
+    raw.execute(_CHECKPOINTS)
+    row = raw.execute("SELECT last_key, done, indexes FROM migration_checkpoints WHERE name = ?", (name,)).fetchone()
+    return row if row else (None, 0, None)
+
+
+def _finish(raw, name):
+    raw.execute("DELETE FROM migration_checkpoints WHERE name = ?", (name,))
+    if raw.execute("SELECT count(*) FROM migration_checkpoints").fetchone()[0] == 0:
+        raw.execute("DROP TABLE migration_checkpoints")
+
+
+def _chunks(raw, name, table, key, chunk_size, pause, progress, apply, finish=True):
+    """
+    Call apply(low, high) for consecutive key ranges low < key <= high,
+    committing each range with its checkpoint. The checkpoint is removed
+    at the end unless `finish` is false. Returns the number of rows
+    apply() reports changing in this run.
+    """
+    last_key, done, _ = _checkpoint(raw, name)
+    low = last_key if last_key is not None else -1 << 63
+    total = done + raw.execute(f"SELECT count(*) FROM {table} WHERE {key} > ?", (low,)).fetchone()[0]
+    bound = f"SELECT max({key}) FROM (SELECT {key} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?)"
+    start = time.perf_counter()
+    changed = 0
+    while True:
+        raw.execute("BEGIN IMMEDIATE")
+        try:
+            high = raw.execute(bound, (low, chunk_size)).fetchone()[0]
+            if high is None:
+                if finish:
+                    _finish(raw, name)
+                raw.execute("COMMIT")
+                return changed
+            scanned = raw.execute(f"SELECT count(*) FROM {table} WHERE {key} > ? AND {key} <= ?",
+                                  (low, high)).fetchone()[0]
+            changed += apply(low, high)
+            done += scanned
+            raw.execute(
+                "INSERT INTO migration_checkpoints (name, last_key, done) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET last_key = excluded.last_key, done = excluded.done",
+                (name, high, done),
+            )
+            raw.execute("COMMIT")
+        except BaseException:
+            if raw.in_transaction:
+                raw.execute("ROLLBACK")
+            raise
+        low = high
+        if progress:
+            progress(Progress(name, done, max(total, done), time.perf_counter() - start))
+        if pause:
+            time.sleep(pause)
+
+
+def backfill(conn, table, set_sql=None, transform=None, columns=(), where=None, name=None,
+             key="id", chunk_size=DEFAULT_CHUNK_SIZE, pause=DEFAULT_PAUSE, progress=log_progress):
+    """
+    Update every row of `table` in primary-key chunks.
+
+    Either `set_sql` is an SQL SET clause ("unit = lower(unit)"), or
+    `transform` is a Python function that receives a dict of the row's
+    `columns` and returns a dict of new values, or None to leave the row
+    alone. `where` limits the update to matching rows. `name` identifies
+    the checkpoint and defaults to "backfill <table>". `pause` seconds
+    pass between chunks. Returns the number of rows updated.
+    """
+    if (set_sql is None) == (transform is None):
+        raise ValueError("Give exactly one of set_sql and transform")
+    raw = _raw(conn)
+    condition = f" AND ({where})" if where else ""
+
+    if set_sql is not None:
+        statement = f"UPDATE {table} SET {set_sql} WHERE {key} > ? AND {key} <= ?{condition}"
+
+        def apply(low, high):
+            return raw.execute(statement, (low, high)).rowcount
+    else:
+        columns = list(columns)
+        select = (f"SELECT {', '.join([key] + columns)} FROM {table} "
+                  f"WHERE {key} > ? AND {key} <= ?{condition}")
+
+        def apply(low, high):
+            changed = 0
+            for row in raw.execute(select, (low, high)).fetchall():
+                values = transform(dict(zip(columns, row[1:])))
+                if values:
+                    assignments = ", ".join(f"{column} = ?" for column in values)
+                    raw.execute(f"UPDATE {table} SET {assignments} WHERE {key} = ?", (*values.values(), row[0]))
+                    changed += 1
+            return changed
+
+    return _chunks(raw, name or f"backfill {table}", table, key, chunk_size, pause, progress, apply)
+
+
+def _copied_columns(raw, table):
+    """Stored columns of a table; generated columns can't be inserted into"""
+    return [name for _, name, _, _, _, _, hidden in raw.execute(f"PRAGMA table_xinfo({table})") if hidden == 0]
+
+
+def _mirror_triggers(table, shadow, columns, key):
+    """Triggers that copy writes made during the rebuild into the shadow table"""
+    names = ", ".join(columns)
+    values = ", ".join(f"NEW.{column}" for column in columns)
+    upsert = f"INSERT OR REPLACE INTO {shadow} ({names}) VALUES ({values})"
+    remove = f"DELETE FROM {shadow} WHERE {key} = OLD.{key}"
+    return {
+        f"{shadow}_insert": f"AFTER INSERT ON {table} BEGIN {upsert}; END",
+        f"{shadow}_update": f"AFTER UPDATE ON {table} BEGIN {remove}; {upsert}; END",
+        f"{shadow}_delete": f"AFTER DELETE ON {table} BEGIN {remove}; END",
+    }
+
+
+def rebuild_table(conn, table, alter, name=None, key="id", chunk_size=DEFAULT_CHUNK_SIZE, pause=DEFAULT_PAUSE,
+                  progress=log_progress):
+    """
+    Apply batch_alter_table changes to a large table with short locks.
+
+    `alter(batch_op)` makes the changes, as in a `with
+    op.batch_alter_table(...) as batch_op:` block. It is applied to an
+    empty copy of the table, so Alembic's own copy-and-swap costs nothing.
+    The rows are then copied across in chunks while triggers mirror any
+    concurrent writes. One short transaction then drops the original and
+    renames the copy into place, with the table's triggers and unique
+    indexes. The other indexes are built afterwards, one per transaction.
+
+    Columns are copied by name. Columns the new table adds get their
+    defaults, and indexes on dropped columns are not recreated.
+    """
+    raw = _raw(conn)
+    name = name or f"rebuild {table}"
+    shadow = f"_rebuild_{table}"
+    last_key, _, indexes = _checkpoint(raw, name)
+    if indexes is None:
+        _copy_and_swap(conn, raw, name, table, shadow, last_key, alter, key, chunk_size, pause, progress)
+    _build_indexes(raw, name, pause)
+
+
+def _copy_and_swap(conn, raw, name, table, shadow, last_key, alter, key, chunk_size, pause, progress):
+    columns = _copied_columns(raw, table)
+    if not columns:
+        raise MigrationError(f"No such table: {table}")
+    if len(columns) < len(list(raw.execute(f"PRAGMA table_xinfo({table})"))):
+        raise MigrationError(f"{table} has generated columns, which batch mode can't copy; use ALTER TABLE")
+
+    if last_key is None:
+        # Fresh start, or interrupted before any rows were copied
+        create = raw.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+        raw.execute(f"DROP TABLE IF EXISTS {shadow}")
+        raw.execute(re.sub(r"^CREATE TABLE\s+(\"[^\"]+\"|\[[^\]]+\]|\S+)", f"CREATE TABLE {shadow}", create))
+        with Operations(MigrationContext.configure(conn)).batch_alter_table(shadow, recreate="always") as batch:
+            alter(batch)
+    kept = [column for column in columns if column in _copied_columns(raw, shadow)]
+
+    raw.execute("BEGIN IMMEDIATE")
+    for trigger, body in _mirror_triggers(table, shadow, kept, key).items():
+        raw.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger} {body}")
+    raw.execute("COMMIT")
+
+    copy = (f"INSERT OR REPLACE INTO {shadow} ({', '.join(kept)}) "
+            f"SELECT {', '.join(kept)} FROM {table} WHERE {key} > ? AND {key} <= ?")
+    _chunks(raw, name, table, key, chunk_size, pause, progress,
+            lambda low, high: raw.execute(copy, (low, high)).rowcount, finish=False)
+    _swap(raw, name, table, shadow)
+
+
+def _swap(raw, name, table, shadow):
+    """
+    Replace `table` by its shadow copy in one transaction, recording the
+    indexes still to be built in the checkpoint.
+    """
+    remaining = set(_copied_columns(raw, shadow))
+    unique, deferred = [], []
+    for index, sql in raw.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)):
+        if {row[2] for row in raw.execute(f"PRAGMA index_info({index})")} - {None} <= remaining:
+            # Unique indexes enforce constraints, so they can't wait
+            (unique if sql.upper().startswith("CREATE UNIQUE") else deferred).append(sql)
+    triggers = [
+        sql for trigger, sql in raw.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,))
+        if not trigger.startswith(shadow)
+    ]
+    # Dropping the old table must not cascade into other tables, and the
+    # rename must not check triggers on other tables that refer to it
+    foreign_keys = raw.execute("PRAGMA foreign_keys").fetchone()[0]
+    raw.execute("PRAGMA foreign_keys = OFF")
+    raw.execute("PRAGMA legacy_alter_table = ON")
+    raw.execute("BEGIN IMMEDIATE")
+    try:
+        raw.execute(f"DROP TABLE {table}")
+        raw.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+        for sql in unique + triggers:
+            raw.execute(sql)
+        raw.execute("INSERT INTO migration_checkpoints (name, indexes) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET indexes = excluded.indexes", (name, json.dumps(deferred)))
+        raw.execute("COMMIT")
+    except BaseException:
+        raw.execute("ROLLBACK")
+        raise
+    finally:
+        raw.execute("PRAGMA legacy_alter_table = OFF")
+        raw.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+
+
+def _build_indexes(raw, name, pause):
+    """Create the indexes left by _swap(), each in its own transaction, then clear the checkpoint"""
+    while True:
+        raw.execute("BEGIN IMMEDIATE")
+        try:
+            indexes = json.loads(raw.execute(
+                "SELECT indexes FROM migration_checkpoints WHERE name = ?", (name,)).fetchone()[0])
+            if not indexes:
+                _finish(raw, name)
+                raw.execute("COMMIT")
+                return
+            raw.execute(indexes[0])
+            raw.execute("UPDATE migration_checkpoints SET indexes = ? WHERE name = ?", (json.dumps(indexes[1:]), name))
+            raw.execute("COMMIT")
+        except BaseException:
+            if raw.in_transaction:
+                raw.execute("ROLLBACK")
+            raise
+        if pause:
+            time.sleep(pause)
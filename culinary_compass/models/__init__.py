@@ -1,8 +1,14 @@
-from .base import Base, Session, engine
+from .base import Base, Session, engine, configure_sqlite
 from .recipe import Recipe
 from .ingredient import Ingredient
 from .recipe_ingredient import RecipeIngredient
 from .category import Category
+from .history import RecipeHistory, RecipeVersion, text_blobs
+from .tag import Tag, recipe_tags
+from .nutrition import IngredientNutrient, recipe_nutrition
+from .substitution import IngredientSubstitute, substitute_closure, substitute_closure_state
+from .revision import TRACKED_TABLES, sync_state, sync_tombstones
+from .writes import is_busy_error, retry_writes, write_stats
 
 def create_tables():
     Base.metadata.create_all(engine)
\ No newline at end of file
@@ -1,10 +1,52 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+# How long SQLite itself waits on a locked database before reporting it busy,
+# in write (BEGIN IMMEDIATE) transactions. Kept short so longer waits go
+# through the jittered backoff in models/writes.py
+BUSY_TIMEOUT_MS = 100
+
+# The same for read transactions, which have no retry around them. Readers
+# only wait while a writer commits, so this is rarely reached
+READ_BUSY_TIMEOUT_MS = 5000
+
+
+def configure_sqlite(engine):
+    """
+    Let transactions choose their SQLite BEGIN mode.
+
+    pysqlite normally opens transactions itself with a plain (deferred)
+    BEGIN. Here that is switched off and BEGIN is emitted explicitly, so a
+    connection with the `sqlite_begin="IMMEDIATE"` execution option takes
+    the write lock up front instead of failing to upgrade it mid-transaction.
+
+    Write transactions wait BUSY_TIMEOUT_MS for the lock and leave the rest
+    to retry_writes; other transactions wait READ_BUSY_TIMEOUT_MS.
+    """
+    def set_busy_timeout(dbapi_connection, info, timeout):
+        if info.get("busy_timeout") != timeout:
+            dbapi_connection.execute(f"PRAGMA busy_timeout = {timeout}")
+            info["busy_timeout"] = timeout
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        set_busy_timeout(dbapi_connection, connection_record.info, READ_BUSY_TIMEOUT_MS)
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection):
+        mode = connection.get_execution_options().get("sqlite_begin", "")
+        timeout = BUSY_TIMEOUT_MS if mode.upper() in ("IMMEDIATE", "EXCLUSIVE") else READ_BUSY_TIMEOUT_MS
+        set_busy_timeout(connection.connection.dbapi_connection, connection.connection.info, timeout)
+        connection.exec_driver_sql(f"BEGIN {mode}".strip())
+
+    return engine
+
+
 # Create a SQLite database engine
 # This will store all our recipe data in a local file called culinary_compass.db
-engine = create_engine('sqlite:///culinary_compass.db')
+engine = configure_sqlite(create_engine('sqlite:///culinary_compass.db'))
 
 # Create a session factory bound to our engine
 # Sessions are used to interact with the database
@@ -12,4 +54,16 @@ Session = sessionmaker(bind=engine)
 
 # Create a base class for our models
 # All our model classes will inherit from this base
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def created_tables(kw):
+    """
+    Names of the tables a metadata `after_create` event is for.
+
+    create_all() skips tables that already exist, so listeners that seed rows
+    or install triggers check this and leave existing databases untouched:
+    every CLI run calls create_all(), and writing there would make read-only
+    commands wait for, and fail on, another process's write lock.
+    """
+    return {table.name for table in kw.get("tables", ())}
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
 from .base import Base
+from .writes import retry_writes
 
 class Category(Base):
     __tablename__ = 'categories'
@@ -9,6 +10,9 @@ class Category(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
 
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
+
     # Relationship with Recipe
     recipes = relationship("Recipe", back_populates="category")
 
@@ -16,6 +20,7 @@ class Category(Base):
         return f"<Category(id={self.id}, name='{self.name}')>"
 
     @classmethod
+    @retry_writes
     def create(cls, session, **kwargs):
         category = cls(**kwargs)
         session.add(category)
@@ -35,6 +40,7 @@ class Category(Base):
         return session.query(cls).filter_by(name=name).first()
 
     @classmethod
+    @retry_writes
     def update(cls, session, id, **kwargs):
         category = cls.get_by_id(session, id)
         if category:
@@ -44,6 +50,7 @@ class Category(Base):
         return category
 
     @classmethod
+    @retry_writes
     def delete(cls, session, id):
         category = cls.get_by_id(session, id)
         if category:
@@ -0,0 +1,202 @@
+"""
+Recipe edit history.
+
+Before a recipe is changed, its current state is saved as a RecipeHistory
+row. Scalar fields are copied into the row; the description, instructions
+and ingredient-line set are stored as text blobs addressed by the SHA-256
+of their content, zlib-compressed. A version refers to its blobs by hash,
+so text that several versions share (usually everything except the one
+field that was edited) is stored once.
+
+Saving, loading and reverting a version each take a fixed number of
+queries, whatever the length of the history or the number of lines.
+History is local to a database and isn't part of delta sync.
+"""
+import hashlib
+import json
+import time
+import zlib
+from collections import namedtuple
+
+from sqlalchemy import Column, Integer, String, Float, LargeBinary, ForeignKey, Index, Table, delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import aliased, relationship
+
+from .base import Base
+from .writes import retry_writes
+from .ingredient import Ingredient
+from .recipe import Recipe
+from .recipe_ingredient import RecipeIngredient
+
+# Content-addressed text: hash is the SHA-256 of the UTF-8 text, data its
+# zlib-compressed bytes and size the uncompressed length
+text_blobs = Table(
+    'text_blobs',
+    Base.metadata,
+    Column('hash', String(64), primary_key=True),
+    Column('data', LargeBinary, nullable=False),
+    Column('size', Integer, nullable=False),
+    sqlite_with_rowid=False,
+)
+
+# Recipe columns copied into each version as they are
+SCALAR_FIELDS = ["name", "prep_time", "cook_time", "serving_size", "category_id"]
+
+# Recipe text columns stored as blobs
+TEXT_FIELDS = ["description", "instructions"]
+
+# A saved version with its text and lines loaded; lines are (ingredient_id, quantity, unit)
+RecipeVersion = namedtuple("RecipeVersion", ["id", "recipe_id", "created_at"] + SCALAR_FIELDS + TEXT_FIELDS + ["lines"])
+
+# Result of a revert: the version restored, and the lines left out because
+# their ingredient no longer exists
+Revert = namedtuple("Revert", ["version", "lines", "skipped"])
+
+
+def blob_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _lines_text(lines):
+    """Canonical text for a line set, so the same lines always hash alike"""
+    return json.dumps(sorted([ingredient_id, quantity, unit or ""] for ingredient_id, quantity, unit in lines),
+                      separators=(",", ":"))
+
+
+def _load_text(data):
+    return None if data is None else zlib.decompress(data).decode("utf-8")
+
+
+class RecipeHistory(Base):
+    """One saved version of a recipe, taken just before it was changed"""
+    __tablename__ = 'recipe_history'
+
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey('recipes.id'), nullable=False)
+    created_at = Column(Float, nullable=False)
+
+    name = Column(String(100), nullable=False)
+    prep_time = Column(Integer)
+    cook_time = Column(Integer)
+    serving_size = Column(Integer)
+    category_id = Column(Integer)
+
+    # Hashes into text_blobs; NULL when the text was NULL
+    description_hash = Column(String(64), ForeignKey('text_blobs.hash'))
+    instructions_hash = Column(String(64), ForeignKey('text_blobs.hash'))
+    lines_hash = Column(String(64), ForeignKey('text_blobs.hash'), nullable=False)
+
+    recipe = relationship("Recipe", back_populates="history")
+
+    __table_args__ = (
+        Index("ix_recipe_history_recipe_id_id", "recipe_id", "id"),
+    )
+
+    def __repr__(self):
+        return f"<RecipeHistory(id={self.id}, recipe_id={self.recipe_id}, name='{self.name}')>"
+
+    @classmethod
+    def record(cls, session, recipe_id):
+        """
+        Save the recipe's current stored state as a version, without committing.
+
+        Nothing is saved when that state matches the latest version. Returns
+        the new version's id, or None.
+        """
+        recipes = Recipe.__table__
+        row = session.execute(
+            select(*(recipes.c[field] for field in SCALAR_FIELDS + TEXT_FIELDS)).where(recipes.c.id == recipe_id)
+        ).first()
+        if row is None:
+            return None
+        lines = session.execute(
+            select(RecipeIngredient.ingredient_id, RecipeIngredient.quantity, RecipeIngredient.unit)
+            .where(RecipeIngredient.recipe_id == recipe_id)
+        ).all()
+
+        texts = {field: getattr(row, field) for field in TEXT_FIELDS}
+        texts["lines"] = _lines_text(lines)
+        hashes = {field: None if value is None else blob_hash(value) for field, value in texts.items()}
+        values = dict(
+            {field: getattr(row, field) for field in SCALAR_FIELDS},
+            **{f"{field}_hash": digest for field, digest in hashes.items()},
+        )
+
+        latest = session.execute(
+            select(*(cls.__table__.c[key] for key in values))
+            .where(cls.recipe_id == recipe_id).order_by(cls.id.desc()).limit(1)
+        ).first()
+        if latest is not None and latest._asdict() == values:
+            return None
+
+        blobs = {}
+        for field, value in texts.items():
+            if value is not None:
+                data = value.encode("utf-8")
+                blobs[hashes[field]] = {"hash": hashes[field], "data": zlib.compress(data), "size": len(data)}
+        session.execute(insert(text_blobs).on_conflict_do_nothing(index_elements=["hash"]), list(blobs.values()))
+        return session.execute(
+            insert(cls.__table__).values(recipe_id=recipe_id, created_at=time.time(), **values)
+        ).inserted_primary_key[0]
+
+    @classmethod
+    def get_for_recipe(cls, session, recipe_id):
+        """A recipe's versions, newest first, without loading any text"""
+        return session.query(cls).filter_by(recipe_id=recipe_id).order_by(cls.id.desc()).all()
+
+    @classmethod
+    def load(cls, session, recipe_id, version_id):
+        """Load one version of a recipe with its text and lines in a single query, or None"""
+        description, instructions, lines = aliased(text_blobs), aliased(text_blobs), aliased(text_blobs)
+        row = session.execute(
+            select(cls.id, cls.recipe_id, cls.created_at, *(getattr(cls, field) for field in SCALAR_FIELDS),
+                   description.c.data, instructions.c.data, lines.c.data)
+            .outerjoin(description, description.c.hash == cls.description_hash)
+            .outerjoin(instructions, instructions.c.hash == cls.instructions_hash)
+            .join(lines, lines.c.hash == cls.lines_hash)
+            .where(cls.id == version_id, cls.recipe_id == recipe_id)
+        ).first()
+        if row is None:
+            return None
+        *fields, description_data, instructions_data, lines_data = row
+        return RecipeVersion(
+            *fields,
+            _load_text(description_data),
+            _load_text(instructions_data),
+            [tuple(line) for line in json.loads(_load_text(lines_data))],
+        )
+
+    @classmethod
+    @retry_writes
+    def revert(cls, session, recipe_id, version_id):
+        """
+        Restore a recipe's fields and lines to a saved version, in one transaction.
+
+        The state being replaced is saved as a version first, so a revert can
+        be undone. Returns a Revert, or None when the version doesn't exist.
+        """
+        try:
+            version = cls.load(session, recipe_id, version_id)
+            if version is None:
+                return None
+            cls.record(session, recipe_id)
+
+            session.execute(
+                update(Recipe.__table__).where(Recipe.__table__.c.id == recipe_id)
+                .values({field: getattr(version, field) for field in SCALAR_FIELDS + TEXT_FIELDS})
+            )
+            existing = set(session.execute(
+                select(Ingredient.id).where(Ingredient.id.in_({line[0] for line in version.lines}))
+            ).scalars())
+            lines = [line for line in version.lines if line[0] in existing]
+            session.execute(delete(RecipeIngredient.__table__).where(RecipeIngredient.recipe_id == recipe_id))
+            if lines:
+                session.execute(RecipeIngredient.upsert_statement(), [
+                    {"recipe_id": recipe_id, "ingredient_id": ingredient_id, "quantity": quantity, "unit": unit or None}
+                    for ingredient_id, quantity, unit in lines
+                ])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return Revert(version, lines, len(version.lines) - len(lines))
@@ -1,7 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+import string
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, func, insert
 from sqlalchemy.orm import relationship
 
 from .base import Base
+from .writes import retry_writes
+from ..pricing import price_basis, recompute_costs
+
+# SQLite's lower() folds only ASCII letters; names are compared the same way in Python
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fold_name(name):
+    """An ingredient name in the form names are matched by (see Ingredient.get_or_create_many)"""
+    return name.translate(_ASCII_LOWER)
+
 
 class Ingredient(Base):
     __tablename__ = 'ingredients'
@@ -9,6 +22,17 @@ class Ingredient(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
 
+    # Price per `price_amount` of `price_unit`; set with set_price() so the
+    # derived dimension and base amount stay in step (see pricing.py)
+    price = Column(Float)
+    price_unit = Column(String(50))
+    price_amount = Column(Float)
+    price_dimension = Column(String(50))
+    price_base_amount = Column(Float)
+
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
+
     # Relationship with RecipeIngredient
     recipe_ingredients = relationship("RecipeIngredient", back_populates="ingredient", cascade="all, delete-orphan")
 
@@ -16,6 +40,7 @@ class Ingredient(Base):
         return f"<Ingredient(id={self.id}, name='{self.name}')>"
 
     @classmethod
+    @retry_writes
     def create(cls, session, **kwargs):
         ingredient = cls(**kwargs)
         session.add(ingredient)
@@ -35,6 +60,45 @@ class Ingredient(Base):
         return session.query(cls).filter_by(name=name).first()
 
     @classmethod
+    def get_or_create_many(cls, session, names):
+        """
+        Resolve many ingredient names to ids at once.
+
+        Looks every name up in one IN query and bulk-inserts the missing ones,
+        without committing, so it can be part of a larger transaction. Names
+        match regardless of (ASCII) case, so "Flour" and "flour" resolve to one
+        ingredient; a new ingredient is stored with the first spelling given.
+        Returns a dict mapping each name to its ingredient id.
+        """
+        names = list(dict.fromkeys(names))
+        ids = cls._ids_for_names(session, names)
+
+        missing = {}
+        for name in names:
+            if fold_name(name) not in ids:
+                missing.setdefault(fold_name(name), name)
+        if missing:
+            session.execute(insert(cls.__table__), [{"name": name} for name in missing.values()])
+            ids.update(cls._ids_for_names(session, list(missing.values())))
+        return {name: ids[fold_name(name)] for name in names}
+
+    @classmethod
+    def _ids_for_names(cls, session, names, chunk_size=900):
+        """
+        Map case-folded names to ids, querying in chunks to stay under SQLite's
+        bound parameter limit. Where spellings differ only in case, the oldest
+        ingredient wins.
+        """
+        ids = {}
+        folded = list({fold_name(name) for name in names})
+        for start in range(0, len(folded), chunk_size):
+            chunk = folded[start:start + chunk_size]
+            rows = session.query(cls.name, cls.id).filter(func.lower(cls.name).in_(chunk)).order_by(cls.id.desc())
+            ids.update((fold_name(name), id) for name, id in rows)
+        return ids
+
+    @classmethod
+    @retry_writes
     def update(cls, session, id, **kwargs):
         ingredient = cls.get_by_id(session, id)
         if ingredient:
@@ -44,6 +108,20 @@ class Ingredient(Base):
         return ingredient
 
     @classmethod
+    @retry_writes
+    def set_price(cls, session, id, price, unit='', amount=1.0):
+        """Set (or clear, with price None) an ingredient's price and recompute the recipes using it"""
+        ingredient = cls.get_by_id(session, id)
+        if ingredient:
+            for key, value in price_basis(price, unit, amount).items():
+                setattr(ingredient, key, value)
+            session.flush()
+            recompute_costs(session, [ingredient.id])
+            session.commit()
+        return ingredient
+
+    @classmethod
+    @retry_writes
     def delete(cls, session, id):
         ingredient = cls.get_by_id(session, id)
         if ingredient:
@@ -0,0 +1,139 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table, UniqueConstraint, event, text
+from sqlalchemy.orm import relationship
+
+from .base import Base, created_tables
+from .writes import retry_writes
+from ..units import unit_basis
+
+class IngredientNutrient(Base):
+    """
+    Nutrition facts for an ingredient, given per `amount` of `unit`
+    (for example per 100 g, per 1 cup, or per 1 egg when unit is empty).
+
+    An ingredient has at most one entry per dimension (mass, volume, count,
+    or an unconvertible unit such as clove), so every recipe line matches
+    at most one entry.
+    """
+    __tablename__ = 'ingredient_nutrients'
+
+    id = Column(Integer, primary_key=True)
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id', ondelete='CASCADE'), nullable=False)
+    unit = Column(String(50), nullable=False, default='')
+    amount = Column(Float, nullable=False, default=1.0)
+    kcal = Column(Float, nullable=False, default=0.0)
+    protein = Column(Float, nullable=False, default=0.0)  # grams
+    fat = Column(Float, nullable=False, default=0.0)  # grams
+    carbs = Column(Float, nullable=False, default=0.0)  # grams
+
+    # Derived from unit and amount when saved, so SQL can convert line quantities
+    dimension = Column(String(50), nullable=False)
+    base_amount = Column(Float, nullable=False)
+
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
+
+    ingredient = relationship("Ingredient")
+
+    __table_args__ = (
+        UniqueConstraint("ingredient_id", "dimension", name="uq_ingredient_nutrients_ingredient_dimension"),
+    )
+
+    def __repr__(self):
+        return f"<IngredientNutrient(ingredient_id={self.ingredient_id}, per={self.amount} {self.unit!r}, kcal={self.kcal})>"
+
+    @classmethod
+    @retry_writes
+    def set(cls, session, ingredient_id, unit='', amount=1.0, **values):
+        """Create or replace an ingredient's nutrition entry for the unit's dimension"""
+        dimension, factor = unit_basis(unit)
+        entry = session.query(cls).filter_by(ingredient_id=ingredient_id, dimension=dimension).first()
+        if entry is None:
+            entry = cls(ingredient_id=ingredient_id, dimension=dimension)
+            session.add(entry)
+        entry.unit = unit or ''
+        entry.amount = amount
+        entry.base_amount = amount * factor
+        for key in ("kcal", "protein", "fat", "carbs"):
+            setattr(entry, key, values.get(key, 0.0))
+        session.commit()
+        return entry
+
+    @classmethod
+    def get_for_ingredient(cls, session, ingredient_id):
+        return session.query(cls).filter_by(ingredient_id=ingredient_id).order_by(cls.dimension).all()
+
+    @classmethod
+    @retry_writes
+    def delete(cls, session, id):
+        entry = session.query(cls).filter_by(id=id).first()
+        if entry:
+            session.delete(entry)
+            session.commit()
+            return True
+        return False
+
+# Computed nutrition totals per recipe. A row is deleted by the triggers
+# below whenever its inputs change and recomputed on demand
+# (see culinary_compass/nutrition.py)
+recipe_nutrition = Table(
+    'recipe_nutrition',
+    Base.metadata,
+    Column('recipe_id', Integer, ForeignKey('recipes.id', ondelete='CASCADE'), primary_key=True),
+    Column('kcal', Float, nullable=False),
+    Column('protein', Float, nullable=False),
+    Column('fat', Float, nullable=False),
+    Column('carbs', Float, nullable=False),
+    Column('lines', Integer, nullable=False),
+    Column('matched_lines', Integer, nullable=False),
+)
+
+
+def invalidation_statements():
+    """
+    SQL for the triggers that drop cached recipe_nutrition rows when a
+    recipe's lines, or nutrition facts for one of its ingredients, change,
+    and that delete an ingredient's facts along with it. Revision-only
+    updates made by the sync triggers are ignored.
+    """
+    drop = "DELETE FROM recipe_nutrition WHERE recipe_id = {}"
+    drop_users = (
+        "DELETE FROM recipe_nutrition WHERE recipe_id IN "
+        "(SELECT recipe_id FROM recipe_ingredients WHERE ingredient_id = {})"
+    )
+    line_changed = " OR ".join(
+        f"NEW.{column} IS NOT OLD.{column}" for column in ("recipe_id", "ingredient_id", "quantity", "unit")
+    )
+    facts_changed = " OR ".join(
+        f"NEW.{column} IS NOT OLD.{column}"
+        for column in ("ingredient_id", "dimension", "base_amount", "kcal", "protein", "fat", "carbs")
+    )
+    return [
+        "CREATE TRIGGER IF NOT EXISTS recipe_ingredients_nutrition_insert AFTER INSERT ON recipe_ingredients "
+        f"BEGIN {drop.format('NEW.recipe_id')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS recipe_ingredients_nutrition_update AFTER UPDATE ON recipe_ingredients "
+        f"WHEN {line_changed} "
+        f"BEGIN {drop.format('OLD.recipe_id')}; {drop.format('NEW.recipe_id')}; END",
+        "CREATE TRIGGER IF NOT EXISTS recipe_ingredients_nutrition_delete AFTER DELETE ON recipe_ingredients "
+        f"BEGIN {drop.format('OLD.recipe_id')}; END",
+        "CREATE TRIGGER IF NOT EXISTS recipes_nutrition_delete AFTER DELETE ON recipes "
+        f"BEGIN {drop.format('OLD.id')}; END",
+        "CREATE TRIGGER IF NOT EXISTS ingredient_nutrients_nutrition_insert AFTER INSERT ON ingredient_nutrients "
+        f"BEGIN {drop_users.format('NEW.ingredient_id')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS ingredient_nutrients_nutrition_update AFTER UPDATE ON ingredient_nutrients "
+        f"WHEN {facts_changed} "
+        f"BEGIN {drop_users.format('OLD.ingredient_id')}; {drop_users.format('NEW.ingredient_id')}; END",
+        "CREATE TRIGGER IF NOT EXISTS ingredient_nutrients_nutrition_delete AFTER DELETE ON ingredient_nutrients "
+        f"BEGIN {drop_users.format('OLD.ingredient_id')}; END",
+        # Otherwise the facts would pass to the next ingredient given the freed id
+        "CREATE TRIGGER IF NOT EXISTS ingredients_nutrition_delete AFTER DELETE ON ingredients "
+        f"BEGIN {drop_users.format('OLD.id')}; DELETE FROM ingredient_nutrients WHERE ingredient_id = OLD.id; END",
+    ]
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _create_nutrition_triggers(target, connection, **kw):
+    """Install the invalidation triggers when the cache table is created"""
+    if 'recipe_nutrition' not in created_tables(kw):
+        return
+    for statement in invalidation_statements():
+        connection.execute(text(statement))
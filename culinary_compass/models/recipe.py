@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Computed, Index, event, text
+from sqlalchemy.orm import relationship, deferred, undefer_group
 
-from .base import Base
+from .base import Base, created_tables
+from .writes import retry_writes
+from .types import CompressedText
 
 class Recipe(Base):
     """
@@ -16,11 +18,26 @@ class Recipe(Base):
     # Primary key and basic recipe information
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
-    description = Column(Text)
+    # Long text columns are deferred so listings don't load them
+    # Use undefer_group("text") (or get_by_id(..., with_text=True)) in detail views
+    description = deferred(Column(CompressedText()), group="text")
     prep_time = Column(Integer)  # in minutes
     cook_time = Column(Integer)  # in minutes
     serving_size = Column(Integer)
-    instructions = Column(Text)
+    instructions = deferred(Column(CompressedText()), group="text")
+
+    # Generated column so time-budget queries ("under 30 minutes, fastest first")
+    # can range-scan an index instead of computing prep + cook per row
+    total_time = Column(Integer, Computed("coalesce(prep_time, 0) + coalesce(cook_time, 0)"))
+
+    # Sum of the priced lines' costs, NULL when none is priced. Written by
+    # pricing.py; triggers set cost_stale when the recipe's lines change
+    cost = Column(Float)
+    cost_stale = Column(Boolean, nullable=False, default=True, server_default=text("1"))
+    cost_per_serving = Column(Float, Computed("cost / coalesce(nullif(serving_size, 0), 1)"))
+
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
 
     # One-to-many relationship with RecipeIngredient
     # This allows a recipe to have multiple ingredients with specific quantities
@@ -28,14 +45,31 @@ class Recipe(Base):
 
     # Many-to-one relationship with Category
     # Each recipe can belong to one category
-    category_id = Column(Integer, ForeignKey('categories.id'))
+    category_id = Column(Integer, ForeignKey('categories.id'), index=True)
     category = relationship("Category", back_populates="recipes")
 
+    # Many-to-many relationship with Tag
+    # A recipe can carry any number of tags (vegan, quick, holiday, ...)
+    tags = relationship("Tag", secondary="recipe_tags", back_populates="recipes")
+
+    # Saved versions, one per change made through update() (see history.py)
+    history = relationship("RecipeHistory", back_populates="recipe", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_recipes_total_time", "total_time"),
+        Index("ix_recipes_category_id_total_time", "category_id", "total_time"),
+        Index("ix_recipes_cost", "cost"),
+        Index("ix_recipes_cost_per_serving", "cost_per_serving"),
+        # Only stale rows are indexed, so finding them stays cheap
+        Index("ix_recipes_cost_stale", "cost_stale", sqlite_where=text("cost_stale = 1")),
+    )
+
     def __repr__(self):
         """String representation of the Recipe object"""
         return f"<Recipe(id={self.id}, name='{self.name}')>"
 
     @classmethod
+    @retry_writes
     def create(cls, session, **kwargs):
         """Create a new recipe in the database"""
         recipe = cls(**kwargs)
@@ -49,21 +83,50 @@ class Recipe(Base):
         return session.query(cls).all()
 
     @classmethod
-    def get_by_id(cls, session, id):
-        """Retrieve a specific recipe by its ID"""
-        return session.query(cls).filter_by(id=id).first()
+    def get_by_id(cls, session, id, with_text=False):
+        """Retrieve a specific recipe by its ID, optionally loading the long text columns up front"""
+        query = session.query(cls)
+        if with_text:
+            query = query.options(undefer_group("text"))
+        return query.filter_by(id=id).first()
 
     @classmethod
+    @retry_writes
     def update(cls, session, id, **kwargs):
-        """Update an existing recipe with new values"""
+        """Update an existing recipe with new values, saving its previous state to the history"""
+        from .history import RecipeHistory
+
         recipe = cls.get_by_id(session, id)
         if recipe:
+            if any(getattr(recipe, key) != value for key, value in kwargs.items()):
+                RecipeHistory.record(session, id)
             for key, value in kwargs.items():
                 setattr(recipe, key, value)
             session.commit()
         return recipe
 
     @classmethod
+    @retry_writes
+    def refresh_stale_costs(cls, session):
+        """Recompute the costs flagged stale, returning how many were updated"""
+        from ..pricing import refresh_costs
+
+        count = refresh_costs(session)
+        session.commit()
+        return count
+
+    @classmethod
+    @retry_writes
+    def refresh_stale_nutrition(cls, session):
+        """Store nutrition totals for the recipes that have none, returning how many were computed"""
+        from ..nutrition import refresh_nutrition
+
+        count = refresh_nutrition(session)
+        session.commit()
+        return count
+
+    @classmethod
+    @retry_writes
     def delete(cls, session, id):
         """Delete a recipe from the database"""
         recipe = cls.get_by_id(session, id)
@@ -71,4 +134,32 @@ class Recipe(Base):
             session.delete(recipe)
             session.commit()
             return True
-        return False
\ No newline at end of file
+        return False
+
+def cost_statements():
+    """
+    SQL for the triggers that mark a recipe's cost stale when its lines
+    change. Revision-only updates made by the sync triggers are ignored.
+    """
+    mark = "UPDATE recipes SET cost_stale = 1 WHERE id = {} AND cost_stale = 0"
+    line_changed = " OR ".join(
+        f"NEW.{column} IS NOT OLD.{column}" for column in ("recipe_id", "ingredient_id", "quantity", "unit")
+    )
+    return [
+        "CREATE TRIGGER IF NOT EXISTS recipe_ingredients_cost_insert AFTER INSERT ON recipe_ingredients "
+        f"BEGIN {mark.format('NEW.recipe_id')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS recipe_ingredients_cost_update AFTER UPDATE ON recipe_ingredients "
+        f"WHEN {line_changed} "
+        f"BEGIN {mark.format('OLD.recipe_id')}; {mark.format('NEW.recipe_id')}; END",
+        "CREATE TRIGGER IF NOT EXISTS recipe_ingredients_cost_delete AFTER DELETE ON recipe_ingredients "
+        f"BEGIN {mark.format('OLD.recipe_id')}; END",
+    ]
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _create_cost_triggers(target, connection, **kw):
+    """Install the cost triggers when the recipe tables are created"""
+    if not created_tables(kw) & {'recipes', 'recipe_ingredients'}:
+        return
+    for statement in cost_statements():
+        connection.execute(text(statement))
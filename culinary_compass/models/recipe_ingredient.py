@@ -1,36 +1,132 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, func, text
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import relationship
 
 from .base import Base
+from .writes import retry_writes
+from .ingredient import Ingredient, fold_name
 
 class RecipeIngredient(Base):
     __tablename__ = 'recipe_ingredients'
 
     id = Column(Integer, primary_key=True)
-    recipe_id = Column(Integer, ForeignKey('recipes.id'), nullable=False)
-    ingredient_id = Column(Integer, ForeignKey('ingredients.id'), nullable=False)
+    recipe_id = Column(Integer, ForeignKey('recipes.id'), nullable=False, index=True)
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id'), nullable=False, index=True)
     quantity = Column(Float, nullable=False)
     unit = Column(String(50))
 
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
+
     # Relationships
     recipe = relationship("Recipe", back_populates="ingredients")
     ingredient = relationship("Ingredient", back_populates="recipe_ingredients")
 
+    __table_args__ = (
+        # One line per ingredient and unit in a recipe. A unique index treats
+        # NULLs as distinct, so a missing unit is indexed as ''
+        Index("uq_recipe_ingredients_line", "recipe_id", "ingredient_id", func.coalesce(unit, text("''")),
+              unique=True),
+    )
+
     def __repr__(self):
         return f"<RecipeIngredient(recipe_id={self.recipe_id}, ingredient_id={self.ingredient_id}, quantity={self.quantity})>"
 
     @classmethod
+    def _line_key(cls):
+        """Columns and expression of uq_recipe_ingredients_line, as an ON CONFLICT target"""
+        return [cls.recipe_id, cls.ingredient_id, func.coalesce(cls.unit, text("''"))]
+
+    @classmethod
+    def upsert_statement(cls, accumulate=False):
+        """
+        INSERT ... ON CONFLICT DO UPDATE for recipe lines.
+
+        A line that already exists for the same recipe, ingredient and unit
+        has its quantity replaced, or added to with accumulate=True.
+        """
+        statement = insert(cls.__table__)
+        quantity = statement.excluded.quantity
+        if accumulate:
+            quantity = cls.__table__.c.quantity + quantity
+        return statement.on_conflict_do_update(index_elements=cls._line_key(), set_={"quantity": quantity})
+
+    @classmethod
+    @retry_writes
     def create(cls, session, **kwargs):
-        recipe_ingredient = cls(**kwargs)
-        session.add(recipe_ingredient)
+        """Add a line to a recipe, adding its quantity to the existing line for that ingredient and unit"""
+        recipe_ingredient = session.query(cls).filter(
+            cls.recipe_id == kwargs.get("recipe_id"),
+            cls.ingredient_id == kwargs.get("ingredient_id"),
+            func.coalesce(cls.unit, "") == (kwargs.get("unit") or ""),
+        ).first()
+        if recipe_ingredient:
+            recipe_ingredient.quantity += kwargs.get("quantity", 0)
+        else:
+            recipe_ingredient = cls(**kwargs)
+            session.add(recipe_ingredient)
         session.commit()
         return recipe_ingredient
 
+    @classmethod
+    def _write_lines(cls, session, recipe_id, lines, accumulate):
+        lines = list(lines)
+        if not lines:
+            return 0
+        try:
+            ingredient_ids = Ingredient.get_or_create_many(session, [name for _, _, name in lines])
+            session.execute(cls.upsert_statement(accumulate), [
+                {
+                    "recipe_id": recipe_id,
+                    "ingredient_id": ingredient_ids[name],
+                    "quantity": quantity,
+                    "unit": unit,
+                }
+                for quantity, unit, name in lines
+            ])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return len(lines)
+
+    @classmethod
+    @retry_writes
+    def create_many(cls, session, recipe_id, lines):
+        """
+        Add many (quantity, unit, ingredient name) lines to a recipe in one transaction.
+
+        Ingredient names are resolved with Ingredient.get_or_create_many and all
+        lines go in as a single bulk upsert, so the number of statements stays
+        the same whatever the number of lines. A line for an ingredient and unit
+        the recipe already has is added to that line's quantity. Returns the
+        number of lines given.
+        """
+        return cls._write_lines(session, recipe_id, lines, accumulate=True)
+
+    @classmethod
+    @retry_writes
+    def upsert_many(cls, session, recipe_id, lines):
+        """
+        Set many (quantity, unit, ingredient name) lines on a recipe in one statement.
+
+        Unlike create_many, a line the recipe already has takes the given
+        quantity, so ingesting the same lines again changes nothing. Repeats
+        within `lines`, including names differing only in case, are summed
+        first. Returns the number of distinct lines.
+        """
+        merged = {}
+        for quantity, unit, name in lines:
+            key = (unit or "", fold_name(name))
+            merged[key] = (merged[key][0] + quantity if key in merged else quantity, unit, name)
+        return cls._write_lines(session, recipe_id, merged.values(), accumulate=False)
+
     @classmethod
     def get_by_recipe_id(cls, session, recipe_id):
         return session.query(cls).filter_by(recipe_id=recipe_id).all()
 
     @classmethod
+    @retry_writes
     def delete(cls, session, id):
         recipe_ingredient = session.query(cls).filter_by(id=id).first()
         if recipe_ingredient:
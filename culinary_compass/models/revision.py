@@ -0,0 +1,72 @@
+from sqlalchemy import Column, Integer, String, Table, event, text
+
+from .base import Base, created_tables
+
+# Tables tracked for delta sync, with the columns that identify a row.
+# Listed parents first, which is the order changes are applied in.
+TRACKED_TABLES = {
+    'categories': ['id'],
+    'ingredients': ['id'],
+    'ingredient_nutrients': ['id'],
+    'ingredient_substitutes': ['id'],
+    'tags': ['id'],
+    'recipes': ['id'],
+    'recipe_ingredients': ['id'],
+    'recipe_tags': ['recipe_id', 'tag_id'],
+}
+
+# Single-row table holding the database-wide revision counter
+sync_state = Table(
+    'sync_state',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('revision', Integer, nullable=False, default=0),
+)
+
+# One row per deleted record, so deletes can be replayed on replicas
+sync_tombstones = Table(
+    'sync_tombstones',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('table_name', String(50), nullable=False),
+    Column('row_key', String(100), nullable=False),
+    Column('revision', Integer, nullable=False, index=True),
+)
+
+
+def trigger_statements(table, key_columns):
+    """
+    SQL for the triggers that keep a table's revision column current.
+
+    Every insert or update bumps the shared counter in sync_state and stamps
+    the row with it; every delete bumps it and records a tombstone. Triggers
+    cover ORM writes, bulk Core inserts and raw SQL alike.
+    """
+    bump = "UPDATE sync_state SET revision = revision + 1 WHERE id = 1;"
+    current = "(SELECT revision FROM sync_state WHERE id = 1)"
+    match = " AND ".join(f"{column} = NEW.{column}" for column in key_columns)
+    row_key = " || ',' || ".join(f"OLD.{column}" for column in key_columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_revision_insert AFTER INSERT ON {table} "
+        f"BEGIN {bump} UPDATE {table} SET revision = {current} WHERE {match}; END",
+        # Skip updates that set revision themselves, including the one above
+        f"CREATE TRIGGER IF NOT EXISTS {table}_revision_update AFTER UPDATE ON {table} "
+        f"WHEN NEW.revision IS OLD.revision "
+        f"BEGIN {bump} UPDATE {table} SET revision = {current} WHERE {match}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_revision_delete AFTER DELETE ON {table} "
+        f"BEGIN {bump} INSERT INTO sync_tombstones (table_name, row_key, revision) "
+        f"VALUES ('{table}', {row_key}, {current}); END",
+    ]
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _create_revision_triggers(target, connection, **kw):
+    """Seed the revision counter and install the triggers on newly created tables"""
+    created = created_tables(kw)
+    if 'sync_state' in created:
+        connection.execute(text("INSERT OR IGNORE INTO sync_state (id, revision) VALUES (1, 0)"))
+    for table, key_columns in TRACKED_TABLES.items():
+        if table not in created:
+            continue
+        for statement in trigger_statements(table, key_columns):
+            connection.execute(text(statement))
@@ -0,0 +1,145 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, Table, UniqueConstraint, event, text
+from sqlalchemy.orm import relationship
+
+from .base import Base, created_tables
+from .writes import retry_writes
+
+class IngredientSubstitute(Base):
+    """
+    A substitution edge: `ratio` units of the substitute replace one unit of
+    the ingredient (for example 1 cup milk, plus the `note`'s tablespoon of
+    lemon juice, for 1 cup buttermilk).
+
+    Edges chain: if buttermilk can be replaced by milk and milk by oat milk,
+    oat milk substitutes buttermilk too. The transitive pairs are kept in
+    substitute_closure (see substitutes.py).
+    """
+    __tablename__ = 'ingredient_substitutes'
+
+    id = Column(Integer, primary_key=True)
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id', ondelete='CASCADE'), nullable=False)
+    substitute_id = Column(Integer, ForeignKey('ingredients.id', ondelete='CASCADE'), nullable=False)
+    ratio = Column(Float, nullable=False, default=1.0)
+    note = Column(String(200))
+
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
+
+    ingredient = relationship("Ingredient", foreign_keys=[ingredient_id])
+    substitute = relationship("Ingredient", foreign_keys=[substitute_id])
+
+    __table_args__ = (
+        UniqueConstraint("ingredient_id", "substitute_id", name="uq_ingredient_substitutes_pair"),
+    )
+
+    def __repr__(self):
+        return f"<IngredientSubstitute(ingredient_id={self.ingredient_id}, substitute_id={self.substitute_id}, ratio={self.ratio})>"
+
+    @classmethod
+    @retry_writes
+    def add(cls, session, ingredient_id, substitute_id, ratio=1.0, note=None):
+        """Add a substitution edge, or change the ratio and note of an existing one"""
+        if ingredient_id == substitute_id:
+            raise ValueError("An ingredient can't substitute itself")
+        edge = session.query(cls).filter_by(ingredient_id=ingredient_id, substitute_id=substitute_id).first()
+        if edge is None:
+            edge = cls(ingredient_id=ingredient_id, substitute_id=substitute_id)
+            session.add(edge)
+        edge.ratio = ratio
+        edge.note = note
+        session.commit()
+        return edge
+
+    @classmethod
+    def get_for_ingredient(cls, session, ingredient_id):
+        """Direct substitution edges out of an ingredient"""
+        return session.query(cls).filter_by(ingredient_id=ingredient_id).order_by(cls.id).all()
+
+    @classmethod
+    @retry_writes
+    def remove(cls, session, ingredient_id, substitute_id):
+        edge = session.query(cls).filter_by(ingredient_id=ingredient_id, substitute_id=substitute_id).first()
+        if edge:
+            session.delete(edge)
+            session.commit()
+            return True
+        return False
+
+    @classmethod
+    @retry_writes
+    def refresh_stale_closure(cls, session):
+        """Rebuild the closure if an edge was removed or changed, returning True if it was rebuilt"""
+        from ..substitutes import refresh_closure
+
+        rebuilt = refresh_closure(session)
+        session.commit()
+        return rebuilt
+
+# Transitive closure of the substitution edges: every (ingredient, substitute)
+# pair connected by a path, with the ratio along the shortest path
+substitute_closure = Table(
+    'substitute_closure',
+    Base.metadata,
+    Column('ingredient_id', Integer, primary_key=True),
+    Column('substitute_id', Integer, primary_key=True),
+    Column('ratio', Float, nullable=False),
+    Column('hops', Integer, nullable=False),
+    Index('ix_substitute_closure_substitute_id', 'substitute_id'),
+)
+
+# Single-row flag set when an edge is removed or changed; the closure is then
+# rebuilt before its next use
+substitute_closure_state = Table(
+    'substitute_closure_state',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('stale', Integer, nullable=False, default=0),
+)
+
+# Adding edge a -> b connects everything that reaches a (and a itself) to
+# everything b reaches (and b itself). Existing pairs keep the shorter path.
+EXTEND_CLOSURE_SQL = """
+INSERT INTO substitute_closure (ingredient_id, substitute_id, ratio, hops)
+SELECT x.ingredient_id, y.substitute_id, x.ratio * {ratio} * y.ratio, x.hops + 1 + y.hops
+FROM (SELECT ingredient_id, ratio, hops FROM substitute_closure WHERE substitute_id = {a}
+      UNION ALL SELECT {a}, 1.0, 0) AS x,
+     (SELECT substitute_id, ratio, hops FROM substitute_closure WHERE ingredient_id = {b}
+      UNION ALL SELECT {b}, 1.0, 0) AS y
+WHERE x.ingredient_id != y.substitute_id
+ON CONFLICT (ingredient_id, substitute_id) DO UPDATE
+SET ratio = excluded.ratio, hops = excluded.hops
+WHERE excluded.hops < substitute_closure.hops
+"""
+
+
+def closure_statements():
+    """
+    SQL for the triggers that maintain substitute_closure: new edges extend
+    it in place, removed or changed edges mark it stale, and deleting an
+    ingredient removes its edges. Revision-only updates are ignored.
+    """
+    mark_stale = "UPDATE substitute_closure_state SET stale = 1 WHERE id = 1"
+    edge_changed = " OR ".join(
+        f"NEW.{column} IS NOT OLD.{column}" for column in ("ingredient_id", "substitute_id", "ratio")
+    )
+    extend = EXTEND_CLOSURE_SQL.format(a="NEW.ingredient_id", b="NEW.substitute_id", ratio="NEW.ratio").strip()
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS ingredient_substitutes_closure_insert AFTER INSERT ON ingredient_substitutes "
+        f"BEGIN {extend}; END",
+        f"CREATE TRIGGER IF NOT EXISTS ingredient_substitutes_closure_update AFTER UPDATE ON ingredient_substitutes "
+        f"WHEN {edge_changed} BEGIN {mark_stale}; END",
+        f"CREATE TRIGGER IF NOT EXISTS ingredient_substitutes_closure_delete AFTER DELETE ON ingredient_substitutes "
+        f"BEGIN {mark_stale}; END",
+        "CREATE TRIGGER IF NOT EXISTS ingredients_substitutes_delete AFTER DELETE ON ingredients "
+        "BEGIN DELETE FROM ingredient_substitutes WHERE ingredient_id = OLD.id OR substitute_id = OLD.id; END",
+    ]
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _create_closure_triggers(target, connection, **kw):
+    """Seed the closure state and install the closure triggers when the closure tables are created"""
+    if 'substitute_closure_state' not in created_tables(kw):
+        return
+    connection.execute(text("INSERT OR IGNORE INTO substitute_closure_state (id, stale) VALUES (1, 0)"))
+    for statement in closure_statements():
+        connection.execute(text(statement))
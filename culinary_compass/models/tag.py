@@ -0,0 +1,83 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, func
+from sqlalchemy.orm import relationship
+
+from .base import Base
+from .writes import retry_writes
+
+# Association table linking recipes to any number of tags
+recipe_tags = Table(
+    'recipe_tags',
+    Base.metadata,
+    Column('recipe_id', Integer, ForeignKey('recipes.id', ondelete='CASCADE'), primary_key=True),
+    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True, index=True),
+    Column('revision', Integer, index=True),
+)
+
+class Tag(Base):
+    """
+    Tag model for free-form recipe labels such as vegan, quick or holiday.
+
+    Unlike categories, a recipe can carry any number of tags.
+    """
+    __tablename__ = 'tags'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+    # Set by database triggers on every write, used for delta sync
+    revision = Column(Integer, index=True)
+
+    # Many-to-many relationship with Recipe through recipe_tags
+    recipes = relationship("Recipe", secondary=recipe_tags, back_populates="tags")
+
+    def __repr__(self):
+        return f"<Tag(id={self.id}, name='{self.name}')>"
+
+    @classmethod
+    @retry_writes
+    def create(cls, session, **kwargs):
+        tag = cls(**kwargs)
+        session.add(tag)
+        session.commit()
+        return tag
+
+    @classmethod
+    def get_all(cls, session):
+        return session.query(cls).all()
+
+    @classmethod
+    def get_by_id(cls, session, id):
+        return session.query(cls).filter_by(id=id).first()
+
+    @classmethod
+    def get_by_name(cls, session, name):
+        return session.query(cls).filter_by(name=name).first()
+
+    @classmethod
+    @retry_writes
+    def get_or_create(cls, session, name):
+        """Return the tag with this name (ignoring case), creating it if needed"""
+        tag = session.query(cls).filter(func.lower(cls.name) == name.lower()).first()
+        if not tag:
+            tag = cls.create(session, name=name)
+        return tag
+
+    @classmethod
+    @retry_writes
+    def update(cls, session, id, **kwargs):
+        tag = cls.get_by_id(session, id)
+        if tag:
+            for key, value in kwargs.items():
+                setattr(tag, key, value)
+            session.commit()
+        return tag
+
+    @classmethod
+    @retry_writes
+    def delete(cls, session, id):
+        tag = cls.get_by_id(session, id)
+        if tag:
+            session.delete(tag)
+            session.commit()
+            return True
+        return False
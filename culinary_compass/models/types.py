@@ -0,0 +1,46 @@
+import zlib
+
+from sqlalchemy.types import TypeDecorator, Text
+
+# Prefix marking values that were stored zlib-compressed
+# Plain text rows written before compression existed are returned unchanged
+COMPRESSED_PREFIX = b"zlib:"
+
+# Text shorter than this (in bytes) is stored as-is, compression isn't worth it
+COMPRESSION_THRESHOLD = 1024
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column that transparently zlib-compresses long values.
+
+    Values above the size threshold are stored as a BLOB with a small prefix,
+    everything else is stored as ordinary text. Reading always returns a str,
+    so callers never see the compressed form.
+    """
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, threshold=COMPRESSION_THRESHOLD, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        data = value.encode("utf-8")
+        if len(data) < self.threshold:
+            return value
+        return COMPRESSED_PREFIX + zlib.compress(data)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+def decompress_text(value):
+    """Turn a raw column value (text or compressed bytes) back into text"""
+    if isinstance(value, bytes):
+        if value.startswith(COMPRESSED_PREFIX):
+            value = zlib.decompress(value[len(COMPRESSED_PREFIX):])
+        return value.decode("utf-8")
+    return value
@@ -0,0 +1,126 @@
+"""
+Retry policy for model writes when several processes share the database.
+
+SQLite allows one writer at a time. A deferred transaction that reads
+first and writes later can be refused the write lock outright, and a busy
+database makes a commit fail with "database is locked". `retry_writes`
+wraps a model write method so that it:
+
+- opens its transaction with BEGIN IMMEDIATE, taking the write lock
+  before the method's own reads
+- rolls back and retries the whole method when SQLite reports the
+  database busy or locked, sleeping a random delay of up to
+  BASE_DELAY * 2**attempt (capped at MAX_DELAY) between attempts
+- records writes, retries, failures and time spent waiting for the lock
+  in `write_stats`
+"""
+import functools
+import random
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+# Attempts per write before the error is passed on
+MAX_ATTEMPTS = 12
+
+# Backoff bounds in seconds
+BASE_DELAY = 0.005
+MAX_DELAY = 0.5
+
+# sqlite3 result codes for a busy or locked database
+_SQLITE_BUSY = 5
+_SQLITE_LOCKED = 6
+
+
+class WriteStats:
+    """Lock-wait counters for the writes made by this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.writes = 0
+            self.retries = 0
+            self.failures = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record(self, retries, waited, failed=False):
+        with self._lock:
+            if failed:
+                self.failures += 1
+            else:
+                self.writes += 1
+            self.retries += retries
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "writes": self.writes,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+write_stats = WriteStats()
+
+
+def is_busy_error(error):
+    """True if an OperationalError means the database was busy or locked"""
+    code = getattr(error.orig, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xff in (_SQLITE_BUSY, _SQLITE_LOCKED)
+    message = str(error.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def backoff_delay(attempt):
+    """Random delay before retry number `attempt` (full jitter)"""
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+
+def retry_writes(method):
+    """
+    Decorator for model classmethods that take a session and write.
+
+    Nested calls (a write method calling another) run inside the outer
+    call's transaction and leave retrying to it. A retry re-runs the whole
+    method after a rollback, so anything the caller had pending in the
+    session is discarded too; the model methods only take plain values, so
+    re-running them is safe.
+    """
+    @functools.wraps(method)
+    def wrapper(cls, session, *args, **kwargs):
+        if session.info.get("in_write"):
+            return method(cls, session, *args, **kwargs)
+
+        start = time.perf_counter()
+        session.info["in_write"] = True
+        try:
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    if not session.in_transaction():
+                        session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+                    # Time to get the lock: earlier attempts, backoff and BEGIN IMMEDIATE
+                    waited = time.perf_counter() - start
+                    result = method(cls, session, *args, **kwargs)
+                except OperationalError as e:
+                    session.rollback()
+                    if not is_busy_error(e) or attempt == MAX_ATTEMPTS - 1:
+                        write_stats.record(attempt, time.perf_counter() - start, failed=True)
+                        raise
+                    time.sleep(backoff_delay(attempt))
+                else:
+                    write_stats.record(attempt, waited)
+                    return result
+        finally:
+            session.info.pop("in_write", None)
+
+    return wrapper
@@ -0,0 +1,149 @@
+"""
+Recipe nutrition totals.
+
+Totals are the product of the sparse recipe x ingredient quantity matrix
+(recipe_ingredients, converted to each ingredient's nutrition basis) and
+the ingredient x nutrient matrix (ingredient_nutrients). The product is
+computed in one set-based statement: a join of the lines to their unit
+factors and nutrition entries, summed with GROUP BY recipe. SQLite runs
+the whole batch in C, so no Python code runs per line.
+
+Results are stored in recipe_nutrition. Triggers delete a recipe's row
+when its lines or the nutrition facts of one of its ingredients change
+(see models/nutrition.py). refresh_nutrition() then recomputes only the
+recipes that have no row; get_nutrition() computes a missing row on the
+fly without storing it, so reads never write.
+"""
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from .units import load_unit_table
+
+NUTRIENTS = ["kcal", "protein", "fat", "carbs"]
+
+NutritionTotals = namedtuple(
+    "NutritionTotals", ["recipe_id", "kcal", "protein", "fat", "carbs", "lines", "matched_lines", "servings"]
+)
+
+
+def per_serving(totals):
+    """Totals divided by the recipe's serving size (treated as 1 when unset)"""
+    servings = totals.servings or 1
+    return totals._replace(**{name: getattr(totals, name) / servings for name in NUTRIENTS})
+
+
+# Lines whose unit isn't a known spelling form their own dimension, named
+# after the unit itself, so they still match an entry given in that unit
+_LINE_UNIT = "lower(trim(coalesce(ri.unit, '')))"
+
+# Per-recipe totals and line counts, aggregated over the FROM clause below
+_TOTALS = ",\n       ".join(
+    [f"coalesce(sum(ri.quantity * coalesce(u.factor, 1.0) / n.base_amount * n.{name}), 0.0)" for name in NUTRIENTS]
+    + ["count(ri.id)", "count(n.id)"]
+)
+
+_LINES_FROM = f"""
+FROM recipes r
+LEFT JOIN recipe_ingredients ri ON ri.recipe_id = r.id
+LEFT JOIN unit_factors u ON u.spelling = {_LINE_UNIT}
+LEFT JOIN ingredient_nutrients n
+       ON n.ingredient_id = ri.ingredient_id
+      AND n.dimension = coalesce(u.dimension, {_LINE_UNIT})
+""".strip()
+
+# Recipes without stored totals
+_STALE = "NOT EXISTS (SELECT 1 FROM recipe_nutrition rn WHERE rn.recipe_id = r.id)"
+
+_REFRESH_SQL = f"""
+INSERT OR REPLACE INTO recipe_nutrition (recipe_id, kcal, protein, fat, carbs, lines, matched_lines)
+SELECT r.id,
+       {_TOTALS}
+{_LINES_FROM}
+WHERE {_STALE}
+{{recipe_filter}}
+GROUP BY r.id
+"""
+
+# One recipe's totals computed from its lines, in the shape of _TOTALS_SQL
+_COMPUTE_SQL = f"""
+SELECT r.id,
+       {_TOTALS},
+       r.serving_size
+{_LINES_FROM}
+WHERE r.id = :recipe_id
+GROUP BY r.id
+"""
+
+
+def has_stale_nutrition(conn):
+    """True if some recipe has no stored totals, i.e. refresh_nutrition() has work to do"""
+    return conn.execute(text(f"SELECT 1 FROM recipes r WHERE {_STALE} LIMIT 1")).first() is not None
+
+
+def refresh_nutrition(conn, recipe_ids=None):
+    """
+    Recompute stale totals (all of them, or only those among recipe_ids).
+
+    `conn` is a Connection or Session. The caller commits. Returns the
+    number of recipes recomputed.
+    """
+    load_unit_table(conn)
+    if recipe_ids is None:
+        result = conn.execute(text(_REFRESH_SQL.format(recipe_filter="")))
+        return result.rowcount
+
+    recomputed = 0
+    recipe_ids = list(recipe_ids)
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(recipe_ids), 900):
+        chunk = recipe_ids[start:start + 900]
+        params = {f"id{i}": recipe_id for i, recipe_id in enumerate(chunk)}
+        recipe_filter = f"AND r.id IN ({', '.join(':' + name for name in params)})"
+        recomputed += conn.execute(text(_REFRESH_SQL.format(recipe_filter=recipe_filter)), params).rowcount
+    return recomputed
+
+
+_TOTALS_SQL = """
+SELECT rn.recipe_id, rn.kcal, rn.protein, rn.fat, rn.carbs, rn.lines, rn.matched_lines, r.serving_size
+FROM recipe_nutrition rn
+JOIN recipes r ON r.id = rn.recipe_id
+"""
+
+
+def get_nutrition(conn, recipe_id):
+    """
+    NutritionTotals for one recipe; None if the recipe doesn't exist.
+
+    Stale totals are computed without being stored, so reading never takes
+    the write lock; refresh_nutrition() stores them.
+    """
+    params = {"recipe_id": recipe_id}
+    row = conn.execute(text(_TOTALS_SQL + "WHERE rn.recipe_id = :recipe_id"), params).first()
+    if row is None:
+        load_unit_table(conn)
+        row = conn.execute(text(_COMPUTE_SQL), params).first()
+    return NutritionTotals(*row) if row else None
+
+
+def iter_nutrition(conn, sort="id", descending=False, serving=False):
+    """
+    Yield NutritionTotals for every recipe with computed totals; call
+    refresh_nutrition first to include stale ones.
+
+    `sort` is "id" or a nutrient name; with serving=True, totals are per
+    serving and sorting uses the per-serving values.
+    """
+    if sort not in ["id"] + NUTRIENTS:
+        raise ValueError(f"Unknown sort key '{sort}'")
+    if sort == "id":
+        order = "rn.recipe_id"
+    elif serving:
+        order = f"rn.{sort} / coalesce(nullif(r.serving_size, 0), 1)"
+    else:
+        order = f"rn.{sort}"
+    direction = "DESC" if descending else "ASC"
+    query = text(_TOTALS_SQL + f"ORDER BY {order} {direction}, rn.recipe_id")
+    for row in conn.execute(query):
+        totals = NutritionTotals(*row)
+        yield per_serving(totals) if serving else totals
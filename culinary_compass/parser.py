@@ -0,0 +1,195 @@
+"""
+Fast parser for free-text ingredient lines.
+
+Turns strings like "1 1/2 cups all-purpose flour, sifted" into a quantity,
+a canonical unit and an ingredient name ready for RecipeIngredient. All
+patterns are compiled once at import time and units are resolved through
+a lookup table, so parsing is a single regex match plus a few dict lookups.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Result of parsing one line. quantity_max is only set for ranges ("2-3 eggs"),
+# in which case quantity holds the lower bound. note keeps trailing text
+# such as ", sifted" that describes preparation rather than the ingredient.
+ParsedLine = namedtuple("ParsedLine", ["quantity", "quantity_max", "unit", "name", "note"])
+
+# Unicode vulgar fractions and their values
+VULGAR_FRACTIONS = {
+    "½": 1 / 2, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 1 / 4, "¾": 3 / 4,
+    "⅕": 1 / 5, "⅖": 2 / 5, "⅗": 3 / 5, "⅘": 4 / 5, "⅙": 1 / 6,
+    "⅚": 5 / 6, "⅐": 1 / 7, "⅛": 1 / 8, "⅜": 3 / 8, "⅝": 5 / 8,
+    "⅞": 7 / 8, "⅑": 1 / 9, "⅒": 1 / 10,
+}
+
+# Canonical unit -> spellings that mean it (matched case-insensitively,
+# except "T" and "t" which are handled separately below)
+UNIT_SPELLINGS = {
+    "cup": ["cup", "cups", "c"],
+    "tbsp": ["tbsp", "tbsps", "tbs", "tbl", "tablespoon", "tablespoons"],
+    "tsp": ["tsp", "tsps", "teaspoon", "teaspoons"],
+    "g": ["g", "gr", "gram", "grams", "gramme", "grammes"],
+    "kg": ["kg", "kgs", "kilogram", "kilograms"],
+    "mg": ["mg", "milligram", "milligrams"],
+    "ml": ["ml", "milliliter", "milliliters", "millilitre", "millilitres"],
+    "l": ["l", "liter", "liters", "litre", "litres"],
+    "oz": ["oz", "ounce", "ounces"],
+    "fl oz": ["fl oz", "fl. oz", "fluid ounce", "fluid ounces"],
+    "lb": ["lb", "lbs", "pound", "pounds"],
+    "pint": ["pint", "pints", "pt"],
+    "quart": ["quart", "quarts", "qt"],
+    "gallon": ["gallon", "gallons", "gal"],
+    "pinch": ["pinch", "pinches"],
+    "dash": ["dash", "dashes"],
+    "clove": ["clove", "cloves"],
+    "can": ["can", "cans", "tin", "tins"],
+    "package": ["package", "packages", "pkg", "packet", "packets"],
+    "slice": ["slice", "slices"],
+    "piece": ["piece", "pieces", "pc", "pcs"],
+    "bunch": ["bunch", "bunches"],
+    "stick": ["stick", "sticks"],
+    "sprig": ["sprig", "sprigs"],
+    "handful": ["handful", "handfuls"],
+}
+
+# Flat alias -> canonical unit lookup table
+UNIT_ALIASES = {
+    spelling: unit
+    for unit, spellings in UNIT_SPELLINGS.items()
+    for spelling in spellings
+}
+
+# Case-sensitive cook's shorthand: capital T is a tablespoon, small t a teaspoon
+CASE_SENSITIVE_UNITS = {"T": "tbsp", "t": "tsp"}
+
+_FRACTION_CHARS = "".join(VULGAR_FRACTIONS)
+
+# One amount: "1 1/2", "1/2", "1½", "½", "1.5", ".5" or "2"
+_AMOUNT = (
+    rf"(?:\d+\s+\d+\s*/\s*\d+"
+    rf"|\d+\s*/\s*\d+"
+    rf"|\d+\s*[{_FRACTION_CHARS}]"
+    rf"|[{_FRACTION_CHARS}]"
+    rf"|\d*\.\d+"
+    rf"|\d+)"
+)
+
+_LINE_RE = re.compile(
+    rf"^\s*(?P<qty>{_AMOUNT})"
+    rf"(?:\s*(?:-|–|—|to|or)\s*(?P<qty_max>{_AMOUNT}))?"
+    rf"\s*(?P<rest>.*?)\s*$",
+    re.IGNORECASE,
+)
+
+# Multi-word units are tried before single words
+_MULTI_WORD_UNIT_RE = re.compile(r"^(fl\.?\s*oz|fluid\s+ounces?)\.?(?:\s+|$)", re.IGNORECASE)
+_WORD_RE = re.compile(r"^([A-Za-z]+)\.?(?:\s+|$)")
+_PARENS_RE = re.compile(r"\s*\([^)]*\)")
+_OF_RE = re.compile(r"^of\s+", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+
+
+def parse_amount(text):
+    """Convert an amount string ("1 1/2", "1½", "0.5", "¾") to a float"""
+    text = text.strip()
+    value = 0.0
+    if text[-1] in VULGAR_FRACTIONS:
+        value = VULGAR_FRACTIONS[text[-1]]
+        text = text[:-1].strip()
+        if not text:
+            return value
+    if "/" in text:
+        head, _, denominator = text.partition("/")
+        parts = head.split()
+        if int(denominator) == 0:
+            raise ValueError(f"Invalid fraction '{text}'")
+        if len(parts) > 1:
+            value += int(parts[0])
+        return value + int(parts[-1]) / int(denominator)
+    return value + float(text)
+
+
+def _split_unit(rest):
+    """Split a leading unit off the text after the amount"""
+    match = _MULTI_WORD_UNIT_RE.match(rest)
+    if match:
+        return "fl oz", rest[match.end():]
+
+    match = _WORD_RE.match(rest)
+    if match:
+        word = match.group(1)
+        unit = CASE_SENSITIVE_UNITS.get(word) or UNIT_ALIASES.get(word.lower())
+        # A unit word with nothing after it is really the ingredient ("2 cloves")
+        if unit and rest[match.end():].strip():
+            return unit, rest[match.end():]
+    return None, rest
+
+
+@lru_cache(maxsize=65536)
+def parse_line(text):
+    """
+    Parse one ingredient line into a ParsedLine.
+
+    Lines without a leading amount ("salt to taste") come back with
+    quantity None and the whole text as the name. Raises ValueError for
+    lines with no ingredient name at all.
+    """
+    text = text.replace("⁄", "/")
+    match = _LINE_RE.match(text)
+    if match:
+        quantity = parse_amount(match.group("qty"))
+        quantity_max = match.group("qty_max")
+        if quantity_max is not None:
+            quantity_max = parse_amount(quantity_max)
+        rest = match.group("rest")
+    else:
+        quantity = quantity_max = None
+        rest = text.strip()
+
+    # Size notes such as "1 (14 oz) can tomatoes" describe the unit, drop them
+    rest = _PARENS_RE.sub("", rest).strip()
+
+    unit = None
+    if quantity is not None:
+        unit, rest = _split_unit(rest)
+        rest = _OF_RE.sub("", rest)
+
+    name, _, note = rest.partition(",")
+    name = _SPACES_RE.sub(" ", name).strip()
+    note = note.strip() or None
+    if not name:
+        raise ValueError(f"No ingredient name in '{text.strip()}'")
+    return ParsedLine(quantity, quantity_max, unit, name, note)
+
+
+def parse_lines(lines, skip_errors=False):
+    """
+    Parse many lines, yielding a ParsedLine for each.
+
+    Blank lines are skipped. With skip_errors, unparseable lines are dropped
+    instead of raising, which suits bulk imports of messy upstream data.
+    Repeated lines are served from parse_line's cache.
+    """
+    parse = parse_line
+    for text in lines:
+        if not text or text.isspace():
+            continue
+        if skip_errors:
+            try:
+                yield parse(text)
+            except ValueError:
+                continue
+        else:
+            yield parse(text)
+
+
+def to_model_line(parsed):
+    """
+    Convert a ParsedLine to the (quantity, unit, name) tuple RecipeIngredient.create_many takes.
+
+    Ranges keep their lower bound and lines without an amount ("salt to taste")
+    get quantity 0, since RecipeIngredient.quantity can't be empty.
+    """
+    quantity = parsed.quantity if parsed.quantity is not None else 0.0
+    return quantity, parsed.unit, parsed.name
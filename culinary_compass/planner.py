@@ -0,0 +1,294 @@
+"""
+Weekly meal-plan generation.
+
+A plan fills a list of slots (say breakfast, lunch and dinner for seven
+days), each with a time budget on prep + cook time and an optional set of
+allowed categories, with distinct recipes chosen so the shopping list
+(ingredients used by the plan and not already in the pantry) is as short
+as possible, i.e. so the recipes overlap in what they use.
+
+Searching the whole catalog is out of the question, so planning works on
+small candidate pools:
+
+1. Each distinct slot constraint gets a pool of at most `pool_size`
+   recipes, selected in SQL through the total_time and category indexes.
+   With a pantry, recipes using the most pantry ingredients come first.
+   The rest of the pool is a deterministic pseudo-random spread, varied
+   by the seed.
+2. Each candidate's ingredients become a bitmap (a Python int, one bit
+   per ingredient name), with pantry bits cleared. The size of a plan's
+   shopping list is then the popcount of the OR of its bitmaps.
+3. A greedy pass fills the most constrained slots first, choosing the
+   candidate that adds the fewest new ingredients. Local search then
+   repeatedly re-picks the best candidate for one slot given all the
+   others, and perturbs the plan when it stops improving. It keeps the
+   best plan found until the time budget runs out, or stops sooner once
+   that plan's cost reaches a lower bound (no slot can do better than its
+   cheapest candidate) or perturbing every slot has stopped finding
+   better plans.
+"""
+import random
+import time
+from collections import Counter, namedtuple
+
+from sqlalchemy import func, select
+
+from .models import Recipe, Category, Ingredient, RecipeIngredient
+from .substitutes import SubstitutionGraph
+
+DEFAULT_POOL_SIZE = 300
+DEFAULT_TIME_BUDGET = 0.5
+# Local search gives up once every slot has been perturbed this many times
+# per candidate in its pool without finding a better plan
+STALL_ROUNDS = 2
+
+Slot = namedtuple("Slot", ["label", "max_time", "categories"])
+PlannedMeal = namedtuple("PlannedMeal", ["slot", "recipe_id", "name", "category", "total_time"])
+Plan = namedtuple("Plan", ["meals", "shopping", "iterations", "seconds"])
+
+
+class PlanError(Exception):
+    """Raised when the slots can't all be filled with distinct recipes"""
+
+
+def parse_slot(spec):
+    """
+    Parse a slot spec: LABEL[:MAX_MINUTES[:CATEGORY[,CATEGORY...]]].
+
+    For example "dinner:45:Main Course,Soup" or "lunch:20". An empty or
+    omitted time means no limit.
+    """
+    label, _, rest = spec.partition(":")
+    minutes, _, categories = rest.partition(":")
+    if not label.strip():
+        raise ValueError(f"Slot '{spec}' has no label")
+    try:
+        max_time = int(minutes) if minutes.strip() else None
+    except ValueError:
+        raise ValueError(f"Slot '{spec}' has an invalid time limit '{minutes}'") from None
+    names = tuple(sorted({name.strip() for name in categories.split(",") if name.strip()}))
+    return Slot(label.strip(), max_time, names)
+
+
+def _bin_popcount(mask):
+    return bin(mask).count("1")
+
+
+# int.bit_count() is Python 3.10+
+_popcount = getattr(int, "bit_count", _bin_popcount)
+
+
+def _candidate_pool(session, slot, pantry_ids, pool_size, seed):
+    """Ids of up to pool_size recipes that fit the slot's time limit and categories"""
+    query = session.query(Recipe.id)
+    if slot.max_time is not None:
+        query = query.filter(Recipe.total_time <= slot.max_time)
+    if slot.categories:
+        query = query.filter(Recipe.category_id.in_(
+            select(Category.id).where(Category.name.in_(slot.categories))
+        ))
+    # Cheap seeded shuffle, so pools differ between seeds but are reproducible
+    spread = (Recipe.id * 1103515245 + seed) % 2147483648
+
+    pool = []
+    if pantry_ids:
+        coverage = (
+            select(func.count(RecipeIngredient.id))
+            .where(RecipeIngredient.recipe_id == Recipe.id, RecipeIngredient.ingredient_id.in_(pantry_ids))
+            .scalar_subquery()
+        )
+        pool = [recipe_id for (recipe_id,) in
+                query.filter(coverage > 0).order_by(coverage.desc(), spread).limit(pool_size // 2)]
+    taken = set(pool)
+    for (recipe_id,) in query.order_by(spread).limit(pool_size):
+        if len(pool) >= pool_size:
+            break
+        if recipe_id not in taken:
+            pool.append(recipe_id)
+    return pool
+
+
+def _load_candidates(session, recipe_ids, chunk_size=900):
+    """(recipe details, ingredient names) for the candidates, queried in chunks"""
+    details = {}
+    ingredients = {recipe_id: set() for recipe_id in recipe_ids}
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), chunk_size):
+        chunk = recipe_ids[start:start + chunk_size]
+        for recipe_id, name, category, total_time in (
+            session.query(Recipe.id, Recipe.name, func.coalesce(Category.name, "Uncategorized"), Recipe.total_time)
+            .outerjoin(Category, Recipe.category_id == Category.id)
+            .filter(Recipe.id.in_(chunk))
+        ):
+            details[recipe_id] = (name, category, total_time)
+        for recipe_id, name in (
+            session.query(RecipeIngredient.recipe_id, Ingredient.name)
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .filter(RecipeIngredient.recipe_id.in_(chunk))
+        ):
+            ingredients[recipe_id].add(name)
+    return details, ingredients
+
+
+class _Optimizer:
+    """Greedy construction plus local search over per-slot candidate bitmaps"""
+
+    def __init__(self, labels, pools, masks, rng):
+        self.labels = labels
+        self.pools = pools  # per slot, list of recipe ids
+        self.masks = masks  # recipe id -> bitmap of ingredients to buy
+        self.sizes = {recipe_id: _popcount(mask) for recipe_id, mask in masks.items()}
+        # Every slot needs a recipe, so no plan buys fewer ingredients than
+        # the cheapest candidate of the most demanding slot
+        self.lower_bound = max(min(self.sizes[recipe_id] for recipe_id in pool) for pool in pools)
+        self.rng = rng
+        self.iterations = 0
+
+    def cost(self, plan):
+        union = 0
+        for recipe_id in plan:
+            union |= self.masks[recipe_id]
+        return _popcount(union)
+
+    def _others(self, plan, slot):
+        union = 0
+        for index, recipe_id in enumerate(plan):
+            if index != slot and recipe_id is not None:
+                union |= self.masks[recipe_id]
+        return union
+
+    def _best_for(self, plan, slot, used):
+        """The candidate for `slot` adding the fewest ingredients to the rest of the plan"""
+        others = self._others(plan, slot)
+        keep = ~others
+        best, best_key = None, None
+        for recipe_id in self.pools[slot]:
+            if recipe_id in used and recipe_id != plan[slot]:
+                continue
+            key = (_popcount(self.masks[recipe_id] & keep), self.sizes[recipe_id])
+            if best_key is None or key < best_key:
+                best, best_key = recipe_id, key
+        return best
+
+    def greedy(self):
+        plan = [None] * len(self.pools)
+        used = set()
+        # Most constrained slots first, so small pools aren't used up by others
+        for slot in sorted(range(len(self.pools)), key=lambda index: len(self.pools[index])):
+            recipe_id = self._best_for(plan, slot, used)
+            if recipe_id is None:
+                raise PlanError(f"Not enough distinct recipes for slot '{self.labels[slot]}'")
+            plan[slot] = recipe_id
+            used.add(recipe_id)
+        return plan
+
+    def improve(self, plan, deadline):
+        """
+        Local search with perturbation until the deadline, the lower bound
+        or a stall (see STALL_ROUNDS); returns the best plan seen.
+        """
+        best, best_cost = list(plan), self.cost(plan)
+        current = list(plan)
+        slots = list(range(len(current)))
+        # Perturbations of each slot since the best plan last improved
+        perturbed = [0] * len(slots)
+        while best_cost > self.lower_bound and time.perf_counter() < deadline:
+            improved = False
+            self.rng.shuffle(slots)
+            for slot in slots:
+                self.iterations += 1
+                # The best candidate given the other slots never makes the plan worse
+                choice = self._best_for(current, slot, set(current))
+                if choice != current[slot]:
+                    before = self.cost(current)
+                    current[slot] = choice
+                    improved = improved or self.cost(current) < before
+                if time.perf_counter() >= deadline:
+                    break
+            cost = self.cost(current)
+            if cost < best_cost:
+                best, best_cost = list(current), cost
+                perturbed = [0] * len(slots)
+            if not improved:
+                if all(count >= STALL_ROUNDS * len(pool) for count, pool in zip(perturbed, self.pools)):
+                    break
+                # Stuck in a local optimum: restart from the best plan with a
+                # few slots swapped for random unused candidates
+                current = list(best)
+                used = set(current)
+                for slot in self.rng.sample(slots, min(2, len(slots))):
+                    perturbed[slot] += 1
+                    free = [recipe_id for recipe_id in self.pools[slot] if recipe_id not in used]
+                    if free:
+                        used.discard(current[slot])
+                        current[slot] = self.rng.choice(free)
+                        used.add(current[slot])
+        return best
+
+
+def generate_plan(session, slots, pantry=(), pool_size=DEFAULT_POOL_SIZE,
+                  time_budget=DEFAULT_TIME_BUDGET, seed=0, substitutes=False):
+    """
+    Choose a distinct recipe for every slot, keeping the shopping list short.
+
+    `slots` is a list of Slot; `pantry` holds ingredient names already at
+    hand (matched case-insensitively), which never go on the shopping list.
+    Returns a Plan whose meals follow the slot order and whose shopping
+    list holds (ingredient name, number of planned recipes using it),
+    most used first. With `substitutes`, ingredients a pantry item can
+    substitute count as in the pantry too, read from the closure as stored
+    (refresh it first with IngredientSubstitute.refresh_stale_closure).
+    Raises PlanError if a slot can't be filled.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    pantry_keys = {name.strip().lower() for name in pantry if name.strip()}
+    pantry_ids = []
+    if pantry_keys:
+        pantry_ids = [ingredient_id for (ingredient_id,) in
+                      session.query(Ingredient.id).filter(func.lower(Ingredient.name).in_(pantry_keys))]
+    if substitutes and pantry_ids:
+        covered = SubstitutionGraph.load(session).satisfied(pantry_ids)
+        pantry_ids = sorted(covered)
+        pantry_keys |= {name.lower() for (name,) in
+                        session.query(Ingredient.name).filter(Ingredient.id.in_(pantry_ids))}
+
+    # One pool per distinct constraint, shared by the slots that have it
+    pools_by_constraint = {}
+    for slot in slots:
+        key = (slot.max_time, slot.categories)
+        if key not in pools_by_constraint:
+            pools_by_constraint[key] = _candidate_pool(session, slot, pantry_ids, pool_size, seed)
+    pools = [pools_by_constraint[(slot.max_time, slot.categories)] for slot in slots]
+    for slot, pool in zip(slots, pools):
+        if not pool:
+            raise PlanError(f"No recipes fit slot '{slot.label}'")
+
+    candidate_ids = {recipe_id for pool in pools for recipe_id in pool}
+    details, ingredients = _load_candidates(session, candidate_ids)
+
+    # One bit per ingredient name that would have to be bought
+    bits, names = {}, {}
+    masks = {}
+    for recipe_id, recipe_ingredients in ingredients.items():
+        mask = 0
+        for name in recipe_ingredients:
+            key = name.lower()
+            if key in pantry_keys:
+                continue
+            if key not in bits:
+                bits[key] = 1 << len(bits)
+                names[key] = name
+            mask |= bits[key]
+        masks[recipe_id] = mask
+
+    optimizer = _Optimizer([slot.label for slot in slots], pools, masks, rng)
+    plan = optimizer.greedy()
+    plan = optimizer.improve(plan, start + time_budget)
+
+    meals = [PlannedMeal(slot, recipe_id, *details[recipe_id]) for slot, recipe_id in zip(slots, plan)]
+    usage = Counter()
+    for recipe_id in plan:
+        usage.update(names[key] for key in bits if masks[recipe_id] & bits[key])
+    shopping = sorted(usage.items(), key=lambda item: (-item[1], item[0].lower()))
+    return Plan(meals, shopping, optimizer.iterations, time.perf_counter() - start)
@@ -0,0 +1,231 @@
+"""
+Ingredient prices and recipe costs.
+
+An ingredient's price is given per `amount` of `unit` (2.50 per 1 kg,
+0.30 per egg) and stored with its dimension and base amount, like
+nutrition facts, so SQL can convert line quantities. A recipe's cost is
+the sum over its lines whose unit converts to the price's dimension; it
+is NULL when no line is priced.
+
+Costs are stored on recipes and kept current in two ways:
+
+* A price change recomputes only the recipes that use the ingredient,
+  found through the recipe_ingredients.ingredient_id index, in one
+  set-based UPDATE. A bulk price import recomputes every affected recipe
+  in a single such statement.
+* Triggers mark a recipe's cost stale when its lines change (see
+  models/recipe.py); refresh_costs() recomputes the stale ones.
+
+Read paths don't write: recipe_cost() computes a stale cost on the fly,
+and listings refresh through Recipe.refresh_stale_costs() only when
+has_stale_costs() finds something to do.
+"""
+import csv
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from .units import load_unit_table, unit_basis
+
+PriceImport = namedtuple("PriceImport", ["ingredients", "recipes", "unknown"])
+
+
+def price_basis(price, unit="", amount=1.0):
+    """Ingredient column values for a price per `amount` of `unit` (price None clears it)"""
+    if price is None:
+        return {"price": None, "price_unit": None, "price_amount": None,
+                "price_dimension": None, "price_base_amount": None}
+    dimension, factor = unit_basis(unit)
+    return {"price": price, "price_unit": unit or "", "price_amount": amount,
+            "price_dimension": dimension, "price_base_amount": amount * factor}
+
+
+# Lines whose unit isn't a known spelling form their own dimension, named
+# after the unit itself, so they still match a price given in that unit
+_LINE_UNIT = "lower(trim(coalesce(ri.unit, '')))"
+
+# A recipe's cost from its lines, correlated on recipes.id
+_COST_EXPR = f"""(
+    SELECT sum(ri.quantity * coalesce(u.factor, 1.0) / i.price_base_amount * i.price)
+    FROM recipe_ingredients ri
+    JOIN ingredients i ON i.id = ri.ingredient_id
+    LEFT JOIN unit_factors u ON u.spelling = {_LINE_UNIT}
+    WHERE ri.recipe_id = recipes.id
+      AND i.price_dimension = coalesce(u.dimension, {_LINE_UNIT})
+)"""
+
+_COST_SQL = f"""
+UPDATE recipes SET cost_stale = 0, cost = {_COST_EXPR}
+WHERE {{target}}
+"""
+
+# Recipes using any ingredient in repriced_ingredients, via the reverse index
+_USERS_OF_REPRICED = (
+    "id IN (SELECT recipe_id FROM recipe_ingredients "
+    "WHERE ingredient_id IN (SELECT id FROM repriced_ingredients))"
+)
+
+
+def _fill_repriced(conn, ingredient_ids=None, from_updates=False):
+    conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS repriced_ingredients (id INTEGER PRIMARY KEY)"))
+    conn.execute(text("DELETE FROM repriced_ingredients"))
+    if from_updates:
+        # lower() folds names the way fold_name() does, so this matches price_updates' keys
+        conn.execute(text(
+            "INSERT OR IGNORE INTO repriced_ingredients (id) "
+            "SELECT id FROM ingredients WHERE lower(name) IN (SELECT folded FROM price_updates)"
+        ))
+    else:
+        conn.execute(text("INSERT OR IGNORE INTO repriced_ingredients (id) VALUES (:id)"),
+                     [{"id": ingredient_id} for ingredient_id in ingredient_ids])
+
+
+def recompute_costs(conn, ingredient_ids):
+    """
+    Recompute the cost of every recipe that uses one of these ingredients.
+
+    `conn` is a Connection or Session. The caller commits. Returns the
+    number of recipes updated.
+    """
+    ingredient_ids = list(ingredient_ids)
+    if not ingredient_ids:
+        return 0
+    load_unit_table(conn)
+    _fill_repriced(conn, ingredient_ids)
+    return conn.execute(text(_COST_SQL.format(target=_USERS_OF_REPRICED))).rowcount
+
+
+def has_stale_costs(conn):
+    """True if some recipe's lines changed since its cost was computed (one index probe)"""
+    return conn.execute(text("SELECT 1 FROM recipes WHERE cost_stale = 1 LIMIT 1")).first() is not None
+
+
+def recipe_cost(conn, recipe_id):
+    """
+    (cost, cost per serving) of one recipe, current even when its stored
+    cost is stale. Stale costs are computed here without being written, so
+    reading a cost never takes the write lock. None if the recipe doesn't exist.
+    """
+    load_unit_table(conn)
+    row = conn.execute(text(f"""
+        SELECT CASE WHEN cost_stale = 1 THEN {_COST_EXPR} ELSE cost END, serving_size
+        FROM recipes WHERE id = :recipe_id
+    """), {"recipe_id": recipe_id}).first()
+    if row is None:
+        return None
+    cost, servings = row
+    return cost, None if cost is None else cost / (servings or 1)
+
+
+def refresh_costs(conn, recipe_ids=None):
+    """
+    Recompute stale costs (all of them, or only those among recipe_ids).
+
+    `conn` is a Connection or Session. The caller commits. Returns the
+    number of recipes recomputed.
+    """
+    if recipe_ids is None:
+        # Checked first so the common case (nothing stale) stays one index probe
+        if not has_stale_costs(conn):
+            return 0
+        load_unit_table(conn)
+        return conn.execute(text(_COST_SQL.format(target="cost_stale = 1"))).rowcount
+
+    load_unit_table(conn)
+    recomputed = 0
+    recipe_ids = list(recipe_ids)
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(recipe_ids), 900):
+        chunk = recipe_ids[start:start + 900]
+        params = {f"id{i}": recipe_id for i, recipe_id in enumerate(chunk)}
+        target = f"cost_stale = 1 AND id IN ({', '.join(':' + name for name in params)})"
+        recomputed += conn.execute(text(_COST_SQL.format(target=target)), params).rowcount
+    return recomputed
+
+
+def priced_lines(conn, recipe_id):
+    """(lines, priced lines) for a recipe, to show how complete its cost is"""
+    load_unit_table(conn)
+    return tuple(conn.execute(text(f"""
+        SELECT count(ri.id), count(i.id)
+        FROM recipe_ingredients ri
+        LEFT JOIN unit_factors u ON u.spelling = {_LINE_UNIT}
+        LEFT JOIN ingredients i
+               ON i.id = ri.ingredient_id
+              AND i.price_dimension = coalesce(u.dimension, {_LINE_UNIT})
+        WHERE ri.recipe_id = :recipe_id
+    """), {"recipe_id": recipe_id}).one())
+
+
+def read_price_file(stream):
+    """
+    Yield (name, price, unit, amount) from a CSV price file.
+
+    The header must include `name` and `price`; `unit` and `per` are
+    optional (default: each, per 1). An empty price clears the ingredient's
+    price. Raises ValueError naming the line of the first bad row.
+    """
+    reader = csv.DictReader(stream)
+    missing = {"name", "price"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Price file is missing column(s): {', '.join(sorted(missing))}")
+    for row in reader:
+        try:
+            name = (row["name"] or "").strip()
+            if not name:
+                raise ValueError("empty name")
+            price = float(row["price"]) if (row["price"] or "").strip() else None
+            amount = float(row.get("per") or 1.0)
+            if amount <= 0 or (price is not None and price < 0):
+                raise ValueError("price must not be negative and per must be positive")
+        except ValueError as exc:
+            raise ValueError(f"line {reader.line_num}: {exc}") from None
+        yield name, price, (row.get("unit") or "").strip(), amount
+
+
+def import_prices(conn, rows):
+    """
+    Set many ingredient prices by name and recompute every affected recipe.
+
+    `rows` are (name, price, unit, amount) tuples. Names match ignoring
+    case, like ingredient lines do (see fold_name), and later rows for the
+    same name win. Ingredient columns are set in one UPDATE reading each
+    price through the temp table's key (a correlated subquery rather than
+    UPDATE ... FROM, which needs SQLite 3.33), and all recipes using a
+    repriced ingredient are recomputed in one more UPDATE. The caller
+    commits. Returns a PriceImport with the number of ingredients and
+    recipes updated and the names that matched no ingredient.
+    """
+    from .models.ingredient import fold_name
+
+    conn.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS price_updates (folded TEXT PRIMARY KEY, name TEXT, price REAL, "
+        "price_unit TEXT, price_amount REAL, price_dimension TEXT, price_base_amount REAL)"
+    ))
+    conn.execute(text("DELETE FROM price_updates"))
+    params = [{"folded": fold_name(name), "name": name, **price_basis(price, unit, amount)}
+              for name, price, unit, amount in rows]
+    if not params:
+        return PriceImport(0, 0, [])
+    conn.execute(text(
+        "INSERT OR REPLACE INTO price_updates "
+        "(folded, name, price, price_unit, price_amount, price_dimension, price_base_amount) "
+        "VALUES (:folded, :name, :price, :price_unit, :price_amount, :price_dimension, :price_base_amount)"
+    ), params)
+
+    _fill_repriced(conn, from_updates=True)
+    unknown = [name for (name,) in conn.execute(text(
+        "SELECT p.name FROM price_updates p WHERE NOT EXISTS ("
+        "SELECT 1 FROM repriced_ingredients r JOIN ingredients i ON i.id = r.id WHERE lower(i.name) = p.folded"
+        ") ORDER BY p.name"
+    ))]
+    updated = conn.execute(text(
+        "UPDATE ingredients SET (price, price_unit, price_amount, price_dimension, price_base_amount) = ("
+        "SELECT p.price, p.price_unit, p.price_amount, p.price_dimension, p.price_base_amount "
+        "FROM price_updates p WHERE p.folded = lower(ingredients.name)"
+        ") WHERE id IN (SELECT id FROM repriced_ingredients)"
+    )).rowcount
+
+    load_unit_table(conn)
+    recomputed = conn.execute(text(_COST_SQL.format(target=_USERS_OF_REPRICED))).rowcount
+    return PriceImport(updated, recomputed, unknown)
@@ -0,0 +1,156 @@
+"""
+Persistent cache of read-command results across CLI invocations.
+
+Results are pickled into a sidecar SQLite file next to the database
+(culinary_compass.cache), keyed by command name and normalized arguments.
+Every entry records the data version (see data_version.py) the database
+had when the query started. A lookup only hits when the database's
+current version matches, which costs one small header read and two stat
+calls. So any committed write, from any process, invalidates every entry
+at once. The file is capped at `max_bytes`, and the least recently used
+entries are evicted first.
+
+Results with more than MAX_CACHED_ROWS rows are streamed but not stored.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+from .data_version import data_version, database_path
+
+# Total size of pickled results kept in the cache file
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Larger results are passed through without being cached
+MAX_CACHED_ROWS = 100000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_used ON entries (used);
+"""
+
+
+def default_cache_path(engine):
+    """Cache file that sits next to the engine's database file"""
+    return os.path.splitext(database_path(engine))[0] + ".cache"
+
+
+def make_key(command, params):
+    """Stable key for a command and its arguments (a dict of JSON-able values)"""
+    text = json.dumps([command, params], sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """LRU store of pickled row lists in a sidecar SQLite file"""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        try:
+            self._conn = self._open()
+        except sqlite3.DatabaseError:
+            # A damaged cache is just thrown away
+            os.remove(path)
+            self._conn = self._open()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            # Losing the cache in a crash is harmless, so skip fsyncs
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("PRAGMA busy_timeout = 100")
+            conn.executescript(_SCHEMA)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, key, version):
+        """Return the cached rows for key if they were stored at this version, else None"""
+        try:
+            row = self._conn.execute("SELECT version, data FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] != version:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.OperationalError:
+            # Another process holds the cache's write lock; treat as a miss
+            return None
+        return pickle.loads(row[1])
+
+    def put(self, key, version, rows):
+        """Store rows for key at this version, evicting least recently used entries past the size cap"""
+        data = pickle.dumps([tuple(row) for row in rows], pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, version, data, size, used) VALUES (?, ?, ?, ?, ?)",
+                (key, version, data, len(data), time.time()),
+            )
+            total = self._conn.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in self._conn.execute(
+                    "SELECT key, size FROM entries WHERE key != ? ORDER BY used", (key,)
+                ).fetchall():
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._conn.execute("COMMIT")
+        except sqlite3.OperationalError:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+
+    def rows(self, engine, command, params, compute):
+        """
+        Yield the rows for a read command, from the cache when the database is unchanged.
+
+        `compute` is called on a miss and returns an iterable of rows; they are
+        yielded as they arrive and stored once the iteration completes.
+        """
+        path = database_path(engine)
+        if path is None or not os.path.exists(path):
+            yield from compute()
+            return
+
+        key = make_key(command, params)
+        # Read the version before querying, so a write that lands mid-query
+        # can only make the stored entry look stale, never fresh
+        version = json.dumps(data_version(path))
+        cached = self.get(key, version)
+        if cached is not None:
+            yield from cached
+            return
+
+        collected = []
+        for row in compute():
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > MAX_CACHED_ROWS:
+                    collected = None
+            yield row
+        if collected is not None:
+            self.put(key, version, collected)
@@ -0,0 +1,345 @@
+"""
+Static cookbook rendering: one page per recipe plus category index pages,
+as HTML or Markdown.
+
+Recipes are streamed in id order, a chunk at a time. Each chunk takes
+three queries: the recipes with their category names, their ingredient
+lines, and their tags. Every recipe is hashed together with the markup
+and RENDER_VERSION, and only recipes whose hash differs from the last
+run's manifest are rendered. Rendering and writing run in a process
+pool. The calling process reads the database, keeps the manifest, and
+writes the category and index pages, which are small. Pages of recipes
+that no longer exist are removed.
+
+    out/index.html
+    out/categories/<slug>.html
+    out/recipes/<id>-<slug>.html
+    out/.render-manifest-html.json
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select
+
+from .models import Recipe, Ingredient, RecipeIngredient, Category, Tag, recipe_tags
+
+MARKUPS = {"html": "html", "markdown": "md"}
+
+# Bump when the page layout changes, so the next run re-renders everything
+RENDER_VERSION = 1
+
+# Recipes read per round of queries and handed to a worker at a time
+DEFAULT_CHUNK_SIZE = 1000
+
+UNCATEGORIZED = "Uncategorized"
+
+RenderStats = namedtuple("RenderStats", ["rendered", "unchanged", "removed", "categories", "seconds"])
+
+
+def slugify(text):
+    """Lowercase ASCII words joined by hyphens, for file names"""
+    slug = re.sub(r"[^a-z0-9]+", "-", (text or "").lower()).strip("-")
+    return slug[:60].rstrip("-") or "untitled"
+
+
+def recipe_path(recipe, markup):
+    return f"recipes/{recipe['id']}-{slugify(recipe['name'])}.{MARKUPS[markup]}"
+
+
+def category_path(name, markup):
+    return f"categories/{slugify(name)}.{MARKUPS[markup]}"
+
+
+def _quantity(value):
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def iter_recipes(session, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield lists of recipe dicts in id order, with their category name,
+    tags and ingredient lines as (quantity, unit, name) tuples.
+    """
+    recipes = (
+        select(Recipe.id, Recipe.name, Category.name, Recipe.description, Recipe.prep_time, Recipe.cook_time,
+               Recipe.total_time, Recipe.serving_size, Recipe.instructions)
+        .outerjoin(Category, Recipe.category_id == Category.id)
+        .order_by(Recipe.id)
+        .limit(chunk_size)
+    )
+    last_id = None
+    while True:
+        query = recipes if last_id is None else recipes.where(Recipe.id > last_id)
+        chunk = [
+            {"id": row[0], "name": row[1], "category": row[2] or UNCATEGORIZED, "description": row[3],
+             "prep_time": row[4], "cook_time": row[5], "total_time": row[6], "servings": row[7],
+             "instructions": row[8], "tags": [], "lines": []}
+            for row in session.execute(query)
+        ]
+        if not chunk:
+            return
+        first_id, last_id = chunk[0]["id"], chunk[-1]["id"]
+        by_id = {recipe["id"]: recipe for recipe in chunk}
+
+        lines = (
+            select(RecipeIngredient.recipe_id, RecipeIngredient.quantity, RecipeIngredient.unit, Ingredient.name)
+            .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+            .where(RecipeIngredient.recipe_id.between(first_id, last_id))
+            .order_by(RecipeIngredient.recipe_id, RecipeIngredient.id)
+        )
+        for recipe_id, quantity, unit, name in session.execute(lines):
+            by_id[recipe_id]["lines"].append((quantity, unit, name))
+        tags = (
+            select(recipe_tags.c.recipe_id, Tag.name)
+            .join(Tag, recipe_tags.c.tag_id == Tag.id)
+            .where(recipe_tags.c.recipe_id.between(first_id, last_id))
+            .order_by(recipe_tags.c.recipe_id, Tag.name)
+        )
+        for recipe_id, name in session.execute(tags):
+            by_id[recipe_id]["tags"].append(name)
+        yield chunk
+
+
+def content_hash(markup, content):
+    """Hash of everything a page is rendered from"""
+    data = json.dumps([RENDER_VERSION, markup, content], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _details(recipe):
+    details = []
+    if recipe["prep_time"] is not None:
+        details.append(f"Prep {recipe['prep_time']} min")
+    if recipe["cook_time"] is not None:
+        details.append(f"Cook {recipe['cook_time']} min")
+    if recipe["total_time"]:
+        details.append(f"Total {recipe['total_time']} min")
+    if recipe["servings"]:
+        details.append(f"Serves {recipe['servings']}")
+    return details
+
+
+def _line_text(line):
+    quantity, unit, name = line
+    return " ".join(part for part in (_quantity(quantity), unit, name) if part)
+
+
+def _html_page(title, body):
+    return (f"<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(title)}</title>\n</head>\n<body>\n{body}</body>\n</html>\n")
+
+
+def _paragraphs_html(text):
+    return "".join(f"<p>{html.escape(block)}</p>\n" for block in text.split("\n") if block.strip())
+
+
+def _md_escape(text):
+    return re.sub(r"([\\`*_\[\]#<>|])", r"\\\1", text)
+
+
+def render_recipe(recipe, markup):
+    """The page for one recipe"""
+    category_link = "../" + category_path(recipe["category"], markup)
+    if markup == "html":
+        escape = html.escape
+        parts = [
+            f"<nav><a href=\"../index.html\">Cookbook</a> &rsaquo; "
+            f"<a href=\"{category_link}\">{escape(recipe['category'])}</a></nav>\n",
+            f"<h1>{escape(recipe['name'])}</h1>\n",
+        ]
+        details = _details(recipe)
+        if details:
+            parts.append(f"<p class=\"details\">{escape(' · '.join(details))}</p>\n")
+        if recipe["tags"]:
+            parts.append(f"<p class=\"tags\">Tags: {escape(', '.join(recipe['tags']))}</p>\n")
+        if recipe["description"]:
+            parts.append(_paragraphs_html(recipe["description"]))
+        parts.append("<h2>Ingredients</h2>\n")
+        if recipe["lines"]:
+            items = "".join(f"<li>{escape(_line_text(line))}</li>\n" for line in recipe["lines"])
+            parts.append(f"<ul>\n{items}</ul>\n")
+        else:
+            parts.append("<p><em>No ingredients listed</em></p>\n")
+        if recipe["instructions"]:
+            parts.append("<h2>Instructions</h2>\n" + _paragraphs_html(recipe["instructions"]))
+        return _html_page(recipe["name"], "".join(parts))
+
+    parts = [
+        f"[Cookbook](../index.md) › [{_md_escape(recipe['category'])}]({category_link})\n\n",
+        f"# {_md_escape(recipe['name'])}\n\n",
+    ]
+    details = _details(recipe)
+    if details:
+        parts.append(" · ".join(details) + "\n\n")
+    if recipe["tags"]:
+        parts.append(f"Tags: {_md_escape(', '.join(recipe['tags']))}\n\n")
+    if recipe["description"]:
+        parts.append(_md_escape(recipe["description"]).strip() + "\n\n")
+    parts.append("## Ingredients\n\n")
+    if recipe["lines"]:
+        parts.append("".join(f"- {_md_escape(_line_text(line))}\n" for line in recipe["lines"]) + "\n")
+    else:
+        parts.append("*No ingredients listed*\n\n")
+    if recipe["instructions"]:
+        parts.append("## Instructions\n\n" + _md_escape(recipe["instructions"]).strip() + "\n")
+    return "".join(parts)
+
+
+def render_category(name, entries, markup):
+    """The index page for one category; entries are (path, recipe name, total time) tuples"""
+    if markup == "html":
+        items = "".join(
+            f"<li><a href=\"../{path}\">{html.escape(title)}</a>"
+            + (f" ({total} min)" if total else "") + "</li>\n"
+            for path, title, total in entries
+        )
+        body = (f"<nav><a href=\"../index.html\">Cookbook</a></nav>\n<h1>{html.escape(name)}</h1>\n"
+                f"<ul>\n{items}</ul>\n")
+        return _html_page(name, body)
+    items = "".join(
+        f"- [{_md_escape(title)}](../{path})" + (f" ({total} min)" if total else "") + "\n"
+        for path, title, total in entries
+    )
+    return f"[Cookbook](../index.md)\n\n# {_md_escape(name)}\n\n{items}"
+
+
+def render_index(categories, markup):
+    """The front page; categories are (name, recipe count) tuples"""
+    if markup == "html":
+        items = "".join(
+            f"<li><a href=\"{category_path(name, markup)}\">{html.escape(name)}</a> ({count})</li>\n"
+            for name, count in categories
+        )
+        return _html_page("Cookbook", f"<h1>Cookbook</h1>\n<ul>\n{items}</ul>\n")
+    items = "".join(f"- [{_md_escape(name)}]({category_path(name, markup)}) ({count})\n" for name, count in categories)
+    return f"# Cookbook\n\n{items}"
+
+
+def _write(out_dir, path, text):
+    full = os.path.join(out_dir, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w", encoding="utf-8") as stream:
+        stream.write(text)
+
+
+def render_chunk(out_dir, markup, recipes):
+    """Worker entry point: render and write a list of recipes, returning how many were written"""
+    for recipe in recipes:
+        _write(out_dir, recipe_path(recipe, markup), render_recipe(recipe, markup))
+    return len(recipes)
+
+
+def _remove(out_dir, path):
+    try:
+        os.remove(os.path.join(out_dir, path))
+    except FileNotFoundError:
+        pass
+
+
+def manifest_path(out_dir, markup):
+    return os.path.join(out_dir, f".render-manifest-{markup}.json")
+
+
+def render_site(session, out_dir, markup="html", workers=None, chunk_size=DEFAULT_CHUNK_SIZE, force=False,
+                progress=None):
+    """
+    Render every recipe, category page and the index into `out_dir`.
+
+    Pages whose content hash matches the previous run's manifest are kept
+    unless `force` is set. With workers=1 everything runs in this process;
+    otherwise rendering is spread over a process pool of that size (None
+    means one per CPU). `progress`, if given, is called with the running
+    RenderStats after every chunk.
+    """
+    if markup not in MARKUPS:
+        raise ValueError(f"Unknown markup: {markup}")
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_file = manifest_path(out_dir, markup)
+    previous = {"recipes": {}, "categories": {}}
+    if not force and os.path.exists(manifest_file):
+        with open(manifest_file, encoding="utf-8") as stream:
+            previous = json.load(stream)
+    old_recipes = previous["recipes"]
+    recipes_manifest = {}
+    categories = {}
+    rendered = unchanged = 0
+
+    def report():
+        if progress:
+            progress(RenderStats(rendered, unchanged, 0, 0, time.perf_counter() - start))
+
+    def changed(chunk):
+        """Record a chunk in the manifest and category lists, returning the recipes to render"""
+        nonlocal unchanged
+        todo = []
+        for recipe in chunk:
+            key = str(recipe["id"])
+            path = recipe_path(recipe, markup)
+            digest = content_hash(markup, recipe)
+            recipes_manifest[key] = [digest, path]
+            categories.setdefault(recipe["category"], []).append((path, recipe["name"], recipe["total_time"]))
+            old = old_recipes.get(key)
+            if old and old[0] == digest and old[1] == path:
+                unchanged += 1
+                continue
+            if old and old[1] != path:
+                _remove(out_dir, old[1])
+            todo.append(recipe)
+        return todo
+
+    if workers == 1:
+        for chunk in iter_recipes(session, chunk_size):
+            todo = changed(chunk)
+            rendered += render_chunk(out_dir, markup, todo)
+            report()
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in iter_recipes(session, chunk_size):
+                todo = changed(chunk)
+                if not todo:
+                    report()
+                    continue
+                # Bound the rendered-but-unwritten chunks in flight
+                if len(pending) >= workers * 2:
+                    rendered += pending.popleft().result()
+                    report()
+                pending.append(pool.submit(render_chunk, out_dir, markup, todo))
+            while pending:
+                rendered += pending.popleft().result()
+                report()
+
+    removed = 0
+    for key, (_, path) in old_recipes.items():
+        if key not in recipes_manifest:
+            _remove(out_dir, path)
+            removed += 1
+
+    # Category pages and the index are rendered here; they are few and small
+    categories_manifest = {}
+    old_categories = previous["categories"]
+    category_pages = 0
+    for name, entries in categories.items():
+        path = category_path(name, markup)
+        entries.sort(key=lambda entry: entry[1].casefold())
+        digest = content_hash(markup, [name, entries])
+        categories_manifest[path] = digest
+        if old_categories.get(path) != digest:
+            _write(out_dir, path, render_category(name, entries, markup))
+            category_pages += 1
+    for path in old_categories:
+        if path not in categories_manifest:
+            _remove(out_dir, path)
+    index = sorted(((name, len(entries)) for name, entries in categories.items()), key=lambda item: item[0].casefold())
+    _write(out_dir, f"index.{MARKUPS[markup]}", render_index(index, markup))
+
+    with open(manifest_file, "w", encoding="utf-8") as stream:
+        json.dump({"recipes": recipes_manifest, "categories": categories_manifest}, stream)
+    return RenderStats(rendered, unchanged, removed, category_pages, time.perf_counter() - start)
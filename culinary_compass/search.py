@@ -0,0 +1,142 @@
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.orm import aliased
+
+from .models import Recipe, Ingredient, RecipeIngredient, Category, substitute_closure
+
+
+class RecipeFilter:
+    """
+    Multi-criteria recipe filter compiled into a single query.
+
+    Ingredient and category criteria become correlated EXISTS / IN subqueries
+    instead of joins, so a recipe matching several ingredients still comes
+    back exactly once and no de-duplication pass is needed.
+
+    With `substitutes`, a required ingredient is also satisfied by a line
+    calling for any ingredient it can substitute (via substitute_closure,
+    which must be fresh; see IngredientSubstitute.refresh_stale_closure).
+    """
+
+    # Sort keys accepted by `sort`
+    SORT_KEYS = ["id", "name", "time", "servings", "cost", "cost_per_serving"]
+
+    def __init__(self, name=None, categories=(), ingredients=(), exclude_ingredients=(),
+                 max_time=None, min_servings=None, max_servings=None,
+                 sort="id", descending=False, substitutes=False):
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}', expected one of {', '.join(self.SORT_KEYS)}")
+        self.name = name
+        self.categories = list(categories)
+        self.ingredients = list(ingredients)
+        self.exclude_ingredients = list(exclude_ingredients)
+        self.max_time = max_time
+        self.min_servings = min_servings
+        self.max_servings = max_servings
+        self.sort = sort
+        self.descending = descending
+        self.substitutes = substitutes
+
+    def cache_params(self):
+        """
+        The filter as a dict of plain values, for keying cached results.
+        Order doesn't matter among categories or ingredients, so they are sorted.
+        """
+        return {
+            "name": self.name,
+            "categories": sorted(self.categories),
+            "ingredients": sorted(self.ingredients),
+            "exclude_ingredients": sorted(self.exclude_ingredients),
+            "max_time": self.max_time,
+            "min_servings": self.min_servings,
+            "max_servings": self.max_servings,
+            "sort": self.sort,
+            "descending": self.descending,
+            "substitutes": self.substitutes,
+        }
+
+    @staticmethod
+    def _uses_ingredient(pattern, substitutes=False):
+        """
+        EXISTS clause matching recipes with an ingredient whose name is LIKE
+        the pattern, or with substitutes, one that such an ingredient can replace
+        """
+        condition = Ingredient.name.like(f"%{pattern}%")
+        if substitutes:
+            substitute = aliased(Ingredient)
+            replaceable = (
+                select(substitute_closure.c.ingredient_id)
+                .join(substitute, substitute.id == substitute_closure.c.substitute_id)
+                .where(substitute.name.like(f"%{pattern}%"))
+            )
+            condition = or_(condition, RecipeIngredient.ingredient_id.in_(replaceable))
+        return exists(
+            select(RecipeIngredient.id)
+            .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+            .where(RecipeIngredient.recipe_id == Recipe.id)
+            .where(condition)
+        )
+
+    def conditions(self):
+        """Return the list of WHERE clauses for this filter"""
+        clauses = []
+
+        if self.name:
+            clauses.append(Recipe.name.like(f"%{self.name}%"))
+
+        if self.categories:
+            # Any of the given categories matches
+            category_ids = select(Category.id).where(
+                or_(*(Category.name.like(f"%{name}%") for name in self.categories))
+            )
+            clauses.append(Recipe.category_id.in_(category_ids))
+
+        # Every required ingredient must be present, no excluded one may be
+        for pattern in self.ingredients:
+            clauses.append(self._uses_ingredient(pattern, self.substitutes))
+        for pattern in self.exclude_ingredients:
+            clauses.append(~self._uses_ingredient(pattern))
+
+        if self.max_time is not None:
+            clauses.append(Recipe.total_time <= self.max_time)
+        if self.min_servings is not None:
+            clauses.append(Recipe.serving_size >= self.min_servings)
+        if self.max_servings is not None:
+            clauses.append(Recipe.serving_size <= self.max_servings)
+
+        return clauses
+
+    def order_by(self):
+        """Return the ORDER BY clauses, always ending with the id as a tie-breaker"""
+        column = {
+            "id": Recipe.id,
+            "name": Recipe.name,
+            "time": Recipe.total_time,
+            "servings": Recipe.serving_size,
+            "cost": Recipe.cost,
+            "cost_per_serving": Recipe.cost_per_serving,
+        }[self.sort]
+        if self.descending:
+            return [column.desc(), Recipe.id.desc()]
+        return [column, Recipe.id]
+
+    def apply(self, query):
+        """Add this filter's conditions and ordering to an existing Recipe query"""
+        clauses = self.conditions()
+        if clauses:
+            query = query.filter(and_(*clauses))
+        return query.order_by(*self.order_by())
+
+    def rows(self, session):
+        """Query matching recipes as (id, name, category, prep, cook, total, servings, cost, cost per serving) rows"""
+        query = session.query(
+            Recipe.id,
+            Recipe.name,
+            func.coalesce(Category.name, "Uncategorized"),
+            Recipe.prep_time,
+            Recipe.cook_time,
+            Recipe.total_time,
+            Recipe.serving_size,
+            func.round(Recipe.cost, 2),
+            func.round(Recipe.cost_per_serving, 2),
+        ).outerjoin(Category, Recipe.category_id == Category.id)
+        return self.apply(query)
@@ -0,0 +1,324 @@
+"""
+Compact, memory-mapped catalog snapshot for read-heavy lookups.
+
+`build_snapshot` compiles recipe summaries and ingredient lines into one
+binary file laid out as plain arrays:
+
+    header          magic, counts, source data version, section table
+    strings         interned string table (offsets + UTF-8 blob)
+    recipes         one array per column (id, name, category, times, servings)
+    lines           CSR layout: per-recipe offsets into flat line arrays
+    row_by_id       dense recipe id -> row array for O(1) lookups
+
+`CatalogSnapshot` mmaps the file and casts each section to a memoryview,
+so opening it costs no parsing and values are read straight from the page
+cache. Nothing here touches the ORM.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from sqlalchemy import select
+
+from .data_version import data_version, database_path
+from .models import Recipe, Ingredient, RecipeIngredient, Category
+
+MAGIC = b"CCSNAP01"
+
+# Sections in file order, with the array typecode each one is cast to
+SECTIONS = [
+    ("string_offsets", "I"),
+    ("string_data", "B"),
+    ("recipe_ids", "i"),
+    ("recipe_names", "I"),
+    ("recipe_categories", "i"),
+    ("recipe_prep", "i"),
+    ("recipe_cook", "i"),
+    ("recipe_total", "i"),
+    ("recipe_servings", "i"),
+    ("line_offsets", "I"),
+    ("line_ingredient_ids", "i"),
+    ("line_names", "I"),
+    ("line_units", "i"),
+    ("line_quantities", "d"),
+    ("row_by_id", "i"),
+]
+
+# magic, recipe count, line count, max id, data version (5 fields), then
+# an (offset, length) pair per section
+HEADER = struct.Struct("<8s3Q5q" + "2Q" * len(SECTIONS))
+
+# Stored in place of NULL integers and missing strings
+NULL = -1
+
+
+def default_snapshot_path(engine):
+    """Snapshot file that sits next to the engine's database file"""
+    return os.path.splitext(database_path(engine))[0] + ".snapshot"
+
+
+class _StringTable:
+    """Interns strings so each distinct value is stored once"""
+
+    def __init__(self):
+        self.ids = {}
+        self.data = bytearray()
+        self.offsets = array("I", [0])
+
+    def add(self, value):
+        if value is None:
+            return NULL
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.offsets) - 1
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return sid
+
+
+def _int_or_null(value):
+    return NULL if value is None else value
+
+
+def build_snapshot(engine, path=None):
+    """Compile the catalog into a snapshot file, replacing any existing one atomically"""
+    path = path or default_snapshot_path(engine)
+    version = data_version(database_path(engine))
+
+    strings = _StringTable()
+    columns = {name: array(code) for name, code in SECTIONS if name not in ("string_offsets", "string_data")}
+    columns["line_offsets"].append(0)
+
+    recipe_query = select(
+        Recipe.id, Recipe.name, Category.name, Recipe.prep_time,
+        Recipe.cook_time, Recipe.total_time, Recipe.serving_size,
+    ).outerjoin(Category, Recipe.category_id == Category.id).order_by(Recipe.id)
+    line_query = select(
+        RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, Ingredient.name,
+        RecipeIngredient.unit, RecipeIngredient.quantity,
+    ).join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id).order_by(
+        RecipeIngredient.recipe_id, RecipeIngredient.id
+    )
+
+    with engine.connect() as recipe_conn, engine.connect() as line_conn:
+        lines = iter(line_conn.execution_options(yield_per=10000).execute(line_query))
+        line = next(lines, None)
+
+        for recipe_id, name, category, prep, cook, total, servings in \
+                recipe_conn.execution_options(yield_per=10000).execute(recipe_query):
+            columns["recipe_ids"].append(recipe_id)
+            columns["recipe_names"].append(strings.add(name))
+            columns["recipe_categories"].append(strings.add(category))
+            columns["recipe_prep"].append(_int_or_null(prep))
+            columns["recipe_cook"].append(_int_or_null(cook))
+            columns["recipe_total"].append(_int_or_null(total))
+            columns["recipe_servings"].append(_int_or_null(servings))
+
+            # Both queries are ordered by recipe id, so lines are merged in one pass
+            while line is not None and line[0] < recipe_id:
+                line = next(lines, None)
+            while line is not None and line[0] == recipe_id:
+                _, ingredient_id, ingredient_name, unit, quantity = line
+                columns["line_ingredient_ids"].append(ingredient_id)
+                columns["line_names"].append(strings.add(ingredient_name))
+                columns["line_units"].append(strings.add(unit or None))
+                columns["line_quantities"].append(quantity)
+                line = next(lines, None)
+            columns["line_offsets"].append(len(columns["line_ingredient_ids"]))
+
+    recipe_ids = columns["recipe_ids"]
+    max_id = max(recipe_ids) if recipe_ids else 0
+    row_by_id = columns["row_by_id"] = array("i", [NULL]) * (max_id + 1)
+    for row, recipe_id in enumerate(recipe_ids):
+        row_by_id[recipe_id] = row
+
+    columns["string_offsets"] = strings.offsets
+    columns["string_data"] = array("B", strings.data)
+
+    # Lay sections out after the header, each aligned to 8 bytes
+    blobs = [columns[name].tobytes() for name, _ in SECTIONS]
+    table = []
+    offset = HEADER.size
+    for blob in blobs:
+        offset += -offset % 8
+        table += [offset, len(blob)]
+        offset += len(blob)
+
+    header = HEADER.pack(MAGIC, len(recipe_ids), len(columns["line_ingredient_ids"]), max_id, *version, *table)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for blob, section_offset in zip(blobs, table[0::2]):
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(blob)
+    # Readers that already mapped the old file keep their copy
+    os.replace(tmp_path, path)
+    return path
+
+
+class LineView:
+    """Read-only view of one ingredient line in a snapshot"""
+    __slots__ = ("_snapshot", "_index")
+
+    def __init__(self, snapshot, index):
+        self._snapshot = snapshot
+        self._index = index
+
+    @property
+    def ingredient_id(self):
+        return self._snapshot.line_ingredient_ids[self._index]
+
+    @property
+    def name(self):
+        return self._snapshot.string(self._snapshot.line_names[self._index])
+
+    @property
+    def unit(self):
+        return self._snapshot.string(self._snapshot.line_units[self._index])
+
+    @property
+    def quantity(self):
+        return self._snapshot.line_quantities[self._index]
+
+    def __repr__(self):
+        return f"<LineView(quantity={self.quantity}, unit={self.unit!r}, name={self.name!r})>"
+
+
+def _nullable(value):
+    return None if value == NULL else value
+
+
+class RecipeView:
+    """Read-only view of one recipe summary in a snapshot"""
+    __slots__ = ("_snapshot", "_row")
+
+    def __init__(self, snapshot, row):
+        self._snapshot = snapshot
+        self._row = row
+
+    @property
+    def id(self):
+        return self._snapshot.recipe_ids[self._row]
+
+    @property
+    def name(self):
+        return self._snapshot.string(self._snapshot.recipe_names[self._row])
+
+    @property
+    def category(self):
+        return self._snapshot.string(self._snapshot.recipe_categories[self._row])
+
+    @property
+    def prep_time(self):
+        return _nullable(self._snapshot.recipe_prep[self._row])
+
+    @property
+    def cook_time(self):
+        return _nullable(self._snapshot.recipe_cook[self._row])
+
+    @property
+    def total_time(self):
+        return _nullable(self._snapshot.recipe_total[self._row])
+
+    @property
+    def serving_size(self):
+        return _nullable(self._snapshot.recipe_servings[self._row])
+
+    @property
+    def ingredients(self):
+        offsets = self._snapshot.line_offsets
+        return [LineView(self._snapshot, i) for i in range(offsets[self._row], offsets[self._row + 1])]
+
+    def __repr__(self):
+        return f"<RecipeView(id={self.id}, name={self.name!r})>"
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped snapshot reader.
+
+    Each section is exposed as a memoryview cast to its element type, so
+    indexing reads directly from the mapped file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+
+        fields = HEADER.unpack_from(buffer)
+        if fields[0] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a catalog snapshot")
+        if sys.byteorder != "little":
+            self.close()
+            raise ValueError("Snapshots are little-endian and can't be read on this machine")
+
+        self.recipe_count, self.line_count, self.max_id = fields[1:4]
+        self.version = tuple(fields[4:9])
+        table = fields[9:]
+
+        self._views = [buffer]
+        for i, (name, code) in enumerate(SECTIONS):
+            offset, length = table[2 * i], table[2 * i + 1]
+            view = buffer[offset:offset + length].cast(code)
+            self._views.append(view)
+            setattr(self, name, view)
+
+    def close(self):
+        """Release the section views and unmap the file"""
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.recipe_count
+
+    def __iter__(self):
+        for row in range(self.recipe_count):
+            yield RecipeView(self, row)
+
+    def string(self, sid):
+        """Look a string up in the interned string table"""
+        if sid == NULL:
+            return None
+        return str(self.string_data[self.string_offsets[sid]:self.string_offsets[sid + 1]], "utf-8")
+
+    def recipe(self, recipe_id):
+        """Return the RecipeView for an id in O(1), or None"""
+        if 0 <= recipe_id <= self.max_id:
+            row = self.row_by_id[recipe_id]
+            if row != NULL:
+                return RecipeView(self, row)
+        return None
+
+    def is_current(self, engine):
+        """True if the database hasn't changed since the snapshot was built"""
+        return self.version == data_version(database_path(engine))
+
+
+def open_snapshot(engine, path=None):
+    """Open the snapshot for an engine, rebuilding it first if it's missing or stale"""
+    path = path or default_snapshot_path(engine)
+    if os.path.exists(path):
+        try:
+            snapshot = CatalogSnapshot(path)
+        except (ValueError, struct.error):
+            snapshot = None
+        if snapshot is not None:
+            if snapshot.is_current(engine):
+                return snapshot
+            snapshot.close()
+    build_snapshot(engine, path)
+    return CatalogSnapshot(path)
@@ -0,0 +1,94 @@
+"""
+Ingredient substitution graph.
+
+Edges live in ingredient_substitutes; their transitive closure is
+precomputed in substitute_closure, one row per (ingredient, substitute)
+pair connected by a path, with the ratio along the shortest path. The
+closure is maintained in the database (see models/substitution.py):
+
+* Adding an edge extends it incrementally, in the insert trigger, with one
+  set-based upsert joining the ingredients that reach the edge's start to
+  those its end reaches. Nothing is rebuilt.
+* Removing or changing an edge can break paths, so it only marks the
+  closure stale; refresh_closure() rebuilds it, replaying the same
+  incremental step for every edge, before the next use. Readers call it
+  through IngredientSubstitute.refresh_stale_closure, and only when
+  has_stale_closure() says so, so reads never take the write lock needlessly.
+
+Lookups are O(1): SQL reads the closure through its primary key or its
+substitute_id index, and SubstitutionGraph holds it in dicts.
+"""
+from sqlalchemy import text
+
+from .models.substitution import EXTEND_CLOSURE_SQL
+
+
+def has_stale_closure(conn):
+    """True if an edge was removed or changed since the closure was last built"""
+    return bool(conn.execute(text("SELECT stale FROM substitute_closure_state WHERE id = 1")).scalar())
+
+
+def refresh_closure(conn):
+    """
+    Rebuild substitute_closure if an edge was removed or changed since it
+    was last built. `conn` is a Connection or Session; the caller commits.
+    Returns True if it was rebuilt.
+    """
+    if not has_stale_closure(conn):
+        return False
+    rebuild_closure(conn)
+    return True
+
+
+def rebuild_closure(conn):
+    """Recompute substitute_closure from scratch by adding every edge in turn"""
+    conn.execute(text("DELETE FROM substitute_closure"))
+    extend = text(EXTEND_CLOSURE_SQL.format(a=":a", b=":b", ratio=":ratio"))
+    edges = conn.execute(text(
+        "SELECT ingredient_id, substitute_id, ratio FROM ingredient_substitutes ORDER BY id"
+    )).all()
+    for a, b, ratio in edges:
+        conn.execute(extend, {"a": a, "b": b, "ratio": ratio})
+    conn.execute(text("UPDATE substitute_closure_state SET stale = 0 WHERE id = 1"))
+
+
+class SubstitutionGraph:
+    """In-memory copy of the substitution closure with constant-time lookups"""
+
+    def __init__(self, pairs=()):
+        # ingredient -> {substitute: (ratio, hops)}, and substitute -> ingredients it can replace
+        self._substitutes = {}
+        self._replaces = {}
+        for ingredient_id, substitute_id, ratio, hops in pairs:
+            self._substitutes.setdefault(ingredient_id, {})[substitute_id] = (ratio, hops)
+            self._replaces.setdefault(substitute_id, set()).add(ingredient_id)
+
+    @classmethod
+    def load(cls, conn):
+        """Load the closure as stored; refresh it first if edges were removed or changed"""
+        return cls(conn.execute(text(
+            "SELECT ingredient_id, substitute_id, ratio, hops FROM substitute_closure"
+        )))
+
+    def substitutes(self, ingredient_id):
+        """{substitute id: (ratio, hops)} for everything that can replace the ingredient"""
+        return self._substitutes.get(ingredient_id, {})
+
+    def ratio(self, ingredient_id, substitute_id):
+        """Units of the substitute per unit of the ingredient, or None if it can't replace it"""
+        found = self._substitutes.get(ingredient_id, {}).get(substitute_id)
+        return found[0] if found else None
+
+    def replaceable_by(self, substitute_id):
+        """Ids of the ingredients the substitute can stand in for"""
+        return self._replaces.get(substitute_id, set())
+
+    def satisfied(self, pantry_ids):
+        """
+        Ids of every ingredient the pantry covers: its own ingredients plus
+        those one of them can substitute. Membership tests on the result are O(1).
+        """
+        covered = set(pantry_ids)
+        for substitute_id in pantry_ids:
+            covered.update(self._replaces.get(substitute_id, ()))
+        return frozenset(covered)
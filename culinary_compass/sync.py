@@ -0,0 +1,129 @@
+"""
+Incremental delta export and apply between culinary_compass databases.
+
+Every tracked row carries a revision stamped by triggers (see
+models/revision.py), and deletes leave tombstones. A delta is a JSON-lines
+stream:
+
+    {"format": "culinary_compass.delta", "since": 120, "revision": 245}
+    {"table": "recipes", "op": "upsert", "row": {...}}
+    {"table": "recipe_tags", "op": "delete", "key": [3, 7]}
+
+Exports select only rows and tombstones with revision > since through the
+revision indexes, so their cost follows the size of the change rather than
+the size of the catalog.
+"""
+import json
+from collections import namedtuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from .models import Base, TRACKED_TABLES, sync_state, sync_tombstones
+
+DELTA_FORMAT = "culinary_compass.delta"
+
+SyncStats = namedtuple("SyncStats", ["upserts", "deletes", "revision"])
+
+# Rows per executemany when applying
+APPLY_BATCH_SIZE = 5000
+
+
+def current_revision(conn):
+    """Return the database's current revision counter"""
+    return conn.execute(select(sync_state.c.revision).where(sync_state.c.id == 1)).scalar() or 0
+
+
+def _data_columns(table):
+    """Columns copied between databases: everything except revision and generated columns"""
+    return [column for column in table.columns if column.name != "revision" and column.computed is None]
+
+
+def export_changes(engine, out, since=0):
+    """
+    Write every change after revision `since` to the file-like `out`.
+
+    Runs in one read transaction so the delta is consistent. Returns a
+    SyncStats whose revision is the value to pass as `since` next time.
+    """
+    upserts = deletes = 0
+    with engine.begin() as conn:
+        revision = current_revision(conn)
+        out.write(json.dumps({"format": DELTA_FORMAT, "since": since, "revision": revision}) + "\n")
+
+        for table_name in TRACKED_TABLES:
+            table = Base.metadata.tables[table_name]
+            columns = _data_columns(table)
+            names = [column.name for column in columns]
+            query = select(*columns).where(table.c.revision > since).order_by(table.c.revision)
+            for row in conn.execution_options(yield_per=5000).execute(query):
+                out.write(json.dumps({"table": table_name, "op": "upsert", "row": dict(zip(names, row))}) + "\n")
+                upserts += 1
+
+        tombstones = select(sync_tombstones.c.table_name, sync_tombstones.c.row_key).where(
+            sync_tombstones.c.revision > since
+        ).order_by(sync_tombstones.c.revision)
+        for table_name, row_key in conn.execute(tombstones):
+            key = [int(part) for part in row_key.split(",")]
+            out.write(json.dumps({"table": table_name, "op": "delete", "key": key}) + "\n")
+            deletes += 1
+
+    return SyncStats(upserts, deletes, revision)
+
+
+def apply_changes(engine, stream):
+    """
+    Apply a delta produced by export_changes, in a single transaction.
+
+    Deletes run first (children before parents), then upserts (parents before
+    children). A row that was deleted and re-created after `since` appears as
+    both, and ends up present, as it is on the source.
+    """
+    lines = iter(stream)
+    header = json.loads(next(lines))
+    if header.get("format") != DELTA_FORMAT:
+        raise ValueError("Not a culinary_compass delta")
+
+    upserts = {table_name: [] for table_name in TRACKED_TABLES}
+    deletes = {table_name: [] for table_name in TRACKED_TABLES}
+    for line in lines:
+        if not line.strip():
+            continue
+        change = json.loads(line)
+        if change["table"] not in TRACKED_TABLES:
+            raise ValueError(f"Unknown table '{change['table']}' in delta")
+        if change["op"] == "upsert":
+            upserts[change["table"]].append(change["row"])
+        else:
+            deletes[change["table"]].append(change["key"])
+
+    with engine.begin() as conn:
+        for table_name in reversed(list(TRACKED_TABLES)):
+            table = Base.metadata.tables[table_name]
+            key_columns = [table.c[name] for name in TRACKED_TABLES[table_name]]
+            for key in deletes[table_name]:
+                conn.execute(table.delete().where(*(column == value for column, value in zip(key_columns, key))))
+
+        for table_name, key_names in TRACKED_TABLES.items():
+            rows = upserts[table_name]
+            if not rows:
+                continue
+            table = Base.metadata.tables[table_name]
+            statement = insert(table)
+            updates = {
+                column.name: statement.excluded[column.name]
+                for column in _data_columns(table)
+                if column.name not in key_names
+            }
+            if updates:
+                statement = statement.on_conflict_do_update(index_elements=key_names, set_=updates)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=key_names)
+            for start in range(0, len(rows), APPLY_BATCH_SIZE):
+                conn.execute(statement, rows[start:start + APPLY_BATCH_SIZE])
+
+    return SyncStats(
+        sum(len(rows) for rows in upserts.values()),
+        sum(len(keys) for keys in deletes.values()),
+        header["revision"],
+    )
@@ -0,0 +1,90 @@
+from sqlalchemy import select
+
+from .models import Recipe, Tag, recipe_tags
+
+# Bit positions set in each possible byte value, used to decode bitmaps quickly
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def _bitmap_from_ids(ids, size):
+    """Build a bitmap (a Python int) with the bit for every id set"""
+    bits = bytearray((size >> 3) + 1)
+    for recipe_id in ids:
+        bits[recipe_id >> 3] |= 1 << (recipe_id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def ids_from_bitmap(bitmap):
+    """Return the sorted list of ids whose bit is set in the bitmap"""
+    data = bitmap.to_bytes((bitmap.bit_length() >> 3) + 1, "little")
+    ids = []
+    for index, value in enumerate(data):
+        if value:
+            base = index << 3
+            ids.extend(base + bit for bit in _BYTE_BITS[value])
+    return ids
+
+
+class TagIndex:
+    """
+    In-memory bitmap index over recipe tags.
+
+    Each tag maps to a bitmap, held as a Python int, with bit N set when
+    recipe N carries the tag. AND/OR/NOT tag queries then become single
+    big-integer operations that run in C, whatever the number of recipes.
+    """
+
+    def __init__(self, bitmaps, universe):
+        self.bitmaps = bitmaps  # lower-cased tag name -> bitmap
+        self.universe = universe  # bitmap of every recipe id
+
+    @classmethod
+    def build(cls, session):
+        """Build the index from the recipe_tags table in one pass"""
+        max_id = session.query(Recipe.id).order_by(Recipe.id.desc()).limit(1).scalar() or 0
+        universe = _bitmap_from_ids(
+            (row[0] for row in session.execute(select(Recipe.id)).yield_per(10000)),
+            max_id,
+        )
+
+        tag_names = {tag_id: name.lower() for tag_id, name in session.query(Tag.id, Tag.name)}
+        members = {tag_id: [] for tag_id in tag_names}
+        rows = session.execute(select(recipe_tags.c.tag_id, recipe_tags.c.recipe_id)).yield_per(10000)
+        for tag_id, recipe_id in rows:
+            members[tag_id].append(recipe_id)
+
+        # Tags are matched case-insensitively, so same-named tags are merged
+        bitmaps = {}
+        for tag_id, ids in members.items():
+            name = tag_names[tag_id]
+            bitmaps[name] = bitmaps.get(name, 0) | _bitmap_from_ids(ids, max_id)
+        return cls(bitmaps, universe)
+
+    def bitmap(self, name):
+        """Bitmap for one tag (empty if the tag doesn't exist)"""
+        return self.bitmaps.get(name.lower(), 0)
+
+    def query(self, all_tags=(), any_tags=(), not_tags=()):
+        """
+        Return a bitmap of recipes carrying every tag in `all_tags`, at least
+        one tag in `any_tags` and none of `not_tags`. Empty groups are ignored.
+        """
+        result = self.universe
+        for name in all_tags:
+            result &= self.bitmap(name)
+        if any_tags:
+            either = 0
+            for name in any_tags:
+                either |= self.bitmap(name)
+            result &= either
+        for name in not_tags:
+            result &= ~self.bitmap(name)
+        return result
+
+    def recipe_ids(self, all_tags=(), any_tags=(), not_tags=()):
+        """Like query(), but return the matching recipe ids"""
+        return ids_from_bitmap(self.query(all_tags, any_tags, not_tags))
+
+    def count(self, all_tags=(), any_tags=(), not_tags=()):
+        """Number of recipes matching the query"""
+        return bin(self.query(all_tags, any_tags, not_tags)).count("1")
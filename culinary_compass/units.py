@@ -0,0 +1,70 @@
+"""
+Unit conversion for quantities stored on recipe lines.
+
+Every unit maps to a dimension and a factor to that dimension's base unit:
+mass units convert to grams, volume units to millilitres, and lines with
+no unit (or "piece") are counts. Units that can't be converted (cloves,
+cans, pinches...) are their own dimension with factor 1, so they only
+combine with the same unit.
+"""
+from sqlalchemy import text
+
+from .parser import UNIT_ALIASES
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+
+# Canonical unit -> (dimension, size in the dimension's base unit)
+CONVERSIONS = {
+    "mg": (MASS, 0.001),
+    "g": (MASS, 1.0),
+    "kg": (MASS, 1000.0),
+    "oz": (MASS, 28.349523125),
+    "lb": (MASS, 453.59237),
+    "ml": (VOLUME, 1.0),
+    "l": (VOLUME, 1000.0),
+    "tsp": (VOLUME, 4.92892159375),
+    "tbsp": (VOLUME, 14.78676478125),
+    "fl oz": (VOLUME, 29.5735295625),
+    "cup": (VOLUME, 236.5882365),
+    "pint": (VOLUME, 473.176473),
+    "quart": (VOLUME, 946.352946),
+    "gallon": (VOLUME, 3785.411784),
+    "piece": (COUNT, 1.0),
+    "": (COUNT, 1.0),
+}
+
+
+def canonical_unit(unit):
+    """Canonical spelling of a stored unit ("cups" -> "cup"); unknown units are lowercased"""
+    text = (unit or "").strip().lower()
+    return UNIT_ALIASES.get(text, text)
+
+
+def unit_basis(unit):
+    """Return (dimension, factor) for a unit, where quantity * factor is in base units"""
+    unit = canonical_unit(unit)
+    return CONVERSIONS.get(unit, (unit, 1.0))
+
+
+def unit_table():
+    """(spelling, dimension, factor) for every known spelling, for joining in SQL"""
+    spellings = set(UNIT_ALIASES) | set(UNIT_ALIASES.values()) | {""}
+    return [(spelling, *unit_basis(spelling)) for spelling in sorted(spellings)]
+
+
+def load_unit_table(conn):
+    """
+    Fill the connection-local unit_factors table (spelling, dimension,
+    factor) so set-based SQL can join recipe lines to their conversions.
+    """
+    conn.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS unit_factors "
+        "(spelling TEXT PRIMARY KEY, dimension TEXT NOT NULL, factor REAL NOT NULL)"
+    ))
+    conn.execute(text("DELETE FROM unit_factors"))
+    conn.execute(
+        text("INSERT INTO unit_factors (spelling, dimension, factor) VALUES (:spelling, :dimension, :factor)"),
+        [{"spelling": s, "dimension": d, "factor": f} for s, d, f in unit_table()],
+    )
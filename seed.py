@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient, Category, create_tables
+from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient, Category, Tag, create_tables
 
 def seed_database():
     """
@@ -17,9 +17,14 @@ def seed_database():
         "Lunch": Category.create(session, name="Lunch"),
         "Dinner": Category.create(session, name="Dinner"),
         "Dessert": Category.create(session, name="Dessert"),
-        "Appetizer": Category.create(session, name="Appetizer"),
-        "Vegetarian": Category.create(session, name="Vegetarian"),
-        "Vegan": Category.create(session, name="Vegan")
+        "Appetizer": Category.create(session, name="Appetizer")
+    }
+
+    # Create tags for dietary and other labels that cut across categories
+    tags = {
+        "Vegetarian": Tag.create(session, name="Vegetarian"),
+        "Vegan": Tag.create(session, name="Vegan"),
+        "Quick": Tag.create(session, name="Quick")
     }
 
     # Create common ingredients that can be used in recipes
@@ -53,6 +58,10 @@ def seed_database():
     RecipeIngredient.create(session, recipe_id=pancakes.id, ingredient_id=ingredients["Sugar"].id, quantity=3, unit="tbsp")
     # ... other recipe ingredients ...
 
+    # Tag recipes with any labels that apply
+    pancakes.tags.extend([tags["Vegetarian"], tags["Quick"]])
+    session.commit()
+
     session.close()
     print("Database seeded successfully!")
 
@@ -1,5 +1,11 @@
 #!/usr/bin/env python3
-from culinary_compass.models import Session, Recipe, Ingredient, Category, RecipeIngredient
+import argparse
+
+from sqlalchemy.orm import undefer_group
+
+from culinary_compass.memprofile import MemoryProfiler, append_report, format_report
+from culinary_compass.models import Session, Recipe, Ingredient, Category, RecipeIngredient, RecipeHistory
+from culinary_compass.search import RecipeFilter
 
 def show_all_data():
     """Display essential data from the database with key relationships."""
@@ -261,7 +267,7 @@ def update_recipe():
     # Get recipe ID to update
     try:
         recipe_id = int(input("\nEnter ID of recipe to update: "))
-        recipe = session.query(Recipe).filter_by(id=recipe_id).first()
+        recipe = session.query(Recipe).options(undefer_group("text")).filter_by(id=recipe_id).first()
 
         if not recipe:
             print(f"Recipe with ID {recipe_id} not found.")
@@ -307,7 +313,8 @@ def update_recipe():
         category_id_input = input(f"Category ID (current: {recipe.category_id}): ")
         category_id = int(category_id_input) if category_id_input else recipe.category_id
 
-        # Update recipe
+        # Save the current version to the history, then update recipe
+        RecipeHistory.record(session, recipe.id)
         recipe.name = name
         recipe.description = description
         recipe.prep_time = prep_time
@@ -398,22 +405,9 @@ def search_recipes():
         recipes = session.query(Recipe).filter(Recipe.name.ilike(f"%{name}%")).all()
     elif choice == "2":
         ingredient_name = input("Enter ingredient name to search: ")
-        # Find ingredients matching the search term
-        ingredients = session.query(Ingredient).filter(Ingredient.name.ilike(f"%{ingredient_name}%")).all()
-        if not ingredients:
-            print(f"No ingredients found matching '{ingredient_name}'")
-            session.close()
-            return
-
-        # Get recipe IDs that use these ingredients
-        recipe_ids = set()
-        for ingredient in ingredients:
-            ris = session.query(RecipeIngredient).filter_by(ingredient_id=ingredient.id).all()
-            for ri in ris:
-                recipe_ids.add(ri.recipe_id)
-
-        # Get the recipes
-        recipes = session.query(Recipe).filter(Recipe.id.in_(recipe_ids)).all()
+        # One query with an EXISTS subquery, instead of a query per matched ingredient
+        recipe_filter = RecipeFilter(ingredients=[ingredient_name])
+        recipes = recipe_filter.apply(session.query(Recipe)).all()
     elif choice == "3":
         category_name = input("Enter category name to search: ")
         # Find categories matching the search term
@@ -460,7 +454,7 @@ def view_recipe_details():
     # Get recipe ID to view
     try:
         recipe_id = int(input("\nEnter ID of recipe to view: "))
-        recipe = session.query(Recipe).filter_by(id=recipe_id).first()
+        recipe = session.query(Recipe).options(undefer_group("text")).filter_by(id=recipe_id).first()
 
         if not recipe:
             print(f"Recipe with ID {recipe_id} not found.")
@@ -502,7 +496,33 @@ def view_recipe_details():
     finally:
         session.close()
 
-def main_menu():
+# Menu choices and the functions they run
+MENU_ACTIONS = {
+    "1": show_all_data,
+    "2": add_recipe,
+    "3": delete_recipe,
+    "4": show_categories,
+    "5": show_ingredients,
+    "6": add_category,
+    "7": add_ingredient,
+    "8": update_recipe,
+    "9": search_recipes,
+    "10": view_recipe_details,
+}
+
+def run_action(action, memprofile=False, memprofile_json=None):
+    """Run a menu action, under the memory profiler if asked (see culinary_compass/memprofile.py)."""
+    if not (memprofile or memprofile_json):
+        action()
+        return
+    with MemoryProfiler(action.__name__) as profiler:
+        action()
+    if memprofile:
+        print(format_report(profiler.report))
+    if memprofile_json:
+        append_report(profiler.report, memprofile_json)
+
+def main_menu(memprofile=False, memprofile_json=None):
     """Display a menu to choose between viewing data and adding a recipe."""
     while True:
         print("\n=== CULINARY COMPASS MENU ===")
@@ -520,26 +540,8 @@ def main_menu():
 
         choice = input("\nEnter your choice (1-11): ")
 
-        if choice == "1":
-            show_all_data()
-        elif choice == "2":
-            add_recipe()
-        elif choice == "3":
-            delete_recipe()
-        elif choice == "4":
-            show_categories()
-        elif choice == "5":
-            show_ingredients()
-        elif choice == "6":
-            add_category()
-        elif choice == "7":
-            add_ingredient()
-        elif choice == "8":
-            update_recipe()
-        elif choice == "9":
-            search_recipes()
-        elif choice == "10":
-            view_recipe_details()
+        if choice in MENU_ACTIONS:
+            run_action(MENU_ACTIONS[choice], memprofile, memprofile_json)
         elif choice == "11":
             print("Exiting program. Goodbye!")
             break
@@ -547,4 +549,10 @@ def main_menu():
             print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Interactive Culinary Compass menu")
+    parser.add_argument("--memprofile", action="store_true",
+                        help="Report peak memory, top allocation sites and ORM objects loaded by each action")
+    parser.add_argument("--memprofile-json", metavar="FILE",
+                        help="Append each action's memory report to a JSON Lines file (implies profiling)")
+    args = parser.parse_args()
+    main_menu(args.memprofile, args.memprofile_json)
@@ -0,0 +1,96 @@
+"""
+Shared test fixtures.
+
+Every test runs against a throwaway SQLite database instead of
+culinary_compass.db. The global `Session` factory is bound to a connection
+whose outer transaction is rolled back after each test, so model methods
+can commit freely and the suite stays hermetic. Databases live under
+pytest's tmp_path_factory, which gives each pytest-xdist worker its own
+directory, so the suite can run in parallel with `pytest -n auto`.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from culinary_compass.models import Base, Session, engine as default_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from catalog import build_catalog
+
+# Recipes in the scaled catalog used by performance tests (override with CC_TEST_SCALE)
+SCALE = int(os.environ.get("CC_TEST_SCALE", "10000"))
+
+
+def make_engine(path):
+    """
+    Create a SQLite engine tuned for tests.
+
+    pysqlite's own transaction handling breaks SAVEPOINT, so it is switched
+    off and BEGIN is emitted explicitly. Durability isn't needed in tests, so
+    fsyncs are skipped too.
+    """
+    test_engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(test_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.close()
+
+    @event.listens_for(test_engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return test_engine
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "performance: tests that run against the scaled catalog")
+
+
+@pytest.fixture(scope="session")
+def test_engine(tmp_path_factory):
+    """Engine for this worker's empty test database, with all tables created"""
+    test_engine = make_engine(tmp_path_factory.mktemp("db") / "test.db")
+    Base.metadata.create_all(test_engine)
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def db_connection(test_engine):
+    """
+    Bind the global Session to a connection inside a transaction that is
+    rolled back after the test. Session commits become savepoint releases.
+    """
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session.configure(bind=connection, join_transaction_mode="create_savepoint")
+    yield connection
+    Session.configure(bind=default_engine, join_transaction_mode="conservative_savepoint")
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def session(db_connection):
+    """A Session on the test connection, closed after the test"""
+    test_session = Session()
+    yield test_session
+    test_session.close()
+
+
+@pytest.fixture(scope="session")
+def scaled_engine(tmp_path_factory):
+    """Engine for a read-only catalog of SCALE synthetic recipes, built once per worker"""
+    path = tmp_path_factory.mktemp("scaled") / "scaled.db"
+    scaled = build_catalog(str(path), SCALE)
+    scaled.dispose()
+    scaled = make_engine(path)
+    yield scaled
+    scaled.dispose()
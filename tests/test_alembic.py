@@ -0,0 +1,105 @@
+"""
+Unit tests for the alembic revisions, run against copies of the committed database.
+"""
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from sqlalchemy import create_engine
+from culinary_compass.models import Base
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class TestAlembicRevisions(unittest.TestCase):
+    """
+    Test case for upgrading an unmigrated database.
+    """
+    def setUp(self):
+        """
+        Copy the committed database, which predates the revisions, into a temporary directory.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+        """
+        self.tmp.cleanup()
+
+    def copy_database(self, name):
+        path = os.path.join(self.tmp.name, f"{name}.db")
+        shutil.copy(os.path.join(ROOT, "culinary_compass.db"), path)
+        return path
+
+    def alembic(self, path, *args):
+        """Run alembic against the database at `path`, with the repository's revisions"""
+        config = os.path.join(self.tmp.name, "alembic.ini")
+        with open(os.path.join(ROOT, "alembic.ini")) as f:
+            lines = f.read().splitlines()
+        with open(config, "w") as f:
+            for line in lines:
+                if line.startswith("script_location"):
+                    line = f"script_location = {os.path.join(ROOT, 'alembic')}"
+                elif line.startswith("sqlalchemy.url"):
+                    line = f"sqlalchemy.url = sqlite:///{path}"
+                f.write(line + "\n")
+        result = subprocess.run([sys.executable, "-m", "alembic", "-c", config, *args],
+                                cwd=self.tmp.name, capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": ROOT})
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def query(self, path, sql):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def schema(self, path):
+        return self.query(path, "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY 1, 2")
+
+    def test_categories_become_tags(self):
+        """
+        Test that the tags revision turns each category name into one tag, carried by the recipes in those categories.
+        """
+        path = self.copy_database("tags")
+        self.alembic(path, "upgrade", "c92e61d4a7f0")
+
+        categories = self.query(path, "SELECT DISTINCT name FROM categories ORDER BY name")
+        self.assertTrue(categories)
+        self.assertEqual(self.query(path, "SELECT name FROM tags ORDER BY name"), categories)
+        categorised = self.query(path, "SELECT r.id, c.name FROM recipes AS r "
+                                       "JOIN categories AS c ON c.id = r.category_id ORDER BY 1")
+        self.assertTrue(categorised)
+        self.assertEqual(self.query(path, "SELECT rt.recipe_id, t.name FROM recipe_tags AS rt "
+                                          "JOIN tags AS t ON t.id = rt.tag_id ORDER BY 1"), categorised)
+
+        self.alembic(path, "downgrade", "5d8b7f3e2c64")
+        self.assertEqual(self.query(path, "SELECT name FROM sqlite_master WHERE name IN ('tags', 'recipe_tags')"), [])
+
+    def test_upgrade_after_create_tables(self):
+        """
+        Test that a database the app already ran create_tables() on upgrades to the same schema as one that didn't.
+        """
+        migrated = self.copy_database("migrated")
+        self.alembic(migrated, "upgrade", "head")
+
+        path = self.copy_database("created")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+        self.alembic(path, "upgrade", "head")
+
+        self.assertEqual(self.schema(path), self.schema(migrated))
+        self.assertEqual(self.query(path, "SELECT * FROM alembic_version"),
+                         self.query(migrated, "SELECT * FROM alembic_version"))
+        self.assertEqual(self.query(path, "SELECT count(*) FROM recipe_tags"),
+                         self.query(migrated, "SELECT count(*) FROM recipe_tags"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for online backup and restore.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from culinary_compass.backup import BackupError, backup_database, restore_database
+
+
+class TestBackup(unittest.TestCase):
+    """
+    Test case for backing up a database that is being written to, and restoring it.
+    """
+    def setUp(self):
+        """
+        Create a database large enough to need several backup steps.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "source.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+        conn.executemany("INSERT INTO notes (body) VALUES (?)", [("x" * 500,)] * 200)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """
+        Remove the temporary files.
+        """
+        self.tmp.cleanup()
+
+    def count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT count(*) FROM notes").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_backup_during_writes(self):
+        """
+        Test that a write committed mid-backup doesn't tear the copy.
+        """
+        writer = sqlite3.connect(self.path)
+        steps = []
+
+        def progress(copied, total):
+            if not steps:
+                writer.execute("INSERT INTO notes (body) VALUES ('late')")
+                writer.commit()
+            steps.append(copied)
+
+        dest = os.path.join(self.tmp.name, "backup.db")
+        stats = backup_database(self.path, dest, pages=4, sleep=0, progress=progress)
+        writer.close()
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(stats.path, dest)
+        self.assertEqual(self.count(dest), 201)
+
+    def test_compressed_round_trip(self):
+        """
+        Test that a compressed backup restores over a changed database.
+        """
+        stats = backup_database(self.path, os.path.join(self.tmp.name, "backup"), compress=True)
+        self.assertTrue(stats.path.endswith(".gz"))
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("DELETE FROM notes")
+        conn.commit()
+        conn.close()
+
+        restore_database(stats.path, self.path)
+        self.assertEqual(self.count(self.path), 200)
+
+    def test_restore_rejects_bad_backup(self):
+        """
+        Test that restoring a file that isn't a database leaves the target alone.
+        """
+        bad = os.path.join(self.tmp.name, "bad.db")
+        with open(bad, "w") as f:
+            f.write("not a database" * 100)
+        with self.assertRaises(BackupError):
+            restore_database(bad, self.path)
+        self.assertEqual(self.count(self.path), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
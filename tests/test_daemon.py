@@ -0,0 +1,77 @@
+"""
+Tests for the command daemon and its thin client.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from culinary_compass.client import send_request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class TestDaemon(unittest.TestCase):
+    """
+    Test case for running commands through a daemon in a temporary directory.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start a daemon whose commands use a fresh database in a temporary directory.
+        """
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.tmp.name, "daemon.sock")
+        env = dict(os.environ, CC_DAEMON_SOCKET=cls.socket_path)
+        cls.daemon = subprocess.Popen([sys.executable, os.path.join(ROOT, "run.py"), "daemon", "start"],
+                                      cwd=cls.tmp.name, env=env, stdout=subprocess.DEVNULL)
+        deadline = time.time() + 30
+        while not os.path.exists(cls.socket_path) and time.time() < deadline:
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stop the daemon and remove the temporary directory.
+        """
+        send_request({"control": "stop"}, cls.socket_path)
+        cls.daemon.wait(timeout=10)
+        cls.tmp.cleanup()
+
+    def run_command(self, *argv):
+        """
+        Run a command through the daemon, returning its exit code and output.
+        """
+        read_end, write_end = os.pipe()
+        with open(os.devnull) as stdin:
+            request = {"argv": list(argv), "cwd": self.tmp.name, "env": {"COLUMNS": "120"}}
+            code = send_request(request, self.socket_path, fds=(stdin.fileno(), write_end, write_end))
+        os.close(write_end)
+        with os.fdopen(read_end) as output:
+            return code, output.read()
+
+    def test_commands_share_the_database(self):
+        """
+        Test that writes and reads through the daemon hit the client directory's database.
+        """
+        code, output = self.run_command("tag", "add", "--name", "Daemon")
+        self.assertEqual(code, 0)
+        self.assertIn("added successfully", output)
+
+        code, output = self.run_command("--format", "tsv", "tag", "list")
+        self.assertEqual(code, 0)
+        self.assertIn("Daemon", output)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "culinary_compass.db")))
+
+    def test_exit_code(self):
+        """
+        Test that usage errors come back as the command's exit code.
+        """
+        code, output = self.run_command("no-such-command")
+        self.assertEqual(code, 2)
+        self.assertIn("No such command", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Unit tests for federated search across several databases.
+"""
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, insert
+from culinary_compass.models import Base, Recipe, Category
+from culinary_compass.federation import search_shards, shard_labels
+from culinary_compass.search import RecipeFilter
+
+
+class TestFederation(unittest.TestCase):
+    """
+    Test case for merging, de-duplicating and labelling results from several kitchens.
+    """
+    def setUp(self):
+        """
+        Create two kitchen databases that share one recipe.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for kitchen, recipes in [
+            ("north", [("Pancakes", 25), ("Stew", 90), ("Toast", 5)]),
+            ("south", [("Curry", 45), ("pancakes", 25)]),
+        ]:
+            path = os.path.join(self.tmp.name, f"{kitchen}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(insert(Category.__table__), [{"id": 1, "name": "Main"}])
+                conn.execute(insert(Recipe.__table__), [
+                    {"name": name, "prep_time": minutes, "cook_time": 0, "serving_size": 2, "category_id": 1}
+                    for name, minutes in recipes
+                ])
+            engine.dispose()
+            self.paths.append(path)
+
+    def tearDown(self):
+        """
+        Remove the temporary databases.
+        """
+        self.tmp.cleanup()
+
+    def test_merged_sorted_and_deduplicated(self):
+        """
+        Test that rows come back in sort order, with shared recipes listed once under both kitchens.
+        """
+        result = search_shards(self.paths, RecipeFilter(sort="time"))
+        self.assertEqual([(row[0], row[2], row[6]) for row in result.rows], [
+            ("north", "Toast", 5),
+            ("north, south", "Pancakes", 25),
+            ("south", "Curry", 45),
+            ("north", "Stew", 90),
+        ])
+
+        result = search_shards(self.paths, RecipeFilter(max_time=60, sort="time", descending=True))
+        self.assertEqual([row[2].lower() for row in result.rows], ["curry", "pancakes", "toast"])
+
+    def test_failed_shard_is_reported(self):
+        """
+        Test that a missing database is reported without affecting the others or being created.
+        """
+        missing = os.path.join(self.tmp.name, "west.db")
+        result = search_shards(self.paths + [missing], RecipeFilter(name="Stew"))
+        self.assertEqual([row[2] for row in result.rows], ["Stew"])
+        self.assertEqual([shard.error is None for shard in result.shards], [True, True, False])
+        self.assertFalse(os.path.exists(missing))
+
+    def test_shard_labels(self):
+        """
+        Test that clashing file names fall back to full paths.
+        """
+        self.assertEqual(shard_labels(["a/x.db", "b/y.db"]), ["x", "y"])
+        self.assertEqual(shard_labels(["a/x.db", "b/x.db"]), ["a/x.db", "b/x.db"])
+
+
+if __name__ == '__main__':
+    unittest.main()
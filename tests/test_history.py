@@ -0,0 +1,125 @@
+"""
+Unit tests for recipe history and content-addressed text blobs.
+"""
+import unittest
+
+from sqlalchemy import event, func, select
+
+from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient, RecipeHistory, text_blobs
+
+
+class TestHistory(unittest.TestCase):
+    """
+    Test case for saving, loading and reverting recipe versions.
+    """
+    def setUp(self):
+        """
+        Create a recipe with long instructions and two ingredient lines.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.instructions = "Knead the dough for ten minutes. " * 100
+        self.recipe = Recipe.create(self.session, name="Bread", description="Crusty", prep_time=20, cook_time=40,
+                                    serving_size=8, instructions=self.instructions)
+        RecipeIngredient.create_many(self.session, self.recipe.id, [(500, "g", "Flour"), (1, None, "Salt")])
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def blob_count(self):
+        return self.session.execute(select(func.count()).select_from(text_blobs)).scalar()
+
+    def test_updates_save_versions_sharing_text(self):
+        """
+        Each update saves the previous state; unchanged text is stored once,
+        and an update that changes nothing saves no version.
+        """
+        Recipe.update(self.session, self.recipe.id, prep_time=25)
+        self.assertEqual(self.blob_count(), 3)
+        Recipe.update(self.session, self.recipe.id, description="Crusty and light")
+        Recipe.update(self.session, self.recipe.id, description="Crusty and light")
+
+        versions = RecipeHistory.get_for_recipe(self.session, self.recipe.id)
+        self.assertEqual([version.prep_time for version in versions], [25, 20])
+        self.assertEqual(versions[0].instructions_hash, versions[1].instructions_hash)
+        self.assertEqual(self.blob_count(), 3)
+
+        Recipe.update(self.session, self.recipe.id, description="Crusty, light and airy")
+        latest = RecipeHistory.get_for_recipe(self.session, self.recipe.id)[0]
+        self.assertNotEqual(latest.description_hash, versions[0].description_hash)
+        # Only the new version's description was added
+        self.assertEqual(self.blob_count(), 4)
+
+        oldest = RecipeHistory.load(self.session, self.recipe.id, versions[1].id)
+        self.assertEqual((oldest.description, oldest.instructions), ("Crusty", self.instructions))
+        self.assertIsNone(RecipeHistory.load(self.session, self.recipe.id + 1, versions[1].id))
+
+    def test_revert_restores_fields_and_lines(self):
+        """
+        Reverting restores the text, fields and lines, and saves the replaced
+        state so the revert can itself be undone.
+        """
+        Recipe.update(self.session, self.recipe.id, name="Flatbread", instructions="Fry it.")
+        version_id = RecipeHistory.get_for_recipe(self.session, self.recipe.id)[0].id
+        RecipeIngredient.create_many(self.session, self.recipe.id, [(2, "tbsp", "Oil")])
+
+        result = RecipeHistory.revert(self.session, self.recipe.id, version_id)
+        self.assertEqual((result.version.id, result.skipped), (version_id, 0))
+
+        recipe = Recipe.get_by_id(self.session, self.recipe.id, with_text=True)
+        self.assertEqual((recipe.name, recipe.instructions), ("Bread", self.instructions))
+        lines = sorted((line.ingredient.name, line.quantity) for line in recipe.ingredients)
+        self.assertEqual(lines, [("Flour", 500), ("Salt", 1)])
+
+        replaced = RecipeHistory.get_for_recipe(self.session, self.recipe.id)[0]
+        self.assertEqual(RecipeHistory.load(self.session, self.recipe.id, replaced.id).name, "Flatbread")
+        self.assertIsNone(RecipeHistory.revert(self.session, self.recipe.id, version_id + 100))
+
+    def test_load_and_revert_take_constant_queries(self):
+        """
+        Loading a version is one query and reverting a fixed number, however
+        long the history and however many lines the recipe has.
+        """
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            # Transaction control (BEGIN, SAVEPOINT, ...) isn't a query
+            if statement.startswith(("SELECT", "INSERT", "UPDATE", "DELETE")):
+                statements.append(statement)
+
+        def count(action):
+            self.session.expire_all()
+            statements.clear()
+            engine = self.session.get_bind()
+            event.listen(engine, "before_cursor_execute", record)
+            try:
+                action()
+            finally:
+                event.remove(engine, "before_cursor_execute", record)
+            return len(statements)
+
+        # Read up front: count() expires the recipe
+        recipe_id = self.recipe.id
+        Recipe.update(self.session, recipe_id, serving_size=4)
+        first = RecipeHistory.get_for_recipe(self.session, recipe_id)[0].id
+        small = (count(lambda: RecipeHistory.load(self.session, recipe_id, first)),
+                 count(lambda: RecipeHistory.revert(self.session, recipe_id, first)))
+
+        for size in range(5, 25):
+            Recipe.update(self.session, recipe_id, serving_size=size)
+        RecipeIngredient.create_many(self.session, recipe_id, [(1, "g", f"Spice {i}") for i in range(50)])
+        Recipe.update(self.session, recipe_id, serving_size=2)
+        latest = RecipeHistory.get_for_recipe(self.session, recipe_id)[0].id
+        large = (count(lambda: RecipeHistory.load(self.session, recipe_id, latest)),
+                 count(lambda: RecipeHistory.revert(self.session, recipe_id, latest)))
+
+        self.assertEqual(small[0], 1)
+        self.assertEqual(small, large)
+        self.assertEqual(len(Ingredient.get_by_name(self.session, "Spice 0").recipe_ingredients), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Unit tests for the bulk recipe importer.
+"""
+import json
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, func, select
+from culinary_compass.models import Base, Recipe, Ingredient, RecipeIngredient, Category
+from culinary_compass.importer import import_recipes, normalize_record, parse_chunk
+
+
+def dump(*records):
+    return [json.dumps(record) if isinstance(record, dict) else record for record in records]
+
+
+class TestImporter(unittest.TestCase):
+    """
+    Test case for validating records and writing them chunk by chunk.
+    """
+    def setUp(self):
+        """
+        Create an empty database with one existing ingredient.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(Ingredient.__table__.insert(), [{"name": "flour"}])
+
+    def tearDown(self):
+        """
+        Dispose of the engine and remove the temporary database.
+        """
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def count(self, model):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+    def test_normalize_record(self):
+        """
+        Test that text and object ingredient entries become (quantity, unit, name) lines.
+        """
+        fields, category, lines = normalize_record(json.dumps({
+            "name": " Pancakes ", "category": "Breakfast", "servings": "4",
+            "ingredients": ["2 eggs", {"quantity": 250, "unit": "g", "name": " flour "}],
+        }))
+        self.assertEqual((fields["name"], fields["serving_size"], category), ("Pancakes", 4, "Breakfast"))
+        self.assertEqual(lines[1], (250.0, "g", "flour"))
+        self.assertEqual(len(lines), 2)
+
+    def test_bad_records_are_rejected(self):
+        """
+        Test that records with wrongly typed fields raise ValueError rather than AttributeError.
+        """
+        bad = [
+            "not json",
+            "[1, 2]",
+            {"name": 5},
+            {"name": "   "},
+            {"name": "x", "category": 3},
+            {"name": "x", "description": ["long"]},
+            {"name": "x", "ingredients": [5]},
+            {"name": "x", "ingredients": "2 eggs"},
+            {"name": "x", "ingredients": [{"quantity": 1}]},
+            {"name": "x", "ingredients": [{"name": 7}]},
+        ]
+        for text in dump(*bad):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    normalize_record(text)
+
+    def test_parse_chunk_counts_skipped(self):
+        """
+        Test that a chunk keeps its good records and counts the bad ones, ignoring blank lines.
+        """
+        records, errors = parse_chunk(dump(
+            {"name": "Toast", "ingredients": ["1 slice bread"]},
+            {"name": 5},
+            "",
+            {"name": "x", "category": 3},
+            {"name": "x", "ingredients": [5]},
+            {"name": "Tea", "prep_time": "soon"},
+            {"name": "Water"},
+        ))
+        self.assertEqual([fields["name"] for fields, _, _ in records], ["Toast", "Water"])
+        self.assertEqual(errors, 4)
+
+    def test_import_commits_each_chunk(self):
+        """
+        Test that every chunk is committed before the next is read, and bad records are skipped.
+        """
+        lines = dump(
+            {"name": "Pancakes", "category": "Breakfast",
+             "ingredients": ["250 g flour", "1 tsp salt", "1 tsp salt"]},
+            {"name": 5},
+            {"name": "Porridge", "category": "Breakfast", "ingredients": ["1 cup oats"]},
+            {"name": "x", "ingredients": [5]},
+            {"name": "Bread", "ingredients": ["500 g flour"]},
+        )
+        committed = []
+
+        def progress(stats):
+            committed.append((stats.recipes, stats.errors, self.count(Recipe)))
+
+        stats = import_recipes(self.engine, lines, workers=1, chunk_size=2, progress=progress)
+        self.assertEqual((stats.recipes, stats.lines, stats.errors), (3, 5, 2))
+        self.assertEqual(committed, [(1, 1, 1), (2, 2, 2), (3, 2, 3)])
+
+        self.assertEqual(self.count(Category), 1)
+        # Existing ingredients are reused; the two salt lines are summed into one
+        self.assertEqual(self.count(Ingredient), 3)
+        self.assertEqual(self.count(RecipeIngredient), 4)
+
+    def test_import_folds_name_case(self):
+        """
+        Test that category and ingredient names differing only in case resolve to one row, within and across chunks.
+        """
+        lines = dump(
+            {"name": "Pancakes", "category": "Breakfast", "ingredients": ["250 g Flour", "1 tsp Salt"]},
+            {"name": "Scones", "category": "breakfast", "ingredients": ["1 tsp salt", "2 tsp SALT"]},
+            {"name": "Crepes", "category": "BREAKFAST", "ingredients": ["100 g FLOUR", "1 pinch salt"]},
+        )
+        stats = import_recipes(self.engine, lines, workers=1, chunk_size=2)
+        self.assertEqual((stats.recipes, stats.lines, stats.errors), (3, 6, 0))
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(select(Category.name)).scalars().all(), ["Breakfast"])
+            self.assertEqual(conn.execute(select(Ingredient.name).order_by(Ingredient.id)).scalars().all(),
+                             ["flour", "Salt"])
+            self.assertEqual(len(set(conn.execute(select(Recipe.category_id)).scalars())), 1)
+            scones = conn.execute(
+                select(RecipeIngredient.quantity, RecipeIngredient.unit)
+                .join(Recipe, Recipe.id == RecipeIngredient.recipe_id).where(Recipe.name == "Scones")
+            ).all()
+        # Both salt lines land on the same ingredient, so they are summed
+        self.assertEqual(scones, [(3, "tsp")])
+
+    def test_import_with_workers_keeps_input_order(self):
+        """
+        Test that parsing in a process pool still assigns recipe ids in input order.
+        """
+        names = [f"Recipe {i}" for i in range(7)]
+        lines = dump(*({"name": name} for name in names), {"name": "x", "category": 3})
+        stats = import_recipes(self.engine, lines, workers=2, chunk_size=3, max_pending=1)
+        self.assertEqual((stats.recipes, stats.errors), (7, 1))
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(select(Recipe.name).order_by(Recipe.id)).scalars().all(), names)
+
+
+if __name__ == '__main__':
+    unittest.main()
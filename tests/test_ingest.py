@@ -0,0 +1,118 @@
+"""
+Unit tests for batched ingredient lines: create_many, get_or_create_many and add-to-recipe.
+"""
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from culinary_compass.cli.main import cli
+from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient
+
+
+class TestBatchedLines(unittest.TestCase):
+    """
+    Test case for adding many lines to a recipe in one transaction.
+    """
+    def setUp(self):
+        """
+        Create an empty recipe and one existing ingredient.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.recipe = Recipe.create(self.session, name="Bread")
+        self.recipe_id = self.recipe.id
+        self.flour = Ingredient.create(self.session, name="Flour")
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def lines(self):
+        self.session.expire_all()
+        return sorted(
+            (line.ingredient.name, line.unit or "", line.quantity)
+            for line in RecipeIngredient.get_by_recipe_id(self.session, self.recipe_id)
+        )
+
+    def ingredient_names(self):
+        return sorted(ingredient.name for ingredient in Ingredient.get_all(self.session))
+
+    def add(self, *args, input=None):
+        result = CliRunner().invoke(cli, ["ingredient", "add-to-recipe", str(self.recipe_id), *args], input=input)
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_get_or_create_many_folds_case(self):
+        """
+        Test that names differing only in case resolve to one ingredient, existing or new.
+        """
+        ids = Ingredient.get_or_create_many(self.session, ["flour", "FLOUR", "Yeast", "yeast", "Salt"])
+        self.assertEqual(ids["flour"], self.flour.id)
+        self.assertEqual(ids["FLOUR"], self.flour.id)
+        self.assertEqual(ids["Yeast"], ids["yeast"])
+        self.assertEqual(self.ingredient_names(), ["Flour", "Salt", "Yeast"])
+
+    def test_create_many_commits_once(self):
+        """
+        Test that a batch is written with one insert and committed once, whatever its size.
+        """
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith(("INSERT", "RELEASE", "COMMIT")):
+                statements.append(statement.split()[0])
+
+        engine = self.session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            count = RecipeIngredient.create_many(self.session, self.recipe_id, [
+                (500, "g", "flour"), (1, "tsp", "Salt"), (7, "g", "Yeast"), (100, "g", "Flour"),
+            ])
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(count, 4)
+        # One insert for the new ingredients, one for the lines, one commit
+        self.assertEqual(statements, ["INSERT", "INSERT", "RELEASE"])
+        self.assertEqual(self.lines(), [("Flour", "g", 600), ("Salt", "tsp", 1), ("Yeast", "g", 7)])
+
+    def test_create_many_rolls_back_on_error(self):
+        """
+        Test that a line failing to insert leaves neither lines nor new ingredients behind.
+        """
+        with self.assertRaises(IntegrityError):
+            RecipeIngredient.create_many(self.session, self.recipe_id, [(500, "g", "Flour"), (None, "g", "Sugar")])
+        self.assertEqual(self.lines(), [])
+        self.assertEqual(self.ingredient_names(), ["Flour"])
+
+    def test_add_to_recipe_lines_and_file(self):
+        """
+        Test that --line and --file lines are added together, skipping blanks and comments.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lines.txt")
+            with open(path, "w") as f:
+                f.write("# dry\n1 tsp salt\n\n7 g yeast\n")
+            output = self.add("--line", "500 g flour", "--file", path)
+        self.assertIn("Added 3 ingredients", output)
+        self.add("--file", "-", input="100 g FLOUR\n")
+        self.assertEqual(self.lines(), [("Flour", "g", 600), ("salt", "tsp", 1), ("yeast", "g", 7)])
+
+    def test_add_to_recipe_bad_line_adds_nothing(self):
+        """
+        Test that one unparseable line aborts the whole batch before anything is written.
+        """
+        output = self.add("--line", "500 g flour", "--line", "2")
+        self.assertIn("Line 2", output)
+        self.assertEqual(self.lines(), [])
+        self.assertEqual(self.ingredient_names(), ["Flour"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the per-command memory profiler.
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+from culinary_compass.models import Session, Recipe, Category
+from culinary_compass.memprofile import SAMPLE_INTERVAL, MemoryProfiler, append_report, format_report
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    """
+    Test case for peak memory, allocation sites and ORM load counts.
+    """
+    def setUp(self):
+        """
+        Create a category with a few recipes.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.category_id = Category.create(self.session, name="Soup").id
+        for name in ("Leek Soup", "Pho", "Gazpacho"):
+            Recipe.create(self.session, name=name, prep_time=10, cook_time=20, category_id=self.category_id)
+        self.session.expunge_all()
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def test_report(self):
+        """
+        Test that the report counts loaded objects per class and attributes the peak to its allocation site.
+        """
+        with MemoryProfiler("soups") as profiler:
+            recipes = self.session.query(Recipe).filter_by(category_id=self.category_id).all()
+            self.session.query(Category).all()
+            blob = [bytearray(1024) for _ in range(4096)]
+            # Sites are sampled, so the allocation has to outlive a sampling interval
+            time.sleep(10 * SAMPLE_INTERVAL)
+            del blob
+
+        report = profiler.report
+        self.assertEqual(report["label"], "soups")
+        self.assertEqual(report["orm_loads"]["Recipe"], len(recipes))
+        self.assertGreaterEqual(report["orm_loads"]["Category"], 1)
+        self.assertGreater(report["peak_bytes"], 4 * 1024 * 1024)
+        self.assertLess(report["final_bytes"], report["peak_bytes"])
+        top = report["sites"][0]
+        self.assertEqual(os.path.basename(top["file"]), "test_memprofile.py")
+        self.assertGreater(top["bytes"], 4 * 1024 * 1024)
+
+        text = format_report(report)
+        self.assertIn("memory: soups", text)
+        self.assertIn(f"Recipe {len(recipes)}", text)
+
+    def test_listener_removed(self):
+        """
+        Test that loads after the profiler stops are not counted.
+        """
+        with MemoryProfiler("empty") as profiler:
+            pass
+        self.session.query(Recipe).all()
+        self.assertEqual(profiler.report["orm_loads"], {})
+
+    def test_append_report(self):
+        """
+        Test that reports accumulate as JSON lines.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "memory.jsonl")
+            for label in ("first", "second"):
+                with MemoryProfiler(label) as profiler:
+                    self.session.query(Recipe).all()
+                append_report(profiler.report, path)
+            with open(path) as stream:
+                reports = [json.loads(line) for line in stream]
+        self.assertEqual([report["label"] for report in reports], ["first", "second"])
+        self.assertEqual(reports[1]["orm_loads"], {"Recipe": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
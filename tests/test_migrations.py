@@ -0,0 +1,147 @@
+"""
+Unit tests for the chunked migration helpers, on a generated one-million-row database.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import sqlalchemy as sa
+from sqlalchemy import create_engine
+from culinary_compass.models import Base
+from culinary_compass.migrations import MigrationError, backfill, rebuild_table
+
+ROWS = 1000000
+CHUNK = 50000
+
+
+class Interrupted(Exception):
+    pass
+
+
+def stop_after(chunks):
+    """A progress callback that interrupts the migration after some chunks"""
+    seen = []
+
+    def progress(update):
+        seen.append(update)
+        if len(seen) == chunks:
+            raise Interrupted()
+    return progress
+
+
+class TestChunkedMigrations(unittest.TestCase):
+    """
+    Test case for interrupted and resumed backfills and table rebuilds.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        Generate a database with a million ingredients.
+        """
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.template = os.path.join(cls.tmp.name, "template.db")
+        engine = create_engine(f"sqlite:///{cls.template}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+        conn = sqlite3.connect(cls.template)
+        conn.execute(
+            f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROWS}) "
+            f"INSERT INTO ingredients (name) SELECT ' Ingredient ' || i FROM n"
+        )
+        conn.commit()
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Remove the generated databases.
+        """
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        """
+        Open an autocommit connection to a fresh copy of the generated database.
+        """
+        self.path = os.path.join(self.tmp.name, f"{self._testMethodName}.db")
+        shutil.copy(self.template, self.path)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        self.conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    def tearDown(self):
+        """
+        Close the connection.
+        """
+        self.conn.close()
+        self.engine.dispose()
+
+    def scalar(self, sql):
+        return self.conn.exec_driver_sql(sql).scalar()
+
+    def test_backfill_resumes(self):
+        """
+        Test that an interrupted backfill keeps its committed chunks and finishes the rest on the next run.
+        """
+        rebuild_table(self.conn, "ingredients",
+                      lambda batch: batch.add_column(sa.Column("name_normalized", sa.String(100))),
+                      chunk_size=CHUNK, pause=0, progress=None)
+        set_sql = "name_normalized = lower(trim(name))"
+
+        with self.assertRaises(Interrupted):
+            backfill(self.conn, "ingredients", set_sql, chunk_size=CHUNK, pause=0, progress=stop_after(3))
+        self.assertEqual(self.scalar("SELECT count(name_normalized) FROM ingredients"), 3 * CHUNK)
+        self.assertEqual(self.scalar("SELECT last_key FROM migration_checkpoints"), 3 * CHUNK)
+
+        updated = backfill(self.conn, "ingredients", set_sql, chunk_size=CHUNK, pause=0, progress=None)
+        self.assertEqual(updated, ROWS - 3 * CHUNK)
+        self.assertEqual(self.scalar("SELECT count(*) FROM ingredients WHERE name_normalized IS NULL"), 0)
+        self.assertEqual(self.scalar(f"SELECT name_normalized FROM ingredients WHERE id = {ROWS}"),
+                         f"ingredient {ROWS}")
+        self.assertIsNone(self.scalar("SELECT name FROM sqlite_master WHERE name = 'migration_checkpoints'"))
+
+        updated = backfill(self.conn, "ingredients", transform=lambda row: {"name": row["name"].strip()},
+                           columns=["name"], where="id <= 10", pause=0, progress=None)
+        self.assertEqual(updated, 10)
+        self.assertEqual(self.scalar("SELECT name FROM ingredients WHERE id = 10"), "Ingredient 10")
+
+    def test_rebuild_keeps_concurrent_writes(self):
+        """
+        Test that writes made while a rebuild is interrupted survive the swap, with indexes and triggers.
+        """
+        def alter(batch):
+            batch.add_column(sa.Column("name_normalized", sa.String(100)))
+            batch.drop_column("price_dimension")
+
+        with self.assertRaises(Interrupted):
+            rebuild_table(self.conn, "ingredients", alter, chunk_size=CHUNK, pause=0, progress=stop_after(2))
+        self.conn.exec_driver_sql("UPDATE ingredients SET name = 'Saffron' WHERE id = 5")
+        self.conn.exec_driver_sql(f"DELETE FROM ingredients WHERE id IN (6, {ROWS})")
+        self.conn.exec_driver_sql("INSERT INTO ingredients (name) VALUES ('Sumac')")
+
+        rebuild_table(self.conn, "ingredients", alter, chunk_size=CHUNK, pause=0, progress=None)
+        columns = [row[1] for row in self.conn.exec_driver_sql("PRAGMA table_info(ingredients)")]
+        self.assertIn("name_normalized", columns)
+        self.assertNotIn("price_dimension", columns)
+        self.assertEqual(self.scalar("SELECT count(*) FROM ingredients"), ROWS - 1)
+        self.assertEqual(self.scalar("SELECT name FROM ingredients WHERE id = 5"), "Saffron")
+        self.assertEqual(self.scalar("SELECT count(*) FROM ingredients WHERE name = 'Sumac'"), 1)
+        self.assertIsNone(self.scalar("SELECT name FROM sqlite_master WHERE name LIKE '_rebuild%'"))
+
+        self.assertIsNotNone(self.scalar("SELECT name FROM sqlite_master WHERE name = 'ix_ingredients_revision'"))
+        before = self.scalar("SELECT revision FROM sync_state")
+        self.conn.exec_driver_sql("INSERT INTO ingredients (name) VALUES ('Za''atar')")
+        self.assertEqual(self.scalar("SELECT revision FROM ingredients WHERE name = 'Za''atar'"), before + 1)
+
+    def test_requires_autocommit(self):
+        """
+        Test that the helpers refuse a connection whose transaction they would commit.
+        """
+        with self.engine.connect() as conn:
+            with self.assertRaises(MigrationError):
+                backfill(conn, "ingredients", "name = name")
+        with self.assertRaises(MigrationError):
+            rebuild_table(self.conn, "recipes", lambda batch: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ This module tests the functionality of Recipe, Ingredient, Category, and RecipeI
 """
 import unittest
 from culinary_compass.models import (
-    Session, Recipe, Ingredient, RecipeIngredient, Category, create_tables
+    Session, Recipe, Ingredient, RecipeIngredient, Category
 )
 
 
@@ -16,10 +16,9 @@ class TestRecipeModel(unittest.TestCase):
     def setUp(self):
         """
         Set up the test environment before each test.
-        Creates database tables and initializes a session.
+        Initializes a session on the per-test database set up in conftest.py.
         """
-        # Create a test database in memory
-        create_tables()
+        # Session is bound to a rolled-back test transaction by conftest.py
         self.session = Session()
 
     def tearDown(self):
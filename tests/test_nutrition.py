@@ -0,0 +1,110 @@
+"""
+Unit tests for recipe nutrition totals and their invalidation.
+"""
+import unittest
+from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient, IngredientNutrient
+from culinary_compass.nutrition import get_nutrition, has_stale_nutrition, per_serving, refresh_nutrition
+from culinary_compass.units import unit_basis
+
+
+class TestNutrition(unittest.TestCase):
+    """
+    Test case for computing totals across unit conversions and recomputing them on change.
+    """
+    def setUp(self):
+        """
+        Create a recipe with lines in cups, grams and no unit.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.recipe = Recipe.create(self.session, name="Pancakes", serving_size=4)
+        self.flour = Ingredient.create(self.session, name="Flour")
+        self.egg = Ingredient.create(self.session, name="Egg")
+        self.salt = Ingredient.create(self.session, name="Salt")
+        RecipeIngredient.create_many(self.session, self.recipe.id, [
+            (250, "grams", "Flour"),
+            (2, None, "Egg"),
+            (1, "pinch", "Salt"),
+        ])
+        IngredientNutrient.set(self.session, self.flour.id, "g", 100, kcal=364, protein=10, fat=1, carbs=76)
+        IngredientNutrient.set(self.session, self.egg.id, "", 1, kcal=72, protein=6, fat=5)
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def test_unit_basis(self):
+        """
+        Test that stored spellings resolve to a dimension and base-unit factor.
+        """
+        self.assertEqual(unit_basis("Cups"), unit_basis("cup"))
+        self.assertEqual(unit_basis("kg"), ("mass", 1000.0))
+        self.assertEqual(unit_basis(None), ("count", 1.0))
+        self.assertEqual(unit_basis("clove"), ("clove", 1.0))
+
+    def test_totals(self):
+        """
+        Test the totals and per-serving values, and that unmatched lines are counted.
+        """
+        totals = get_nutrition(self.session, self.recipe.id)
+        self.assertAlmostEqual(totals.kcal, 2.5 * 364 + 2 * 72)
+        self.assertAlmostEqual(totals.protein, 2.5 * 10 + 2 * 6)
+        self.assertEqual((totals.lines, totals.matched_lines), (3, 2))
+        self.assertAlmostEqual(per_serving(totals).kcal, totals.kcal / 4)
+
+    def test_recomputed_only_after_change(self):
+        """
+        Test that totals are cached until a line or an ingredient's facts change.
+        """
+        self.assertEqual(refresh_nutrition(self.session), 1)
+        self.assertEqual(refresh_nutrition(self.session), 0)
+
+        flour_line = [line for line in RecipeIngredient.get_by_recipe_id(self.session, self.recipe.id)
+                      if line.ingredient_id == self.flour.id][0]
+        flour_line.quantity = 0.5
+        flour_line.unit = "kg"
+        self.session.commit()
+        self.assertAlmostEqual(get_nutrition(self.session, self.recipe.id).kcal, 5 * 364 + 2 * 72)
+
+        IngredientNutrient.set(self.session, self.salt.id, "pinch", 1, kcal=0.1)
+        totals = get_nutrition(self.session, self.recipe.id)
+        self.assertEqual(totals.matched_lines, 3)
+
+    def test_get_nutrition_does_not_store(self):
+        """
+        Test that stale totals are computed on read and stored only by a refresh.
+        """
+        self.assertTrue(has_stale_nutrition(self.session))
+        totals = get_nutrition(self.session, self.recipe.id)
+        self.assertAlmostEqual(totals.kcal, 2.5 * 364 + 2 * 72)
+        self.assertEqual(totals.servings, 4)
+        self.assertTrue(has_stale_nutrition(self.session))
+        self.assertIsNone(get_nutrition(self.session, self.recipe.id + 100))
+
+        self.assertEqual(Recipe.refresh_stale_nutrition(self.session), 1)
+        self.assertFalse(has_stale_nutrition(self.session))
+        self.assertEqual(get_nutrition(self.session, self.recipe.id), totals)
+
+    def test_deleted_ingredient_takes_its_facts(self):
+        """
+        Test that deleting an ingredient deletes its facts, so an ingredient
+        reusing its id starts without any.
+        """
+        saffron = Ingredient.create(self.session, name="Saffron")
+        saffron_id = saffron.id
+        IngredientNutrient.set(self.session, saffron_id, "", 1, kcal=300)
+        Ingredient.delete(self.session, saffron_id)
+        self.assertEqual(IngredientNutrient.get_for_ingredient(self.session, saffron_id), [])
+
+        pepper = Ingredient.create(self.session, name="Pepper")
+        # SQLite hands out the freed id again
+        self.assertEqual(pepper.id, saffron_id)
+        RecipeIngredient.create_many(self.session, self.recipe.id, [(1, None, "Pepper")])
+        totals = get_nutrition(self.session, self.recipe.id)
+        self.assertAlmostEqual(totals.kcal, 2.5 * 364 + 2 * 72)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for the listing output formats.
+"""
+import csv
+import io
+import json
+import unittest
+import click
+from click.testing import CliRunner
+from culinary_compass.cli.output import FORMATS, TABLE_ROW_LIMIT, print_rows
+
+COLUMNS = [("id", "ID", "dim"), ("name", "Name", "green"), ("note", "Note", "blue")]
+
+ROWS = [
+    (1, "Pancakes", None),
+    (2, "Tab\tand\nnewline", "a, \"quoted\" note"),
+]
+
+
+def listing(rows):
+    """A command printing `rows` in the format chosen with --format, as the cli group does"""
+    @click.command()
+    @click.option("--format", "output_format", type=click.Choice(FORMATS), default="table")
+    @click.pass_context
+    def command(ctx, output_format):
+        ctx.obj = {"format": output_format}
+        print_rows(COLUMNS, rows, title="Recipes", empty_message="No recipes found!")
+    return command
+
+
+class TestOutput(unittest.TestCase):
+    """
+    Test case for the machine formats and the table layouts.
+    """
+    def run_listing(self, rows, output_format):
+        result = CliRunner().invoke(listing(rows), ["--format", output_format])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_tsv(self):
+        """
+        Test that TSV keeps one row per line by replacing tabs and newlines inside values.
+        """
+        output = self.run_listing(ROWS, "tsv")
+        self.assertEqual(output.splitlines(), [
+            "id\tname\tnote",
+            "1\tPancakes\t",
+            "2\tTab and newline\ta, \"quoted\" note",
+        ])
+
+    def test_csv(self):
+        """
+        Test that CSV quotes values with separators, quotes and newlines so they read back intact.
+        """
+        output = self.run_listing(ROWS, "csv")
+        self.assertEqual(list(csv.reader(io.StringIO(output))), [
+            ["id", "name", "note"],
+            ["1", "Pancakes", ""],
+            ["2", "Tab\tand\nnewline", "a, \"quoted\" note"],
+        ])
+
+    def test_json_and_jsonl(self):
+        """
+        Test that JSON is one array and JSON Lines one object per line, both keyed by column.
+        """
+        expected = [
+            {"id": 1, "name": "Pancakes", "note": None},
+            {"id": 2, "name": "Tab\tand\nnewline", "note": "a, \"quoted\" note"},
+        ]
+        self.assertEqual(json.loads(self.run_listing(ROWS, "json")), expected)
+        self.assertEqual([json.loads(line) for line in self.run_listing(ROWS, "jsonl").splitlines()], expected)
+        self.assertEqual(json.loads(self.run_listing([], "json")), [])
+        self.assertEqual(self.run_listing([], "jsonl"), "")
+
+    def test_table(self):
+        """
+        Test that a small listing is drawn as a table and an empty one prints the message.
+        """
+        output = self.run_listing(ROWS, "table")
+        self.assertIn("Recipes", output)
+        self.assertIn("Pancakes", output)
+        self.assertIn("│", output)
+        self.assertEqual(self.run_listing([], "table").strip(), "No recipes found!")
+
+    def test_large_table_falls_back_to_plain(self):
+        """
+        Test that more than TABLE_ROW_LIMIT rows are streamed in the plain layout, every row included.
+        """
+        rows = [(i, f"Recipe {i}", None) for i in range(TABLE_ROW_LIMIT + 5)]
+        lines = self.run_listing(rows, "table").splitlines()
+        self.assertEqual(lines[0], "Recipes")
+        self.assertEqual(lines[1].split(), ["ID", "Name", "Note"])
+        self.assertEqual(len(lines), len(rows) + 3)
+        self.assertEqual(lines[-1].split(), [str(TABLE_ROW_LIMIT + 4), "Recipe", str(TABLE_ROW_LIMIT + 4), "-"])
+        self.assertNotIn("│", "\n".join(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Unit tests for the ingredient line parser.
+The golden corpus in tests/data/ingredient_lines.jsonl pairs raw lines with their expected parse.
+"""
+import json
+import os
+import unittest
+from culinary_compass.parser import parse_line, parse_lines, to_model_line
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "data", "ingredient_lines.jsonl")
+
+
+class TestParser(unittest.TestCase):
+    """
+    Test case for parse_line and the batch API.
+    """
+    def test_golden_corpus(self):
+        """
+        Test that every line in the golden corpus parses to its expected result.
+        """
+        with open(GOLDEN_FILE, encoding="utf-8") as f:
+            cases = [json.loads(line) for line in f if line.strip()]
+
+        for case in cases:
+            with self.subTest(line=case["line"]):
+                parsed = parse_line(case["line"])._asdict()
+                expected = case["expected"]
+                for field in ("quantity", "quantity_max"):
+                    if expected[field] is None:
+                        self.assertIsNone(parsed[field])
+                    else:
+                        self.assertAlmostEqual(parsed[field], expected[field])
+                for field in ("unit", "name", "note"):
+                    self.assertEqual(parsed[field], expected[field])
+
+    def test_batch_api(self):
+        """
+        Test that parse_lines skips blanks and, when asked, bad lines.
+        """
+        lines = ["2 cups flour", "", "   ", "1 , sifted", "3 eggs"]
+        with self.assertRaises(ValueError):
+            list(parse_lines(lines))
+        parsed = list(parse_lines(lines, skip_errors=True))
+        self.assertEqual([p.name for p in parsed], ["flour", "eggs"])
+
+    def test_to_model_line(self):
+        """
+        Test conversion to RecipeIngredient lines, including missing amounts.
+        """
+        self.assertEqual(to_model_line(parse_line("2-3 tbsp honey")), (2.0, "tbsp", "honey"))
+        self.assertEqual(to_model_line(parse_line("salt to taste")), (0.0, None, "salt to taste"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Performance tests run against the scaled catalog fixture.
+These check that the large-catalog code paths use indexes and stay correct at scale,
+rather than asserting wall-clock times.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from culinary_compass.search import RecipeFilter
+from culinary_compass.snapshot import CatalogSnapshot, build_snapshot
+
+pytestmark = pytest.mark.performance
+
+
+def query_plan(engine, sql):
+    with engine.connect() as conn:
+        return " ".join(row[3] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+def test_time_budget_queries_use_indexes(scaled_engine):
+    """
+    Test that "under N minutes, fastest first" range-scans the total_time indexes.
+    """
+    plan = query_plan(scaled_engine, "SELECT id FROM recipes WHERE total_time <= 30 ORDER BY total_time")
+    assert "ix_recipes_total_time" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = query_plan(scaled_engine, "SELECT id FROM recipes WHERE category_id = 3 AND total_time <= 30 ORDER BY total_time")
+    assert "ix_recipes_category_id_total_time" in plan
+
+
+def test_filter_results_are_unique_and_sorted(scaled_engine):
+    """
+    Test that a multi-ingredient filter returns each recipe once, in sort order.
+    """
+    session = sessionmaker(bind=scaled_engine)()
+    rows = RecipeFilter(
+        ingredients=["ingredient 1", "ingredient 2"], exclude_ingredients=["ingredient 3"],
+        max_time=120, sort="time",
+    ).rows(session).all()
+    session.close()
+
+    ids = [row[0] for row in rows]
+    assert ids and len(ids) == len(set(ids))
+    times = [row[5] for row in rows]
+    assert times == sorted(times)
+    assert max(times) <= 120
+
+
+def test_snapshot_matches_database(scaled_engine, tmp_path):
+    """
+    Test that a snapshot of the scaled catalog has every recipe and line.
+    """
+    path = str(tmp_path / "scaled.snapshot")
+    build_snapshot(scaled_engine, path)
+    with scaled_engine.connect() as conn:
+        recipes = conn.execute(text("SELECT count(*) FROM recipes")).scalar()
+        lines = conn.execute(text("SELECT count(*) FROM recipe_ingredients")).scalar()
+    with CatalogSnapshot(path) as snapshot:
+        assert len(snapshot) == recipes
+        assert snapshot.line_count == lines
+        assert snapshot.recipe(recipes).id == recipes
@@ -0,0 +1,100 @@
+"""
+Unit tests for the meal-plan generator.
+"""
+import unittest
+from culinary_compass.models import Session, Recipe, Category, RecipeIngredient
+from culinary_compass.planner import PlanError, Slot, generate_plan, parse_slot
+
+
+class TestPlanner(unittest.TestCase):
+    """
+    Test case for slot constraints, ingredient overlap and the pantry.
+    """
+    def setUp(self):
+        """
+        Create breakfasts and dinners where two dinners share the pasta and tomato.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        breakfast = Category.create(self.session, name="Breakfast")
+        dinner = Category.create(self.session, name="Dinner")
+        for name, category, minutes, ingredients in [
+            ("Porridge", breakfast, 10, ["Oats", "Milk"]),
+            ("Omelette", breakfast, 15, ["Egg", "Milk"]),
+            ("Full Breakfast", breakfast, 60, ["Egg", "Bacon", "Beans"]),
+            ("Pasta Sauce", dinner, 30, ["Pasta", "Tomato"]),
+            ("Pasta Bake", dinner, 40, ["Pasta", "Tomato", "Cheese"]),
+            ("Curry", dinner, 45, ["Rice", "Chicken", "Coconut"]),
+        ]:
+            recipe = Recipe.create(self.session, name=name, category_id=category.id, prep_time=minutes, cook_time=0)
+            RecipeIngredient.create_many(self.session, recipe.id, [(1, None, ingredient) for ingredient in ingredients])
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def names(self, plan):
+        return [meal.name for meal in plan.meals]
+
+    def test_parse_slot(self):
+        """
+        Test slot specs with and without time limits and categories.
+        """
+        self.assertEqual(parse_slot("dinner:45:Soup, Dinner"), Slot("dinner", 45, ("Dinner", "Soup")))
+        self.assertEqual(parse_slot("lunch"), Slot("lunch", None, ()))
+        with self.assertRaises(ValueError):
+            parse_slot("lunch:soon")
+
+    def test_plan_respects_slots_and_overlaps(self):
+        """
+        Test that meals fit their slots, are distinct and share ingredients.
+        """
+        slots = [Slot("breakfast 1", 20, ("Breakfast",)), Slot("breakfast 2", 20, ("Breakfast",)),
+                 Slot("dinner 1", 60, ("Dinner",)), Slot("dinner 2", 60, ("Dinner",))]
+        plan = generate_plan(self.session, slots, time_budget=0.05)
+        self.assertEqual(sorted(self.names(plan)[:2]), ["Omelette", "Porridge"])
+        self.assertEqual(sorted(self.names(plan)[2:]), ["Pasta Bake", "Pasta Sauce"])
+        self.assertEqual(dict(plan.shopping),
+                         {"Milk": 2, "Oats": 1, "Egg": 1, "Pasta": 2, "Tomato": 2, "Cheese": 1})
+
+    def test_pantry_is_not_bought(self):
+        """
+        Test that pantry ingredients are left off the shopping list and steer the choice.
+        """
+        slots = [Slot("dinner", None, ("Dinner",))]
+        plan = generate_plan(self.session, slots, pantry=["rice", "CHICKEN", "coconut"], time_budget=0.05)
+        self.assertEqual(self.names(plan), ["Curry"])
+        self.assertEqual(plan.shopping, [])
+
+    def test_search_stops_early(self):
+        """
+        Test that a small catalog is planned well within the time budget, at the lower bound or once the search stalls.
+        """
+        slots = [Slot("breakfast 1", 20, ("Breakfast",)), Slot("breakfast 2", 20, ("Breakfast",)),
+                 Slot("dinner 1", 60, ("Dinner",)), Slot("dinner 2", 60, ("Dinner",))]
+        plan = generate_plan(self.session, slots, time_budget=30)
+        self.assertLess(plan.seconds, 5)
+        self.assertEqual(sorted(self.names(plan)), ["Omelette", "Pasta Bake", "Pasta Sauce", "Porridge"])
+
+        # With milk at hand every breakfast needs something bought, so one ingredient can't be beaten
+        plan = generate_plan(self.session, [Slot("breakfast", 20, ("Breakfast",))], pantry=["milk"],
+                             time_budget=30)
+        self.assertLess(plan.seconds, 5)
+        self.assertEqual(plan.iterations, 0)
+        self.assertEqual(len(plan.shopping), 1)
+
+    def test_unfillable_slots(self):
+        """
+        Test that a slot nothing fits, or too few distinct recipes, raise PlanError.
+        """
+        with self.assertRaisesRegex(PlanError, "quick"):
+            generate_plan(self.session, [Slot("quick", 5, ())], time_budget=0)
+        with self.assertRaises(PlanError):
+            generate_plan(self.session, [Slot(f"dinner {day}", None, ("Dinner",)) for day in range(4)],
+                          time_budget=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for ingredient prices and incremental recipe costs.
+"""
+import io
+import unittest
+from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient
+from culinary_compass.pricing import (
+    has_stale_costs, import_prices, priced_lines, read_price_file, recipe_cost, refresh_costs,
+)
+
+
+class TestPricing(unittest.TestCase):
+    """
+    Test case for costing recipes across unit conversions and recomputing them on change.
+    """
+    def setUp(self):
+        """
+        Create two recipes sharing flour, one of them also using eggs.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.pancakes = Recipe.create(self.session, name="Pancakes", serving_size=4)
+        self.bread = Recipe.create(self.session, name="Bread", serving_size=0)
+        self.flour = Ingredient.create(self.session, name="Flour")
+        self.egg = Ingredient.create(self.session, name="Egg")
+        RecipeIngredient.create_many(self.session, self.pancakes.id, [(250, "grams", "Flour"), (2, None, "Egg")])
+        RecipeIngredient.create_many(self.session, self.bread.id, [(1, "kg", "Flour"), (1, "cup", "Water")])
+        refresh_costs(self.session)
+        self.session.commit()
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def cost(self, recipe):
+        self.session.refresh(recipe)
+        return recipe.cost
+
+    def test_set_price_recomputes_users(self):
+        """
+        Test that a price change costs every recipe using the ingredient, with unit conversion.
+        """
+        self.assertIsNone(self.cost(self.pancakes))
+        Ingredient.set_price(self.session, self.flour.id, 2.0, "kg")
+        self.assertAlmostEqual(self.cost(self.pancakes), 0.5)
+        self.assertAlmostEqual(self.cost(self.bread), 2.0)
+        self.assertAlmostEqual(self.pancakes.cost_per_serving, 0.125)
+        self.assertAlmostEqual(self.bread.cost_per_serving, 2.0)
+
+        Ingredient.set_price(self.session, self.egg.id, 0.3)
+        self.assertAlmostEqual(self.cost(self.pancakes), 1.1)
+        self.assertEqual(priced_lines(self.session, self.bread.id), (2, 1))
+
+        Ingredient.set_price(self.session, self.flour.id, None)
+        self.assertAlmostEqual(self.cost(self.pancakes), 0.6)
+        self.assertIsNone(self.cost(self.bread))
+
+    def test_line_change_marks_stale(self):
+        """
+        Test that changing a recipe's lines marks only that recipe stale until refreshed.
+        """
+        Ingredient.set_price(self.session, self.flour.id, 2.0, "kg")
+        RecipeIngredient.create_many(self.session, self.bread.id, [(500, "g", "Flour")])
+        self.session.refresh(self.bread)
+        self.session.refresh(self.pancakes)
+        self.assertTrue(self.bread.cost_stale)
+        self.assertFalse(self.pancakes.cost_stale)
+
+        self.assertEqual(refresh_costs(self.session), 1)
+        self.session.commit()
+        self.assertAlmostEqual(self.cost(self.bread), 3.0)
+        self.assertEqual(refresh_costs(self.session), 0)
+
+    def test_recipe_cost_reads_stale_cost_without_writing(self):
+        """
+        Test that a stale cost is computed on read and left flagged for the next refresh.
+        """
+        Ingredient.set_price(self.session, self.flour.id, 2.0, "kg")
+        RecipeIngredient.create_many(self.session, self.bread.id, [(500, "g", "Flour")])
+        self.assertEqual(recipe_cost(self.session, self.bread.id), (3.0, 3.0))
+        self.assertEqual(recipe_cost(self.session, self.pancakes.id), (0.5, 0.125))
+        self.assertIsNone(recipe_cost(self.session, self.bread.id + 100))
+        self.assertTrue(has_stale_costs(self.session))
+
+        self.assertEqual(Recipe.refresh_stale_costs(self.session), 1)
+        self.assertFalse(has_stale_costs(self.session))
+        self.assertAlmostEqual(self.cost(self.bread), 3.0)
+
+    def test_import_prices(self):
+        """
+        Test that a price file sets prices by name and recomputes affected recipes in one pass.
+        """
+        stream = io.StringIO("name,price,unit,per\nFlour,1.5,g,1000\nEgg,0.25,,\nSaffron,9,g,1\n")
+        result = import_prices(self.session, read_price_file(stream))
+        self.session.commit()
+        self.assertEqual((result.ingredients, result.recipes, result.unknown), (2, 2, ["Saffron"]))
+        self.assertAlmostEqual(self.cost(self.pancakes), 0.375 + 0.5)
+        self.assertAlmostEqual(self.cost(self.bread), 1.5)
+
+    def test_import_prices_ignores_case(self):
+        """
+        Test that price file names match ingredients ignoring case, the last row for a name winning.
+        """
+        stream = io.StringIO("name,price,unit,per\nflour,1,g,1000\nEGG,0.25,,\nFLOUR,2,kg,1\nsaffron,9,g,1\n")
+        result = import_prices(self.session, read_price_file(stream))
+        self.session.commit()
+        self.assertEqual((result.ingredients, result.recipes, result.unknown), (2, 2, ["saffron"]))
+        self.assertAlmostEqual(self.cost(self.bread), 2.0)
+        self.assertAlmostEqual(self.cost(self.pancakes), 0.5 + 0.5)
+
+    def test_read_price_file_errors(self):
+        """
+        Test that a bad row is reported with its line number.
+        """
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            list(read_price_file(io.StringIO("name,price\nFlour,1\nEgg,cheap\n")))
+        with self.assertRaisesRegex(ValueError, "missing column"):
+            list(read_price_file(io.StringIO("name,cost\nFlour,1\n")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the persistent query cache.
+"""
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from culinary_compass.models import Base, Category
+from culinary_compass.query_cache import QueryCache, default_cache_path, make_key
+
+
+class TestQueryCache(unittest.TestCase):
+    """
+    Test case for cache hits, invalidation on writes and LRU eviction.
+    """
+    def setUp(self):
+        """
+        Create a database with one category and an empty cache next to it.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        Category.create(self.session, name="Breakfast")
+        self.cache = QueryCache(default_cache_path(self.engine))
+        self.queries = 0
+
+    def tearDown(self):
+        """
+        Close everything and remove the temporary files.
+        """
+        self.cache.close()
+        self.session.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def list_categories(self):
+        """
+        List category names through the cache, counting real queries.
+        """
+        def compute():
+            self.queries += 1
+            return self.session.query(Category.name).order_by(Category.id)
+        return [row[0] for row in self.cache.rows(self.engine, "category list", {}, compute)]
+
+    def test_hit_until_write(self):
+        """
+        Test that repeated reads skip the query until the database changes.
+        """
+        self.assertEqual(self.list_categories(), ["Breakfast"])
+        self.assertEqual(self.list_categories(), ["Breakfast"])
+        self.assertEqual(self.queries, 1)
+
+        Category.create(self.session, name="Dinner")
+        self.assertEqual(self.list_categories(), ["Breakfast", "Dinner"])
+        self.assertEqual(self.queries, 2)
+
+    def test_keys_ignore_argument_order(self):
+        """
+        Test that equal arguments give equal keys regardless of dict order.
+        """
+        self.assertEqual(make_key("recipe search", {"a": 1, "b": [2]}), make_key("recipe search", {"b": [2], "a": 1}))
+        self.assertNotEqual(make_key("recipe search", {"a": 1}), make_key("recipe list", {"a": 1}))
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry goes first when the cache is full.
+        """
+        cache = QueryCache(os.path.join(self.tmp.name, "small.cache"), max_bytes=2500)
+        rows = [("x" * 1000,)]
+        cache.put("first", "v1", rows)
+        cache.put("second", "v1", rows)
+        cache.get("first", "v1")
+        cache.put("third", "v1", rows)
+
+        self.assertEqual(cache.get("first", "v1"), rows)
+        self.assertIsNone(cache.get("second", "v1"))
+        self.assertEqual(cache.get("third", "v1"), rows)
+        self.assertIsNone(cache.get("third", "v2"))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for unique recipe lines and their upsert semantics.
+"""
+import unittest
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from culinary_compass.models import Session, Recipe, Ingredient, RecipeIngredient
+
+
+class TestRecipeLines(unittest.TestCase):
+    """
+    Test case for one line per recipe, ingredient and unit.
+    """
+    def setUp(self):
+        """
+        Create a recipe with flour in cups and salt without a unit.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.recipe = Recipe.create(self.session, name="Bread")
+        RecipeIngredient.create_many(self.session, self.recipe.id, [(2, "cups", "Flour"), (1, None, "Salt")])
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def lines(self):
+        self.session.expire_all()
+        return sorted(
+            (line.ingredient.name, line.unit or "", line.quantity)
+            for line in RecipeIngredient.get_by_recipe_id(self.session, self.recipe.id)
+        )
+
+    def test_repeated_adds_merge_into_one_line(self):
+        """
+        Adding an ingredient the recipe already has in that unit adds to its
+        quantity, whether through create, create_many or a blank unit.
+        """
+        flour = Ingredient.get_by_name(self.session, "Flour")
+        RecipeIngredient.create(self.session, recipe_id=self.recipe.id, ingredient_id=flour.id,
+                                quantity=1, unit="cups")
+        RecipeIngredient.create_many(self.session, self.recipe.id, [(0.5, "", "Salt"), (100, "g", "Flour")])
+        self.assertEqual(self.lines(), [("Flour", "cups", 3), ("Flour", "g", 100), ("Salt", "", 1.5)])
+
+    def test_upsert_many_is_idempotent_single_statement(self):
+        """
+        upsert_many replaces quantities, so running it twice gives the same
+        lines, and it writes them with one statement.
+        """
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith("INSERT INTO recipe_ingredients"):
+                statements.append(statement)
+
+        engine = self.session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            for _ in range(2):
+                RecipeIngredient.upsert_many(self.session, self.recipe.id,
+                                             [(3, "cups", "Flour"), (1, "cups", "Flour"), (5, "g", "Yeast")])
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(len(statements), 2)
+        self.assertIn("ON CONFLICT", statements[0])
+        self.assertEqual(self.lines(), [("Flour", "cups", 4), ("Salt", "", 1), ("Yeast", "g", 5)])
+
+    def test_duplicate_line_is_rejected(self):
+        """
+        Writes that bypass the model still cannot add a second line.
+        """
+        salt = Ingredient.get_by_name(self.session, "Salt")
+        with self.assertRaises(IntegrityError):
+            self.session.execute(RecipeIngredient.__table__.insert(),
+                                 {"recipe_id": self.recipe.id, "ingredient_id": salt.id, "quantity": 1, "unit": ""})
+            self.session.flush()
+        self.session.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Unit tests for the static cookbook renderer.
+"""
+import os
+import tempfile
+import unittest
+from culinary_compass.models import Session, Recipe, Category, RecipeIngredient, Tag
+from culinary_compass.render import render_site
+
+
+class TestRender(unittest.TestCase):
+    """
+    Test case for rendered pages and incremental rebuilds.
+    """
+    def setUp(self):
+        """
+        Create a soup category with two recipes and an output directory.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        soup = Category.create(self.session, name="Soup & Stew")
+        self.leek = Recipe.create(self.session, name="Leek Soup", prep_time=10, cook_time=30, serving_size=4,
+                                  category_id=soup.id, instructions="Sweat the leeks.\nSimmer.")
+        self.pho = Recipe.create(self.session, name="Pho <Bo>", prep_time=30, cook_time=180, category_id=soup.id)
+        RecipeIngredient.create_many(self.session, self.leek.id, [(2, "", "Leek"), (1.5, "l", "Stock")])
+        tag = Tag.create(self.session, name="winter")
+        self.leek.tags.append(tag)
+        self.session.commit()
+        self.total = self.session.query(Recipe).count()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = self.tmp.name
+
+    def tearDown(self):
+        """
+        Close the database session and remove the output.
+        """
+        self.session.close()
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(os.path.join(self.out, path), encoding="utf-8") as stream:
+            return stream.read()
+
+    def test_pages(self):
+        """
+        Test that recipe, category and index pages carry the recipe data, escaped.
+        """
+        stats = render_site(self.session, self.out, workers=1)
+        self.assertEqual(stats.rendered, self.total)
+
+        page = self.read(f"recipes/{self.leek.id}-leek-soup.html")
+        self.assertIn('<a href="../categories/soup-stew.html">Soup &amp; Stew</a>', page)
+        self.assertIn("<li>2 Leek</li>\n<li>1.5 l Stock</li>", page)
+        self.assertIn("Tags: winter", page)
+        self.assertIn("<p>Sweat the leeks.</p>\n<p>Simmer.</p>", page)
+        self.assertIn("<h1>Pho &lt;Bo&gt;</h1>", self.read(f"recipes/{self.pho.id}-pho-bo.html"))
+
+        category = self.read("categories/soup-stew.html")
+        self.assertLess(category.index("Leek Soup"), category.index("Pho &lt;Bo&gt;"))
+        self.assertIn('<a href="categories/soup-stew.html">Soup &amp; Stew</a> (2)', self.read("index.html"))
+
+    def test_incremental(self):
+        """
+        Test that later runs re-render only changed recipes and remove pages of deleted ones.
+        """
+        render_site(self.session, self.out, markup="markdown", workers=1)
+        stats = render_site(self.session, self.out, markup="markdown", workers=1)
+        self.assertEqual((stats.rendered, stats.unchanged, stats.categories), (0, self.total, 0))
+
+        Recipe.update(self.session, self.pho.id, name="Pho Ga")
+        RecipeIngredient.create_many(self.session, self.leek.id, [(1, "pinch", "Salt")])
+        stats = render_site(self.session, self.out, markup="markdown", workers=1)
+        self.assertEqual((stats.rendered, stats.unchanged, stats.categories), (2, self.total - 2, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.out, f"recipes/{self.pho.id}-pho-bo.md")))
+        self.assertIn("- 1 pinch Salt", self.read(f"recipes/{self.leek.id}-leek-soup.md"))
+
+        Recipe.delete(self.session, self.pho.id)
+        stats = render_site(self.session, self.out, markup="markdown", workers=1)
+        self.assertEqual((stats.rendered, stats.removed), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.out, f"recipes/{self.pho.id}-pho-ga.md")))
+        self.assertNotIn("Pho", self.read("categories/soup-stew.md"))
+
+    def test_process_pool(self):
+        """
+        Test that rendering in worker processes writes the same pages as rendering inline.
+        """
+        stats = render_site(self.session, self.out, workers=2, chunk_size=1)
+        self.assertEqual(stats.rendered, self.total)
+        inline = tempfile.TemporaryDirectory()
+        self.addCleanup(inline.cleanup)
+        render_site(self.session, inline.name, workers=1)
+        for name in os.listdir(os.path.join(inline.name, "recipes")):
+            with open(os.path.join(inline.name, "recipes", name), encoding="utf-8") as stream:
+                self.assertEqual(self.read(f"recipes/{name}"), stream.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
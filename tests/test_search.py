@@ -0,0 +1,102 @@
+"""
+Unit tests for the multi-criteria recipe filter.
+"""
+import unittest
+from culinary_compass.models import Session, Recipe, RecipeIngredient, Category
+from culinary_compass.search import RecipeFilter
+
+
+class TestRecipeFilter(unittest.TestCase):
+    """
+    Test case for combining ingredient, category, time and serving criteria in one query.
+    """
+    def setUp(self):
+        """
+        Create four recipes in three categories with overlapping ingredients.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        breakfast = Category.create(self.session, name="Breakfast")
+        baking = Category.create(self.session, name="Baking")
+        lunch = Category.create(self.session, name="Lunch")
+        recipes = [
+            ("Pancakes", breakfast, 10, 15, 4, [(250, "g", "Flour"), (1, "cup", "Flour"), (2, None, "Egg"),
+                                                (300, "ml", "Milk")]),
+            ("Omelette", breakfast, 5, 10, 1, [(3, None, "Egg"), (50, "g", "Cheese")]),
+            ("Bread", baking, 20, 40, 8, [(500, "g", "Flour"), (1, "tsp", "Salt"), (7, "g", "Yeast")]),
+            ("Salad", lunch, 10, 0, 2, [(1, None, "Lettuce"), (30, "g", "Cheese")]),
+        ]
+        for name, category, prep_time, cook_time, servings, lines in recipes:
+            recipe = Recipe.create(self.session, name=name, category_id=category.id, prep_time=prep_time,
+                                   cook_time=cook_time, serving_size=servings)
+            RecipeIngredient.create_many(self.session, recipe.id, lines)
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def names(self, **criteria):
+        return [row[1] for row in RecipeFilter(**criteria).rows(self.session)]
+
+    def test_required_ingredients(self):
+        """
+        Test that every required ingredient must be present.
+        """
+        self.assertEqual(self.names(ingredients=["Cheese"]), ["Omelette", "Salad"])
+        self.assertEqual(self.names(ingredients=["Egg", "Flour"]), ["Pancakes"])
+        self.assertEqual(self.names(ingredients=["Egg", "Lettuce"]), [])
+
+    def test_excluded_ingredients(self):
+        """
+        Test that no excluded ingredient may be present, alone or alongside required ones.
+        """
+        self.assertEqual(self.names(exclude_ingredients=["Egg"]), ["Bread", "Salad"])
+        self.assertEqual(self.names(exclude_ingredients=["Egg", "Yeast"]), ["Salad"])
+        self.assertEqual(self.names(ingredients=["Cheese"], exclude_ingredients=["Lettuce"]), ["Omelette"])
+
+    def test_categories(self):
+        """
+        Test that a recipe in any of the given categories matches.
+        """
+        self.assertEqual(self.names(categories=["Breakfast"]), ["Pancakes", "Omelette"])
+        self.assertEqual(self.names(categories=["Breakfast", "Lunch"]), ["Pancakes", "Omelette", "Salad"])
+        self.assertEqual(self.names(categories=["Dinner"]), [])
+
+    def test_servings_and_time(self):
+        """
+        Test inclusive serving ranges and the total-time limit.
+        """
+        self.assertEqual(self.names(min_servings=2, max_servings=4), ["Pancakes", "Salad"])
+        self.assertEqual(self.names(min_servings=8), ["Bread"])
+        self.assertEqual(self.names(max_servings=1), ["Omelette"])
+        self.assertEqual(self.names(max_time=15), ["Omelette", "Salad"])
+        self.assertEqual(self.names(categories=["Breakfast"], min_servings=2, max_time=30), ["Pancakes"])
+
+    def test_no_duplicate_rows(self):
+        """
+        Test that a recipe with several matching lines comes back once.
+        """
+        # "e" matches most lines of every recipe, and Pancakes has two Flour lines
+        rows = RecipeFilter(ingredients=["e", "Flour"]).rows(self.session).all()
+        self.assertEqual([row[1] for row in rows], ["Pancakes", "Bread"])
+        self.assertEqual(len(self.names(ingredients=["e"])), 4)
+
+    def test_sort_order(self):
+        """
+        Test sorting by several keys in both directions, with ties broken by id.
+        """
+        self.assertEqual(self.names(sort="name"), ["Bread", "Omelette", "Pancakes", "Salad"])
+        self.assertEqual(self.names(sort="time"), ["Salad", "Omelette", "Pancakes", "Bread"])
+        self.assertEqual(self.names(sort="servings", descending=True), ["Bread", "Pancakes", "Salad", "Omelette"])
+        self.assertEqual(self.names(descending=True), ["Salad", "Bread", "Omelette", "Pancakes"])
+        # No recipe is priced, so every cost ties and the id decides
+        self.assertEqual(self.names(sort="cost"), ["Pancakes", "Omelette", "Bread", "Salad"])
+        self.assertEqual(self.names(sort="cost", descending=True), ["Salad", "Bread", "Omelette", "Pancakes"])
+        with self.assertRaises(ValueError):
+            RecipeFilter(sort="rating")
+
+
+if __name__ == '__main__':
+    unittest.main()
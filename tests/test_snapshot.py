@@ -0,0 +1,90 @@
+"""
+Unit tests for the memory-mapped catalog snapshot.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from culinary_compass.models import Base, Recipe, Ingredient, RecipeIngredient, Category
+from culinary_compass.snapshot import CatalogSnapshot, build_snapshot, open_snapshot
+
+RUN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "run.py")
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Test case for building, reading and refreshing snapshots.
+    """
+    def setUp(self):
+        """
+        Create a small catalog in a temporary database file, named where the CLI looks for it.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'culinary_compass.db')}")
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        category = Category.create(self.session, name="Breakfast")
+        flour = Ingredient.create(self.session, name="Flour")
+        self.recipe = Recipe.create(self.session, name="Pancakes", prep_time=10, cook_time=15,
+                                    serving_size=4, category_id=category.id)
+        Recipe.create(self.session, name="Water")
+        RecipeIngredient.create(self.session, recipe_id=self.recipe.id, ingredient_id=flour.id,
+                                quantity=1.5, unit="cups")
+        self.path = os.path.join(self.tmp.name, "test.snapshot")
+
+    def tearDown(self):
+        """
+        Close the session and remove the temporary files.
+        """
+        self.session.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        """
+        Test that recipes and ingredient lines read back from the snapshot.
+        """
+        build_snapshot(self.engine, self.path)
+        with CatalogSnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 2)
+            recipe = snapshot.recipe(self.recipe.id)
+            self.assertEqual(recipe.name, "Pancakes")
+            self.assertEqual(recipe.category, "Breakfast")
+            self.assertEqual(recipe.total_time, 25)
+            self.assertEqual([(l.quantity, l.unit, l.name) for l in recipe.ingredients], [(1.5, "cups", "Flour")])
+
+            water = snapshot.recipe(2)
+            self.assertIsNone(water.category)
+            self.assertIsNone(water.serving_size)
+            self.assertEqual(water.ingredients, [])
+            self.assertIsNone(snapshot.recipe(99))
+
+    def test_rebuilt_when_stale(self):
+        """
+        Test that open_snapshot rebuilds after the database changes.
+        """
+        build_snapshot(self.engine, self.path)
+        Recipe.create(self.session, name="Toast")
+        with open_snapshot(self.engine, self.path) as snapshot:
+            self.assertEqual(snapshot.recipe(3).name, "Toast")
+
+    def test_list_json(self):
+        """
+        Test that `snapshot list --format json` labels each value with its own column.
+        """
+        result = subprocess.run([sys.executable, RUN, "--format", "json", "snapshot", "list"],
+                                cwd=self.tmp.name, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout), [
+            {"id": 1, "name": "Pancakes", "category": "Breakfast", "total_time": 25, "servings": 4},
+            {"id": 2, "name": "Water", "category": "Uncategorized", "total_time": 0, "servings": None},
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for the ingredient substitution graph and its uses in search and planning.
+"""
+import unittest
+from sqlalchemy import select
+from culinary_compass.models import (
+    Session, Recipe, Ingredient, RecipeIngredient, IngredientSubstitute, substitute_closure,
+)
+from culinary_compass.planner import Slot, generate_plan
+from culinary_compass.search import RecipeFilter
+from culinary_compass.substitutes import SubstitutionGraph, has_stale_closure, rebuild_closure, refresh_closure
+
+
+class TestSubstitutes(unittest.TestCase):
+    """
+    Test case for the incrementally maintained closure and substitution-aware features.
+    """
+    def setUp(self):
+        """
+        Create a buttermilk recipe and the chain buttermilk -> milk -> oat milk.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.scones = Recipe.create(self.session, name="Scones", prep_time=10, cook_time=15)
+        RecipeIngredient.create_many(self.session, self.scones.id, [(1, "cup", "Buttermilk"), (2, "cups", "Flour")])
+        self.ids = {name: Ingredient.get_by_name(self.session, name).id for name in ("Buttermilk", "Flour")}
+        for name in ("Milk", "Oat Milk", "Yogurt"):
+            self.ids[name] = Ingredient.create(self.session, name=name).id
+        IngredientSubstitute.add(self.session, self.ids["Milk"], self.ids["Oat Milk"], 1.0)
+        IngredientSubstitute.add(self.session, self.ids["Buttermilk"], self.ids["Milk"], 0.9, "plus lemon juice")
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def closure(self):
+        rows = self.session.execute(select(substitute_closure)).all()
+        return {(a, b): (round(ratio, 6), hops) for a, b, ratio, hops in rows}
+
+    def test_closure_is_extended_incrementally(self):
+        """
+        Test that adding edges in either order yields the transitive pairs, keeping shortest paths.
+        """
+        ids = self.ids
+        self.assertEqual(self.closure(), {
+            (ids["Milk"], ids["Oat Milk"]): (1.0, 1),
+            (ids["Buttermilk"], ids["Milk"]): (0.9, 1),
+            (ids["Buttermilk"], ids["Oat Milk"]): (0.9, 2),
+        })
+        IngredientSubstitute.add(self.session, ids["Buttermilk"], ids["Oat Milk"], 1.1)
+        self.assertEqual(self.closure()[(ids["Buttermilk"], ids["Oat Milk"])], (1.1, 1))
+
+        incremental = self.closure()
+        rebuild_closure(self.session)
+        self.assertEqual(self.closure(), incremental)
+
+    def test_removal_rebuilds(self):
+        """
+        Test that removing an edge or deleting an ingredient drops the paths through it.
+        """
+        ids = self.ids
+        IngredientSubstitute.remove(self.session, ids["Milk"], ids["Oat Milk"])
+        self.assertTrue(refresh_closure(self.session))
+        self.assertEqual(set(self.closure()), {(ids["Buttermilk"], ids["Milk"])})
+
+        Ingredient.delete(self.session, ids["Milk"])
+        self.assertTrue(has_stale_closure(self.session))
+        # Loading reads the closure as stored; refreshing is a separate write
+        self.assertEqual(SubstitutionGraph.load(self.session).substitutes(ids["Buttermilk"]),
+                         {ids["Milk"]: (0.9, 1)})
+        self.assertTrue(IngredientSubstitute.refresh_stale_closure(self.session))
+        self.assertFalse(has_stale_closure(self.session))
+        self.assertFalse(IngredientSubstitute.refresh_stale_closure(self.session))
+        graph = SubstitutionGraph.load(self.session)
+        self.assertEqual(graph.substitutes(ids["Buttermilk"]), {})
+
+    def test_graph_lookups(self):
+        """
+        Test ratios along chains and the ingredients a pantry covers.
+        """
+        ids = self.ids
+        graph = SubstitutionGraph.load(self.session)
+        self.assertAlmostEqual(graph.ratio(ids["Buttermilk"], ids["Oat Milk"]), 0.9)
+        self.assertIsNone(graph.ratio(ids["Oat Milk"], ids["Buttermilk"]))
+        self.assertEqual(graph.satisfied([ids["Oat Milk"]]), {ids["Oat Milk"], ids["Milk"], ids["Buttermilk"]})
+
+    def test_search_with_substitutes(self):
+        """
+        Test that a required ingredient matches recipes calling for something it replaces.
+        """
+        def search(**kwargs):
+            return [row[0] for row in RecipeFilter(ingredients=["Oat Milk"], **kwargs).rows(self.session)]
+
+        self.assertEqual(search(), [])
+        self.assertEqual(search(substitutes=True), [self.scones.id])
+
+    def test_pantry_with_substitutes(self):
+        """
+        Test that the planner counts substitutable ingredients as in the pantry.
+        """
+        slots = [Slot("tea", None, ())]
+        plan = generate_plan(self.session, slots, pantry=["oat milk", "flour"], time_budget=0)
+        self.assertEqual([name for name, _ in plan.shopping], ["Buttermilk"])
+        plan = generate_plan(self.session, slots, pantry=["oat milk", "flour"], time_budget=0, substitutes=True)
+        self.assertEqual(plan.shopping, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for revision tracking and delta sync between databases.
+"""
+import io
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from culinary_compass.models import Base, Recipe, Ingredient, Category, Tag, recipe_tags
+from culinary_compass.sync import apply_changes, current_revision, export_changes
+
+
+class TestSync(unittest.TestCase):
+    """
+    Test case for exporting changes from one database and applying them to another.
+    """
+    def setUp(self):
+        """
+        Create a source database with a small catalog and an empty replica.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'source.db')}")
+        self.replica = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'replica.db')}")
+        Base.metadata.create_all(self.source)
+        Base.metadata.create_all(self.replica)
+        self.session = sessionmaker(bind=self.source)()
+
+        category = Category.create(self.session, name="Breakfast")
+        Ingredient.create(self.session, name="Flour")
+        self.recipe = Recipe.create(self.session, name="Pancakes", prep_time=10, cook_time=15,
+                                    description="x" * 2000, category_id=category.id)
+        self.tag = Tag.create(self.session, name="Quick")
+        self.recipe.tags.append(self.tag)
+        self.session.commit()
+
+    def tearDown(self):
+        """
+        Close the session and remove the temporary databases.
+        """
+        self.session.close()
+        self.source.dispose()
+        self.replica.dispose()
+        self.tmp.cleanup()
+
+    def sync(self, since):
+        """
+        Export changes after `since` from the source and apply them to the replica.
+        """
+        delta = io.StringIO()
+        stats = export_changes(self.source, delta, since)
+        delta.seek(0)
+        apply_changes(self.replica, delta)
+        return stats
+
+    def test_writes_bump_revision(self):
+        """
+        Test that every write stamps the row with a new revision.
+        """
+        with self.source.connect() as conn:
+            before = current_revision(conn)
+        Recipe.update(self.session, self.recipe.id, name="Crepes")
+        with self.source.connect() as conn:
+            self.assertEqual(current_revision(conn), before + 1)
+            self.assertEqual(conn.execute(select(Recipe.revision)).scalar(), before + 1)
+
+    def test_full_then_delta(self):
+        """
+        Test that a full sync copies everything and a delta carries only later changes.
+        """
+        full = self.sync(0)
+        with sessionmaker(bind=self.replica)() as replica:
+            copied = replica.get(Recipe, self.recipe.id)
+            self.assertEqual(copied.name, "Pancakes")
+            self.assertEqual(copied.description, "x" * 2000)
+            self.assertEqual(copied.total_time, 25)
+            self.assertEqual([tag.name for tag in copied.tags], ["Quick"])
+
+        Recipe.update(self.session, self.recipe.id, name="Crepes")
+        self.recipe.tags.remove(self.tag)
+        self.session.commit()
+        Ingredient.delete(self.session, 1)
+
+        delta = self.sync(full.revision)
+        self.assertEqual(delta.upserts, 1)
+        self.assertEqual(delta.deletes, 2)
+        with self.replica.connect() as conn:
+            self.assertEqual(conn.execute(select(Recipe.name)).scalar(), "Crepes")
+            self.assertEqual(conn.execute(select(recipe_tags)).all(), [])
+            self.assertEqual(conn.execute(select(Ingredient.id)).all(), [])
+
+    def test_rejects_other_files(self):
+        """
+        Test that applying something that isn't a delta fails without changes.
+        """
+        with self.assertRaises(ValueError):
+            apply_changes(self.replica, io.StringIO('{"format": "other"}\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
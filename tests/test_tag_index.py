@@ -0,0 +1,161 @@
+"""
+Unit tests for the in-memory tag bitmap index and the tag commands.
+"""
+import json
+import unittest
+from click.testing import CliRunner
+from culinary_compass.cli.main import cli
+from culinary_compass.models import Session, Recipe, Tag
+from culinary_compass.tag_index import TagIndex, ids_from_bitmap, _bitmap_from_ids
+
+
+class TestTagIndex(unittest.TestCase):
+    """
+    Test case for AND/OR/NOT queries over tag bitmaps.
+    """
+    def setUp(self):
+        """
+        Build an index over recipes 1-10 directly from id lists.
+        """
+        size = 10
+        self.index = TagIndex(
+            {
+                "vegan": _bitmap_from_ids([1, 2, 3, 4], size),
+                "quick": _bitmap_from_ids([2, 4, 6, 8, 10], size),
+                "holiday": _bitmap_from_ids([3, 9], size),
+            },
+            _bitmap_from_ids(range(1, size + 1), size),
+        )
+
+    def test_bitmap_round_trip(self):
+        """
+        Test that ids survive conversion to a bitmap and back.
+        """
+        ids = [0, 7, 8, 63, 64, 1000]
+        self.assertEqual(ids_from_bitmap(_bitmap_from_ids(ids, 1000)), ids)
+
+    def test_queries(self):
+        """
+        Test AND, OR and NOT combinations, including case-insensitive names.
+        """
+        self.assertEqual(self.index.recipe_ids(all_tags=["vegan", "Quick"]), [2, 4])
+        self.assertEqual(self.index.recipe_ids(any_tags=["vegan", "holiday"]), [1, 2, 3, 4, 9])
+        self.assertEqual(self.index.recipe_ids(not_tags=["quick", "vegan"]), [5, 7, 9])
+        self.assertEqual(self.index.recipe_ids(all_tags=["vegan"], any_tags=["holiday"], not_tags=["quick"]), [3])
+        self.assertEqual(self.index.recipe_ids(all_tags=["unknown"]), [])
+        self.assertEqual(self.index.count(any_tags=["quick"]), 5)
+
+
+class TestTagIndexBuild(unittest.TestCase):
+    """
+    Test case for building the index from the database.
+    """
+    def setUp(self):
+        """
+        Create four recipes, tag three of them and delete the fourth.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.ids = {}
+        for name in ("Salad", "Curry", "Stollen", "Deleted"):
+            self.ids[name] = Recipe.create(self.session, name=name).id
+        tags = {name: Tag.create(self.session, name=name) for name in ("Vegan", "vegan", "Quick", "Holiday")}
+        assignments = {"Salad": ["Vegan", "Quick"], "Curry": ["vegan"], "Stollen": ["Holiday"], "Deleted": ["Quick"]}
+        for recipe_name, tag_names in assignments.items():
+            recipe = Recipe.get_by_id(self.session, self.ids[recipe_name])
+            recipe.tags.extend(tags[name] for name in tag_names)
+        self.session.commit()
+        Recipe.delete(self.session, self.ids["Deleted"])
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def test_build(self):
+        """
+        Test that the built index merges same-named tags and only covers existing recipes.
+        """
+        ids = self.ids
+        index = TagIndex.build(self.session)
+        self.assertEqual(sorted(index.bitmaps), ["holiday", "quick", "vegan"])
+        self.assertEqual(index.recipe_ids(), [ids["Salad"], ids["Curry"], ids["Stollen"]])
+        self.assertEqual(index.recipe_ids(all_tags=["VEGAN"]), [ids["Salad"], ids["Curry"]])
+        self.assertEqual(index.recipe_ids(any_tags=["quick"]), [ids["Salad"]])
+        self.assertEqual(index.recipe_ids(not_tags=["vegan"]), [ids["Stollen"]])
+
+    def test_build_empty(self):
+        """
+        Test that an index over a database without recipes matches nothing.
+        """
+        for recipe_id in self.ids.values():
+            Recipe.delete(self.session, recipe_id)
+        index = TagIndex.build(self.session)
+        self.assertEqual(index.recipe_ids(), [])
+        self.assertEqual(index.count(not_tags=["vegan"]), 0)
+
+
+class TestTagCommands(unittest.TestCase):
+    """
+    Test case for the tag commands, run in-process on the test database.
+    """
+    def setUp(self):
+        """
+        Create two untagged recipes.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.salad = Recipe.create(self.session, name="Salad").id
+        self.curry = Recipe.create(self.session, name="Curry").id
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def invoke(self, *args):
+        result = CliRunner().invoke(cli, ["--no-cache", *args])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def listing(self, *args):
+        return json.loads(self.invoke("--format", "json", *args))
+
+    def test_add_assign_and_list(self):
+        """
+        Test adding tags, including a duplicate, and listing them with their recipe counts.
+        """
+        self.assertIn("added successfully", self.invoke("tag", "add", "--name", "Vegan"))
+        self.assertIn("already exists", self.invoke("tag", "add", "--name", "Vegan"))
+        # Assigning matches existing tags ignoring case and creates missing ones
+        self.invoke("tag", "assign", str(self.salad), "vegan", "Quick")
+        self.invoke("tag", "assign", str(self.curry), "Vegan")
+        self.assertEqual(
+            [(row["name"], row["recipe_count"]) for row in self.listing("tag", "list")],
+            [("Vegan", 2), ("Quick", 1)],
+        )
+
+    def test_unassign_and_search(self):
+        """
+        Test combining tags in a search, before and after removing one from a recipe.
+        """
+        self.invoke("tag", "assign", str(self.salad), "Vegan", "Quick")
+        self.invoke("tag", "assign", str(self.curry), "Vegan")
+
+        def search(*args):
+            return [row["name"] for row in self.listing("tag", "search", *args)]
+
+        self.assertEqual(search("--all", "vegan", "--all", "quick"), ["Salad"])
+        self.assertEqual(search("--all", "Vegan", "--not", "Quick"), ["Curry"])
+        self.assertEqual(search("--any", "Quick", "--any", "Holiday"), ["Salad"])
+
+        self.invoke("tag", "unassign", str(self.salad), "QUICK")
+        self.assertEqual(search("--any", "Quick"), [])
+        self.assertEqual(search("--all", "Vegan"), ["Salad", "Curry"])
+        self.assertIn("not found", self.invoke("tag", "assign", "999", "Vegan"))
+
+
+if __name__ == "__main__":
+    unittest.main()
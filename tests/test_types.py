@@ -0,0 +1,95 @@
+"""
+Unit tests for the compressed, deferred recipe text columns.
+"""
+import unittest
+from sqlalchemy import event, inspect, text
+from culinary_compass.models import Session, Recipe
+from culinary_compass.models.types import COMPRESSED_PREFIX, COMPRESSION_THRESHOLD, decompress_text
+
+
+class TestCompressedText(unittest.TestCase):
+    """
+    Test case for storing long text compressed and keeping it out of listings.
+    """
+    def setUp(self):
+        """
+        Create a recipe with long instructions and a short description.
+        """
+        # Session is bound to a rolled-back test transaction by conftest.py
+        self.session = Session()
+        self.instructions = "Stir the sauce gently and let it simmer. " * 100
+        self.recipe = Recipe.create(self.session, name="Ragu", description="Slow cooked",
+                                    instructions=self.instructions)
+
+    def tearDown(self):
+        """
+        Close the database session.
+        """
+        self.session.close()
+
+    def raw(self, recipe_id):
+        return self.session.execute(
+            text("SELECT description, instructions FROM recipes WHERE id = :id"), {"id": recipe_id}
+        ).one()
+
+    def test_round_trip(self):
+        """
+        Test that long text is stored compressed, short text as-is, and both read back unchanged.
+        """
+        self.assertGreater(len(self.instructions.encode("utf-8")), COMPRESSION_THRESHOLD)
+        description, instructions = self.raw(self.recipe.id)
+        self.assertEqual(description, "Slow cooked")
+        self.assertTrue(instructions.startswith(COMPRESSED_PREFIX))
+        self.assertLess(len(instructions), len(self.instructions))
+
+        self.session.expire_all()
+        recipe = Recipe.get_by_id(self.session, self.recipe.id, with_text=True)
+        self.assertEqual((recipe.description, recipe.instructions), ("Slow cooked", self.instructions))
+
+    def test_reads_uncompressed_rows(self):
+        """
+        Test that rows written before compression existed, as text or plain bytes, read back as text.
+        """
+        old = "Brown the meat, then add the tomatoes. " * 50
+        recipe_id = self.session.execute(
+            text("INSERT INTO recipes (name, description, instructions) VALUES ('Old', :description, :instructions)"),
+            {"description": "Café style".encode("utf-8"), "instructions": old},
+        ).lastrowid
+        self.assertEqual(self.raw(recipe_id).instructions, old)
+
+        recipe = Recipe.get_by_id(self.session, recipe_id, with_text=True)
+        self.assertEqual((recipe.description, recipe.instructions), ("Café style", old))
+        self.assertIsNone(decompress_text(None))
+
+    def test_text_deferred_on_listings(self):
+        """
+        Test that list queries neither select nor load the text columns until they are accessed.
+        """
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith("SELECT"):
+                statements.append(statement)
+
+        self.session.expire_all()
+        engine = self.session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            recipes = Recipe.get_all(self.session)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn("instructions", statements[0])
+        self.assertNotIn("description", statements[0])
+        for recipe in recipes:
+            self.assertLessEqual({"description", "instructions"}, inspect(recipe).unloaded)
+
+        # Accessing one deferred column loads the whole text group
+        recipe = recipes[0]
+        self.assertEqual(recipe.instructions, self.instructions)
+        self.assertFalse({"description", "instructions"} & inspect(recipe).unloaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
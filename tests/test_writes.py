@@ -0,0 +1,138 @@
+"""
+Tests for the write retry policy under concurrent writers.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from culinary_compass.models import (
+    Base, Category, Ingredient, IngredientSubstitute, Recipe, RecipeIngredient, configure_sqlite, write_stats,
+)
+
+WRITERS = 4
+WRITES_PER_WRITER = 25
+
+RUN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "run.py")
+
+# Read-only commands that must keep working while another process writes
+READ_COMMANDS = [
+    ["category", "list"],
+    ["recipe", "list"],
+    ["recipe", "view", "1"],
+    ["recipe", "search", "--name", "Shared"],
+    ["nutrition", "show", "1"],
+    ["nutrition", "list"],
+    ["recipe", "search", "--ingredient", "Oat Milk", "--substitutes"],
+    ["substitute", "list", "Milk"],
+    ["plan", "generate", "--days", "1", "--pantry", "Oat Milk", "--substitutes", "--time-budget", "0"],
+]
+
+
+def _writer(path, worker):
+    """Create categories and keep renaming one shared recipe from a separate process"""
+    engine = configure_sqlite(create_engine(f"sqlite:///{path}"))
+    session = sessionmaker(bind=engine)()
+    write_stats.reset()
+    for i in range(WRITES_PER_WRITER):
+        Category.create(session, name=f"Writer {worker} #{i}")
+        Recipe.update(session, 1, name=f"Renamed by {worker}")
+    session.close()
+    engine.dispose()
+    return write_stats.as_dict()
+
+
+class TestConcurrentWrites(unittest.TestCase):
+    """
+    Test case for several processes writing to one database file at once.
+    """
+    def setUp(self):
+        """
+        Create a database with one recipe for every writer to update.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "shared.db")
+        self.engine = configure_sqlite(create_engine(f"sqlite:///{self.path}"))
+        Base.metadata.create_all(self.engine)
+        session = sessionmaker(bind=self.engine)()
+        Recipe.create(session, name="Shared")
+        session.close()
+
+    def tearDown(self):
+        """
+        Remove the temporary database.
+        """
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_no_failed_writes(self):
+        """
+        Test that every write succeeds when writers contend for the lock.
+        """
+        with ProcessPoolExecutor(WRITERS) as pool:
+            results = list(pool.map(_writer, [self.path] * WRITERS, range(WRITERS)))
+
+        self.assertEqual(sum(r["failures"] for r in results), 0)
+        self.assertEqual(sum(r["writes"] for r in results), WRITERS * WRITES_PER_WRITER * 2)
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(select(func.count(Category.id))).scalar(), WRITERS * WRITES_PER_WRITER)
+
+
+class TestReadsDuringWrites(unittest.TestCase):
+    """
+    Test case for read commands run while another process holds the write lock.
+    """
+    def setUp(self):
+        """
+        Create a database file where the CLI expects it, with one recipe
+        and a substitution closure left stale by a removed edge.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "culinary_compass.db")
+        engine = configure_sqlite(create_engine(f"sqlite:///{self.path}"))
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        category = Category.create(session, name="Supper")
+        recipe = Recipe.create(session, name="Shared", category_id=category.id, serving_size=2)
+        RecipeIngredient.create_many(session, recipe.id, [(1, "cup", "Milk")])
+        milk = Ingredient.get_by_name(session, "Milk")
+        oat_milk = Ingredient.create(session, name="Oat Milk")
+        cream = Ingredient.create(session, name="Cream")
+        IngredientSubstitute.add(session, milk.id, oat_milk.id)
+        IngredientSubstitute.add(session, milk.id, cream.id)
+        IngredientSubstitute.remove(session, milk.id, cream.id)
+        session.close()
+        engine.dispose()
+
+    def tearDown(self):
+        """
+        Remove the temporary database.
+        """
+        self.tmp.cleanup()
+
+    def test_read_commands_succeed_while_locked(self):
+        """
+        Test that read commands neither write nor wait for the write lock, so
+        they succeed while another connection keeps a write transaction open.
+        """
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO categories (name) VALUES ('Pending')")
+        try:
+            for command in READ_COMMANDS:
+                with self.subTest(command=command):
+                    result = subprocess.run([sys.executable, RUN, "--no-cache", "--format", "json"] + command,
+                                            cwd=self.tmp.name, capture_output=True, text=True, timeout=60)
+                    self.assertEqual(result.returncode, 0, result.stderr)
+                    self.assertNotIn("locked", result.stdout + result.stderr)
+        finally:
+            writer.rollback()
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()